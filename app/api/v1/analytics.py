@@ -1,39 +1,98 @@
-from typing import Any, Dict
-from fastapi import APIRouter, Depends, HTTPException, Query
+import base64
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse
 
+from app.core.concurrency import run_in_io_pool
 from app.core.config import get_settings
-from app.services.metrics import metrics_collector
+from app.services.cache import TieredCache
+from app.services.metrics import SERIES_INTERVALS, metrics_collector, pick_series_interval
+from app.services.summary_cache import etag_matches, summary_cache
 
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
+INTERVAL_PATTERN = "^(" + "|".join(SERIES_INTERVALS) + ")$"
+
+settings = get_settings()
+
+# Short-lived: the window ends at "now", so entries go stale quickly
+metric_series_cache = TieredCache(
+    name="metric_series",
+    ttl=settings.METRIC_SERIES_CACHE_TTL_SECONDS,
+    max_entries=settings.METRIC_SERIES_CACHE_MAX_ENTRIES
+)
+
 @router.get("/summary")
 async def get_analytics_summary(
     days: int = Query(7, ge=1, le=30),
+    if_none_match: Optional[str] = Header(None),
     settings = Depends(get_settings)
-) -> Dict[str, Any]:
-    
+):
+    generation = await run_in_io_pool(summary_cache.generation)
+    headers = {"Cache-Control": "no-cache"}
+
+    if generation is not None:
+        headers["ETag"] = summary_cache.etag(generation, days)
+        if etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
     try:
-        summary = metrics_collector.get_metrics_summary(days)
-        return summary
-    
+        summary = await run_in_io_pool(summary_cache.get, generation, days)
+        if summary is None:
+            # A summary cached under this generation must include the upsert that
+            # bumped it, which a lagging replica may not have replayed yet; only
+            # uncached (Redis down) summaries may come from the replica
+            summary = await metrics_collector.get_metrics_summary_async(days, replica=generation is None)
+            await run_in_io_pool(summary_cache.set, generation, days, summary)
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get analytics: {str(e)}")
-    
+
+    if "error" in summary:
+        raise HTTPException(status_code=500, detail=f"Failed to get analytics: {summary['error']}")
+
+    return JSONResponse(summary, headers=headers)
+
+
+def encode_cursor(bucket: datetime) -> str:
+    return base64.urlsafe_b64encode(bucket.isoformat().encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> datetime:
+    try:
+        bucket = datetime.fromisoformat(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+    except (ValueError, UnicodeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+    return bucket if bucket.tzinfo else bucket.replace(tzinfo=timezone.utc)
 
 @router.get("/metrics/{metric_name}")
 async def get_metric_history(
     metric_name: str,
     hours: int = Query(24, ge=1, le=168),
+    interval: Optional[str] = Query(None, pattern=INTERVAL_PATTERN),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(500, ge=1, le=1000),
     settings = Depends(get_settings)
 ):
+    interval = interval or pick_series_interval(hours, settings.METRIC_SERIES_MAX_POINTS)
+    cache_key = f"{metric_name}:{hours}:{interval}:{cursor or ''}:{limit}"
+
+    cached = await run_in_io_pool(metric_series_cache.get, cache_key)
+    if cached is not None:
+        return cached
+
+    after = decode_cursor(cursor) if cursor else None
+
     try:
-        return {
-            "metric_name": metric_name,
-            "period": f'Last {hours} hours',
-            "data": []
-        }
-    
+        series = await metrics_collector.get_metric_series_async(metric_name, hours, interval, after, limit)
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get metric history: {str(e)}")
-    
+
+    next_bucket = series.pop("next")
+    series["next_cursor"] = encode_cursor(next_bucket) if next_bucket else None
+
+    await run_in_io_pool(metric_series_cache.set, cache_key, series)
+    return series
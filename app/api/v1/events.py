@@ -0,0 +1,24 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import crud
+from app.db.session import get_async_db
+from app.schemas.events import ModerationEventResponse
+
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+@router.get("/{item_id}", response_model=List[ModerationEventResponse])
+async def get_events_for_item(
+    item_id: str,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # The primary, not the replica: callers look events up right after submitting them
+    events = await crud.get_event_by_source_id_async(item_id, limit=limit, db=db)
+
+    if not events:
+        raise HTTPException(status_code=404, detail="No events for this item")
+
+    return events
@@ -1,43 +1,122 @@
-from typing import Optional
+import logging
+import time
+from typing import Any, Dict, Optional
 import uuid
+from celery import states
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from pydantic import HttpUrl
 
+from app.api.v1.moderation import check_callback_url, task_event_stream
 from app.core.celery_app import celery_app
+from app.core.concurrency import run_in_io_pool
 from app.core.config import get_settings
-from app.schemas.image import ImageAnalysisResponse, ImageModerationResult, ImageUploadResponse
+from app.core.instrumentation import STAGE_LATENCY
+from app.db.event_sink import event_sink
+from app.schemas.image import ImageModerationResult, ImageUploadResponse
 from app.services.file_storage import FileStorageService
+from app.services.image_dedup import build_result_from_analysis, image_dedup_index
+from app.services.result_stream import register_callback_async, result_publisher
 
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 file_storage = FileStorageService()
 
-@router.post("/image", status_code=202, response_model=ImageAnalysisResponse)
+def _reuse_prior_verdict(
+    file_path: str,
+    source_id: str,
+    file_metadata: Dict[str, Any],
+    callback_url: Optional[str] = None
+) -> Optional[str]:
+    """Answer a re-upload from its earlier analysis; returns the synthetic task id, or None on a miss."""
+
+    try:
+        analysis = image_dedup_index.find_duplicate(
+            file_metadata.get('file_hash'),
+            file_metadata.get('perceptual_hash')
+        )
+    except Exception as e:
+        logger.warning(f"Image dedup lookup failed: {e}")
+        return None
+
+    if analysis is None:
+        return None
+
+    prior_event = analysis.moderation_event
+
+    # The new blob is left alone: an exact match shares it with the prior
+    # upload, and a near-duplicate one is unreferenced and swept by retention
+    file_metadata["file_path"] = prior_event.file_path
+    file_metadata["duplicate_of"] = prior_event.id
+
+    result = build_result_from_analysis(analysis, file_metadata, source_id)
+
+    task_id = str(uuid.uuid4())
+    celery_app.backend.store_result(task_id, result, states.SUCCESS)
+
+    # No worker runs for a reused verdict, so announce it here
+    if callback_url:
+        result_publisher.register_callback(task_id, callback_url)
+    result_publisher.publish(task_id, result)
+
+    event_sink.add_event(
+        source="image",
+        item_id=source_id,
+        verdict=result["verdict"],
+        scores=result["scores"],
+        file_path=prior_event.file_path,
+        file_size=file_metadata.get('file_size'),
+        file_type=file_metadata.get('file_type'),
+        image_dimensions=file_metadata.get('dimensions', {})
+    )
+
+    logger.info(f"Reused verdict of event {prior_event.id} for {source_id}")
+    return task_id
+
+@router.post("/image", status_code=202, response_model=ImageUploadResponse)
 async def moderate_image(
     file: UploadFile = File(...),
     source_id: Optional[str] = None,
+    callback_url: Optional[HttpUrl] = None,
     settings = Depends(get_settings)
 ):
     try:
+        callback = await check_callback_url(callback_url, settings)
+
         if not source_id:
             source_id = f"img-{uuid.uuid4().hex[:8]}"
             
         if not file.content_type or not file.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail="File must be an image")
 
-        file_content = await file.read()
+        file_path, file_metadata = await file_storage.save_upload_stream(file, file.filename or "uploaded_image")
+
+        if settings.IMAGE_DEDUP_ENABLED:
+            task_id = await run_in_io_pool(_reuse_prior_verdict, file_path, source_id, file_metadata, callback)
 
-        file_path, file_metadata = file_storage.save_uploaded_file(file_content, file.filename or "uploaded_image")
+            if task_id is not None:
+                return ImageUploadResponse(task_id=task_id, file_info=file_metadata)
 
-        task = celery_app.send_task(
+        task_id = str(uuid.uuid4())
+        if callback:
+            await register_callback_async(task_id, callback)
+
+        enqueue_started = time.perf_counter()
+        task = await run_in_io_pool(
+            celery_app.send_task,
             "tasks.image.scan",
-            args=[file_path, source_id, file_metadata]
+            args=[file_path, source_id, file_metadata],
+            task_id=task_id
         )
+        STAGE_LATENCY.labels(stage="enqueue").observe(time.perf_counter() - enqueue_started)
 
         return ImageUploadResponse(
             task_id=task.id,
             file_info=file_metadata
         )
     
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -66,4 +145,11 @@ async def get_image_moderation_result(task_id: str):
             )
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get result: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to get result: {str(e)}")
+
+
+@router.get("/image/{task_id}/events")
+async def stream_image_moderation_result(task_id: str):
+    """Server-sent events: one ``result`` event when the analysis completes, then ``done``."""
+
+    return task_event_stream(task_id)
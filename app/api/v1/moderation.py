@@ -1,18 +1,215 @@
-from fastapi import APIRouter, Depends
-from app.schemas.moderation import TextPayload, TaskResponse, TaskResult
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from celery import group
+from celery.result import GroupResult
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.schemas.moderation import (
+    BatchItemRef,
+    BatchItemResult,
+    BatchResponse,
+    BatchResult,
+    TextBatchPayload,
+    TextPayload,
+    TaskResponse,
+    TaskResult,
+)
 from app.core.config import get_settings
 from app.core.celery_app import celery_app
+from app.core.concurrency import run_in_io_pool
+from app.core.instrumentation import STAGE_LATENCY
+from app.services.result_stream import (
+    CallbackUrlError,
+    batch_channel,
+    register_callback_async,
+    stream_results,
+    task_channel,
+    validate_callback_url,
+)
 
 router = APIRouter()
 
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+async def check_callback_url(callback_url: Optional[Any], settings) -> Optional[str]:
+    if callback_url is None:
+        return None
+    if not settings.WEBHOOK_SECRET:
+        raise HTTPException(status_code=400, detail="Webhook callbacks are not configured")
+
+    try:
+        await run_in_io_pool(validate_callback_url, str(callback_url))
+    except CallbackUrlError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return str(callback_url)
+
+def stored_task_results(*task_ids: str) -> Dict[str, Any]:
+    """Results already in the Celery backend, keyed by task id; blocking."""
+
+    results = {}
+    for task_id in task_ids:
+        async_result = celery_app.AsyncResult(task_id)
+        if async_result.successful():
+            results[task_id] = async_result.result
+        elif async_result.failed():
+            results[task_id] = {"verdict": "error", "error": str(async_result.result)}
+    return results
+
+def batch_chunk_ids(batch_id: str) -> Optional[List[str]]:
+    """Chunk task ids of a saved batch, or None if there is no such batch; blocking."""
+
+    group_result = GroupResult.restore(batch_id, app=celery_app)
+    if group_result is None:
+        return None
+    return [chunk_result.id for chunk_result in group_result.results]
+
+def collect_batch(batch_id: str) -> Optional[Tuple[List[str], Dict[str, Any]]]:
+    """``batch_chunk_ids`` plus the chunk results stored so far; blocking."""
+
+    chunk_ids = batch_chunk_ids(batch_id)
+    if chunk_ids is None:
+        return None
+    return chunk_ids, stored_task_results(*chunk_ids)
+
+def enqueue_batch(chunks: List[List[Dict[str, Any]]], chunk_ids: List[str]) -> GroupResult:
+    """Publish one ``scan_batch`` task per chunk and save the group for polling; blocking."""
+
+    group_result = group(
+        celery_app.signature("tasks.text.scan_batch", args=[chunk]).set(task_id=chunk_id)
+        for chunk, chunk_id in zip(chunks, chunk_ids)
+    ).apply_async()
+    group_result.save()
+    return group_result
+
+def task_event_stream(task_id: str) -> StreamingResponse:
+    async def lookup():
+        return await run_in_io_pool(stored_task_results, task_id)
+
+    return StreamingResponse(
+        stream_results(task_channel(task_id), [task_id], lookup),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 @router.post("/text", status_code=202, response_model=TaskResponse)
-async def moderate_text(item: TextPayload, settings: dict = Depends(get_settings)):
-    task = celery_app.send_task("tasks.text.scan", args=[item.content, item.source_id])
+async def moderate_text(item: TextPayload, settings = Depends(get_settings)):
+    callback_url = await check_callback_url(item.callback_url, settings)
+
+    # The id is fixed up front so the callback is registered before the task can finish
+    task_id = str(uuid.uuid4())
+    if callback_url:
+        await register_callback_async(task_id, callback_url)
+
+    with STAGE_LATENCY.labels(stage="enqueue").time():
+        task = celery_app.send_task("tasks.text.scan", args=[item.content, item.source_id], task_id=task_id)
     return TaskResponse(task_id=task.id)
 
 @router.get("/task/{task_id}", response_model=TaskResult)
-async def get_text_result(task_id: str):
-    result = celery_app.AsyncResult(task_id).result
-    if result:
+async def get_text_result(task_id: str, index: Optional[int] = Query(None, ge=0)):
+    """Result of a text task; for a batch chunk, ``index`` picks the item (see ``BatchItemRef``)."""
+
+    result = await run_in_io_pool(lambda: celery_app.AsyncResult(task_id).result)
+
+    if isinstance(result, list):
+        if index is None or index >= len(result):
+            raise HTTPException(status_code=400, detail=f"Task is a batch chunk of {len(result)} items; pass ?index=")
+        result = result[index]
+
+    if isinstance(result, dict):
         return TaskResult(verdict=result["verdict"], scores=result["scores"])
-    return TaskResult(status="pending")
\ No newline at end of file
+    return TaskResult(status="pending")
+
+@router.get("/task/{task_id}/events")
+async def stream_text_result(task_id: str):
+    """Server-sent events: one ``result`` event when the task completes, then ``done``."""
+
+    return task_event_stream(task_id)
+
+@router.post("/text/batch", status_code=202, response_model=BatchResponse)
+async def moderate_text_batch(payload: TextBatchPayload, settings = Depends(get_settings)):
+    if not payload.items:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one item")
+
+    if len(payload.items) > settings.TEXT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {settings.TEXT_BATCH_MAX_ITEMS} items"
+        )
+
+    callback_url = await check_callback_url(payload.callback_url, settings)
+
+    size = settings.TEXT_BATCH_CHUNK_SIZE
+    chunks = [
+        [{"content": item.content, "source_id": item.source_id} for item in payload.items[start:start + size]]
+        for start in range(0, len(payload.items), size)
+    ]
+
+    chunk_ids = [str(uuid.uuid4()) for _ in chunks]
+    if callback_url:
+        for chunk_id in chunk_ids:
+            await register_callback_async(chunk_id, callback_url)
+
+    with STAGE_LATENCY.labels(stage="enqueue").time():
+        group_result = await run_in_io_pool(enqueue_batch, chunks, chunk_ids)
+
+    items = [
+        BatchItemRef(source_id=item["source_id"], task_id=chunk_result.id, index=index)
+        for chunk, chunk_result in zip(chunks, group_result.results)
+        for index, item in enumerate(chunk)
+    ]
+
+    return BatchResponse(batch_id=group_result.id, items=items)
+
+@router.get("/batch/{batch_id}", response_model=BatchResult)
+async def get_text_batch_result(batch_id: str):
+    batch = await run_in_io_pool(collect_batch, batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    chunk_ids, stored = batch
+    results = []
+    completed_chunks = 0
+
+    for chunk_id in chunk_ids:
+        # Failed chunks are stored as an error dict, not a list of items
+        chunk_items = stored.get(chunk_id)
+        if not isinstance(chunk_items, list):
+            continue
+
+        completed_chunks += 1
+        results.extend(BatchItemResult(**item) for item in chunk_items)
+
+    total_chunks = len(chunk_ids)
+    if completed_chunks == total_chunks:
+        status = "completed"
+    elif completed_chunks:
+        status = "partial"
+    else:
+        status = "pending"
+
+    return BatchResult(
+        batch_id=batch_id,
+        status=status,
+        total_chunks=total_chunks,
+        completed_chunks=completed_chunks,
+        results=results
+    )
+
+@router.get("/batch/{batch_id}/events")
+async def stream_text_batch_results(batch_id: str):
+    """Server-sent events: a ``result`` event per completed chunk, then ``done``."""
+
+    chunk_ids = await run_in_io_pool(batch_chunk_ids, batch_id)
+    if chunk_ids is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    async def lookup():
+        return await run_in_io_pool(stored_task_results, *chunk_ids)
+
+    return StreamingResponse(
+        stream_results(batch_channel(batch_id), chunk_ids, lookup),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
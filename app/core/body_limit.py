@@ -0,0 +1,50 @@
+from typing import Iterable
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class BodySizeLimitMiddleware:
+    """Refuse request bodies over ``max_bytes`` on ``paths`` before they are parsed.
+
+    Starlette spools a multipart upload to a temporary file before the
+    handler runs, so a size check in the handler only fires after the
+    whole body has crossed the network and hit the disk. A declared
+    ``Content-Length`` over the limit is answered with 413 without reading
+    the body; otherwise (chunked uploads) bytes are counted as they arrive
+    and parsing is aborted with 413 as soon as they pass the limit.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int, paths: Iterable[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Request body is too large: more than {self.max_bytes} bytes"
+
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_bytes:
+                await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body parsing as-is
+                    raise HTTPException(status_code=413, detail=detail)
+
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -1,5 +1,10 @@
+import time
+
 from celery import Celery
+from celery.signals import before_task_publish, task_prerun
+
 from app.core.config import get_settings
+from app.core.instrumentation import STAGE_LATENCY
 
 settings = get_settings()
 celery_app = Celery(
@@ -8,4 +13,16 @@ celery_app = Celery(
     backend=settings.REDIS_URL,
 )
 
-celery_app.autodiscover_tasks(["app.tasks"])
\ No newline at end of file
+celery_app.autodiscover_tasks(["app.tasks"])
+
+@before_task_publish.connect
+def stamp_enqueued_at(headers=None, **kwargs):
+    # Wall clock, since publisher and worker may be different machines
+    if headers is not None:
+        headers["enqueued_at"] = time.time()
+
+@task_prerun.connect
+def observe_queue_wait(task=None, **kwargs):
+    enqueued_at = task.request.get("enqueued_at") if task is not None else None
+    if enqueued_at:
+        STAGE_LATENCY.labels(stage="queue_wait").observe(max(time.time() - float(enqueued_at), 0.0))
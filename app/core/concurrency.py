@@ -0,0 +1,32 @@
+import functools
+from typing import Any, Callable, Optional, TypeVar
+
+import anyio
+
+from app.core.config import get_settings
+
+
+settings = get_settings()
+
+T = TypeVar("T")
+
+_io_limiter: Optional[anyio.CapacityLimiter] = None
+
+def _get_io_limiter() -> anyio.CapacityLimiter:
+    # Created lazily: the limiter binds to the running event loop's backend
+    global _io_limiter
+    if _io_limiter is None:
+        _io_limiter = anyio.CapacityLimiter(settings.IO_THREAD_POOL_SIZE)
+    return _io_limiter
+
+async def run_in_io_pool(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run blocking disk, libmagic, PIL or broker work on a bounded thread pool.
+
+    Kept separate from Starlette's default threadpool so a slow disk or
+    broker can't starve sync endpoints and dependencies.
+    """
+
+    return await anyio.to_thread.run_sync(
+        functools.partial(func, *args, **kwargs),
+        limiter=_get_io_limiter()
+    )
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Dict, List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
@@ -8,14 +9,144 @@ class Settings(BaseSettings):
     
     # Database
     POSTGRES_DSN: str = "postgresql://practice@localhost/practice"
+    POSTGRES_REPLICA_DSN: str = ""  # analytics reads go here when set
+
+    # Async (asyncpg) pool used by the API's read endpoints, per process
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 10.0
     
+    # Write-behind event sink
+    EVENT_SINK_BATCH_SIZE: int = 500
+    EVENT_SINK_FLUSH_INTERVAL: float = 1.0
+    EVENT_SINK_MAX_PENDING: int = 50000
+
+    # Buffered system metrics and their 1m/1h rollups
+    METRIC_SINK_BATCH_SIZE: int = 1000
+    METRIC_SINK_FLUSH_INTERVAL: float = 5.0
+    METRIC_SINK_MAX_PENDING: int = 100000
+    METRIC_HISTORY_RAW_MAX_HOURS: int = 2
+    METRIC_HISTORY_MINUTE_MAX_HOURS: int = 48
+    METRIC_SERIES_MAX_POINTS: int = 300
+    METRIC_SERIES_P95_MAX_HOURS: int = 6  # longer series omit p95 rather than scan raw samples
+    METRIC_SERIES_CACHE_TTL_SECONDS: int = 15
+    METRIC_SERIES_CACHE_MAX_ENTRIES: int = 1000
+    ANALYTICS_SUMMARY_CACHE_TTL_SECONDS: int = 60 * 60
+
+    # Partitioning and retention
+    PARTITION_MONTHS_AHEAD: int = 2
+    PARTITION_DROP_LOCK_TIMEOUT_MS: int = 2000  # max wait for the parent lock when detaching
+    MODERATION_EVENTS_RETENTION_DAYS: int = 365
+    RETENTION_DAYS_BY_SOURCE: Dict[str, int] = {}
+    SYSTEM_METRICS_RETENTION_DAYS: int = 30
+    METRIC_ROLLUP_1M_RETENTION_DAYS: int = 90
+    METRIC_ROLLUP_1H_RETENTION_DAYS: int = 730
+    RETENTION_CHUNK_SIZE: int = 5000
+    RETENTION_MAX_RUNTIME_SECONDS: int = 600
+    UPLOAD_ORPHAN_GRACE_HOURS: int = 24
+
+    # File storage
+    UPLOAD_DIR: str = "uploads/images"
+    UPLOAD_MAX_BODY_BYTES: int = 10 * 1024 * 1024 + 64 * 1024  # 10 MB image plus multipart framing
+    IO_THREAD_POOL_SIZE: int = 16
+
+    # Blob store: "local", "mmap" (zero-copy reads on co-located workers) or "s3"
+    BLOB_STORE_BACKEND: str = "local"
+    BLOB_S3_BUCKET: str = "moderation-uploads"
+    BLOB_S3_ENDPOINT_URL: str = ""  # e.g. http://localhost:9000 for MinIO
+    BLOB_S3_ACCESS_KEY: str = ""
+    BLOB_S3_SECRET_KEY: str = ""
+    BLOB_S3_REGION: str = ""
+
+    # Result push delivery (SSE streams and signed webhooks)
+    RESULT_STREAM_TIMEOUT_SECONDS: int = 300
+    RESULT_STREAM_KEEPALIVE_SECONDS: int = 15
+    WEBHOOK_SECRET: str = ""
+    WEBHOOK_REQUIRE_HTTPS: bool = True
+    WEBHOOK_ALLOWED_HOSTS: List[str] = []  # if set, only these hosts (".example.com" for subdomains)
+
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     
     # External APIs
     OPENAI_API_KEY: str = ""
     HUGGING_FACE_ACCESS_TOKEN: str = ""
+
+    # Provider HTTP clients
+    HTTP_TIMEOUT_SECONDS: float = 10.0
+    HTTP_MAX_RETRIES: int = 3
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_CONCURRENCY: int = 8
+    HTTP2_ENABLED: bool = True
+    HF_MAX_CONCURRENCY: int = 8
+
+    # Provider routing (hedging and circuit breaking between HF and OpenAI)
+    PROVIDER_ROUTING_ENABLED: bool = True
+    PROVIDER_HEDGE_MIN_DELAY_MS: float = 50.0
+    PROVIDER_HEDGE_MAX_DELAY_MS: float = 2000.0
+    PROVIDER_REQUEST_TIMEOUT_SECONDS: float = 30.0
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_SECONDS: float = 30.0
+
+    # Text model backend: "remote" (HF inference API) or "local" (in-process transformers)
+    TEXT_MODEL_BACKEND: str = "remote"
+    LOCAL_TEXT_MODEL_PATH: str = "unitary/toxic-bert"
+    LOCAL_TEXT_MODEL_QUANTIZE: bool = False
+    LOCAL_TEXT_MODEL_THREADS: int = 0
+    LOCAL_TEXT_MODEL_BATCH_SIZE: int = 32
+
+    # Text inference batching
+    HF_BATCH_MAX_SIZE: int = 16
+    HF_BATCH_MAX_WAIT_MS: float = 20.0
+
+    # Long-text chunking (toxic-bert sees at most 512 tokens, including [CLS] and [SEP])
+    TEXT_CHUNK_MAX_TOKENS: int = 500
+    TEXT_CHUNK_OVERLAP_TOKENS: int = 64
+    TEXT_CHUNK_WAVE_SIZE: int = 16
+    TEXT_CHUNK_MAX_CHUNKS: int = 64
+
+    # Batch text endpoint
+    TEXT_BATCH_MAX_ITEMS: int = 1000
+    TEXT_BATCH_CHUNK_SIZE: int = 50
+
+    # Cascade prefilter in front of the text and image models
+    CASCADE_ENABLED: bool = True
+    CASCADE_MIN_TEXT_LENGTH: int = 3
+    CASCADE_BLOCKLIST_PATH: str = ""  # one term per line, always flagged
+    CASCADE_ALLOWLIST_PATH: str = ""  # one text per line, always clean
+    CASCADE_TEXT_MODEL_PATH: str = ""  # JSON {"bias": ..., "weights": {token: weight}}
+    CASCADE_CLEAN_BELOW: float = 0.05
+    CASCADE_FLAG_ABOVE: float = 0.95
+    CASCADE_TINY_IMAGE_MAX_SIDE: int = 32
+
+    # Verdict cache
+    VERDICT_CACHE_ENABLED: bool = True
+    VERDICT_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    VERDICT_CACHE_MAX_ENTRIES: int = 10_000
+
+    # Image model backend: "remote" (HF inference API) or "local" (in-process torch/ONNX)
+    IMAGE_MODEL_BACKEND: str = "remote"
+    LOCAL_IMAGE_MODEL_PATH: str = "Falconsai/nsfw_image_detection"
+    LOCAL_IMAGE_MODEL_RUNTIME: str = "torch"  # or "onnx"
+    LOCAL_IMAGE_MODEL_THREADS: int = 0
+    IMAGE_BATCH_MAX_SIZE: int = 16
+    IMAGE_BATCH_MAX_WAIT_MS: float = 10.0
+
+    # Image analyzer pipeline
+    IMAGE_PIPELINE_WORKERS: int = 6
+    IMAGE_NSFW_TIMEOUT_SECONDS: float = 30.0
+    IMAGE_OBJECTS_TIMEOUT_SECONDS: float = 15.0
+    IMAGE_OCR_TIMEOUT_SECONDS: float = 15.0
+
+    # Image dedup
+    IMAGE_DEDUP_ENABLED: bool = True
+    IMAGE_DEDUP_MAX_DISTANCE: int = 4
+    IMAGE_DEDUP_REFRESH_SECONDS: int = 30
     
+    # Metrics (multiprocess mode is enabled by the PROMETHEUS_MULTIPROC_DIR env var)
+    QUEUE_DEPTH_QUEUES: List[str] = ["celery"]
+    WORKER_METRICS_PORT: int = 0  # serve worker metrics on this port; 0 disables
+
     # Environment
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
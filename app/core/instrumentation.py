@@ -0,0 +1,127 @@
+"""Process-local Prometheus metrics.
+
+Set ``PROMETHEUS_MULTIPROC_DIR`` (to an empty, writable directory) before
+any process imports ``prometheus_client`` to aggregate Celery prefork
+children and multiple API workers; ``build_registry`` then collects from
+that directory instead of this process only.
+"""
+
+import logging
+import os
+from typing import List, Optional
+
+import redis
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+
+logger = logging.getLogger(__name__)
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+STAGE_LATENCY = Histogram(
+    "moderation_stage_seconds",
+    "Latency of pipeline stages (upload, hash, enqueue, queue_wait, analyze, db_write)",
+    ["stage"],
+    buckets=STAGE_BUCKETS
+)
+
+PROVIDER_LATENCY = Histogram(
+    "moderation_provider_request_seconds",
+    "Latency of single provider HTTP attempts",
+    ["provider"],
+    buckets=STAGE_BUCKETS
+)
+
+PROVIDER_ERRORS = Counter(
+    "moderation_provider_errors_total",
+    "Failed provider HTTP attempts by reason (transport, http_4xx, http_5xx, http_429)",
+    ["provider", "reason"]
+)
+
+
+CACHE_LOOKUPS = Counter(
+    "moderation_cache_lookups_total",
+    "Cache lookups by cache name and result (hit_local, hit_redis, miss)",
+    ["cache", "result"]
+)
+
+RETENTION_ROWS_DELETED = Counter(
+    "retention_rows_deleted_total",
+    "Rows removed by chunked retention deletes",
+    ["table"]
+)
+
+RETENTION_BYTES_RECLAIMED = Counter(
+    "retention_bytes_reclaimed_total",
+    "Bytes reclaimed by dropped partitions and swept upload files",
+    ["target"]
+)
+
+CASCADE_DECISIONS = Counter(
+    "moderation_cascade_decisions_total",
+    "Prefilter outcomes by content kind; decision=escalated went on to the full model",
+    ["kind", "decision"]
+)
+
+PROVIDER_CALLS = Counter(
+    "moderation_provider_calls_total",
+    "Text provider calls by outcome (success, failure, rejected by an open circuit)",
+    ["provider", "outcome"]
+)
+
+PROVIDER_HEDGES = Counter(
+    "moderation_provider_hedges_total",
+    "Hedged requests sent because the first provider was slower than its p95",
+    ["provider"]
+)
+
+WRITE_BEHIND_DEAD_LETTERS = Counter(
+    "write_behind_dead_letters_total",
+    "Items a write-behind sink gave up on because the database rejected them individually",
+    ["sink"]
+)
+
+
+class QueueDepthCollector:
+    """Reports Celery queue lengths from the Redis broker at scrape time."""
+
+    def __init__(self, redis_url: str, queues: List[str]):
+        self.queues = queues
+        self._redis = redis.Redis.from_url(redis_url, socket_timeout=1.0)
+
+    def collect(self):
+        gauge = GaugeMetricFamily("moderation_queue_depth", "Messages waiting in the broker queue", labels=["queue"])
+
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for queue in self.queues:
+                pipe.llen(queue)
+            for queue, depth in zip(self.queues, pipe.execute()):
+                gauge.add_metric([queue], depth)
+        except redis.RedisError as e:
+            logger.warning(f"Could not read queue depth: {e}")
+
+        yield gauge
+
+
+_registry: Optional[CollectorRegistry] = None
+
+def build_registry(redis_url: Optional[str] = None, queues: Optional[List[str]] = None) -> CollectorRegistry:
+    """Registry to expose: multiprocess-aggregated when configured, plus queue depth if ``redis_url`` is given."""
+
+    global _registry
+    if _registry is not None:
+        return _registry
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    if redis_url:
+        registry.register(QueueDepthCollector(redis_url, queues or ["celery"]))
+
+    _registry = registry
+    return registry
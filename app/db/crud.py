@@ -1,8 +1,10 @@
-from typing import Any, Dict, Optional
-from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from app.db.models import ImageAnalysis, ModerationEvent
-from app.db.session import get_db_session
+from app.db.session import get_async_db_session, get_db_session
 
 def save_event(
         source: str,
@@ -90,6 +92,7 @@ def save_image_analysis(
     text_in_image: Optional[str] = None,
     image_hash: Optional[str] = None,
     processing_time: Optional[float] = None,
+    perceptual_hash: Optional[str] = None,
     db: Optional[Session] = None
 ) -> ImageAnalysis:
     
@@ -106,7 +109,8 @@ def save_image_analysis(
             nsfw_scores=nsfw_scores,
             text_in_image=text_in_image,
             image_hash=image_hash,
-            processing_time=processing_time
+            processing_time=processing_time,
+            perceptual_hash=perceptual_hash
         )
 
         db.add(analysis)
@@ -121,4 +125,152 @@ def save_image_analysis(
     
     finally:
         if should_close_db:
-            db.close()
\ No newline at end of file
+            db.close()
+
+
+def get_image_analysis_by_id(analysis_id: int, db: Optional[Session] = None) -> Optional[ImageAnalysis]:
+    should_close_db = False
+
+    if db is None:
+        db = get_db_session()
+        should_close_db = True
+
+    try:
+        return db.query(ImageAnalysis).options(
+            joinedload(ImageAnalysis.moderation_event)
+        ).filter(ImageAnalysis.id == analysis_id).first()
+
+    finally:
+        if should_close_db:
+            db.close()
+
+
+def get_image_analysis_by_hash(image_hash: str, db: Optional[Session] = None) -> Optional[ImageAnalysis]:
+    should_close_db = False
+
+    if db is None:
+        db = get_db_session()
+        should_close_db = True
+
+    try:
+        return db.query(ImageAnalysis).join(ImageAnalysis.moderation_event).options(
+            joinedload(ImageAnalysis.moderation_event)
+        ).filter(
+            ImageAnalysis.image_hash == image_hash,
+            ModerationEvent.verdict != "error"
+        ).order_by(ImageAnalysis.id.desc()).first()
+
+    finally:
+        if should_close_db:
+            db.close()
+
+
+def get_perceptual_hashes_after(
+        last_id: int,
+        limit: int = 10000,
+        db: Optional[Session] = None
+) -> List[Tuple[int, str]]:
+    should_close_db = False
+
+    if db is None:
+        db = get_db_session()
+        should_close_db = True
+
+    try:
+        rows = db.query(ImageAnalysis.id, ImageAnalysis.perceptual_hash).join(
+            ImageAnalysis.moderation_event
+        ).filter(
+            ImageAnalysis.id > last_id,
+            ImageAnalysis.perceptual_hash.isnot(None),
+            ModerationEvent.verdict != "error"
+        ).order_by(ImageAnalysis.id).limit(limit).all()
+
+        return [(row.id, row.perceptual_hash) for row in rows]
+
+    finally:
+        if should_close_db:
+            db.close()
+
+
+async def get_event_by_id_async(event_id: int, db: Optional[AsyncSession] = None) -> Optional[ModerationEvent]:
+    should_close_db = False
+
+    if db is None:
+        db = get_async_db_session()
+        should_close_db = True
+
+    try:
+        return await db.scalar(select(ModerationEvent).where(ModerationEvent.id == event_id))
+
+    finally:
+        if should_close_db:
+            await db.close()
+
+
+async def get_event_by_source_id_async(
+        item_id: str,
+        limit: int = 100,
+        db: Optional[AsyncSession] = None
+) -> List[ModerationEvent]:
+    """Newest first, with ``image_analysis`` loaded up front (async sessions can't lazy-load)."""
+
+    should_close_db = False
+
+    if db is None:
+        db = get_async_db_session()
+        should_close_db = True
+
+    try:
+        result = await db.scalars(
+            select(ModerationEvent).options(
+                selectinload(ModerationEvent.image_analysis)
+            ).where(
+                ModerationEvent.item_id == item_id
+            ).order_by(ModerationEvent.created_at.desc()).limit(limit)
+        )
+        return list(result.all())
+
+    finally:
+        if should_close_db:
+            await db.close()
+
+
+async def get_image_analysis_by_id_async(analysis_id: int, db: Optional[AsyncSession] = None) -> Optional[ImageAnalysis]:
+    should_close_db = False
+
+    if db is None:
+        db = get_async_db_session()
+        should_close_db = True
+
+    try:
+        return await db.scalar(
+            select(ImageAnalysis).options(
+                joinedload(ImageAnalysis.moderation_event)
+            ).where(ImageAnalysis.id == analysis_id)
+        )
+
+    finally:
+        if should_close_db:
+            await db.close()
+
+
+async def get_image_analysis_by_hash_async(image_hash: str, db: Optional[AsyncSession] = None) -> Optional[ImageAnalysis]:
+    should_close_db = False
+
+    if db is None:
+        db = get_async_db_session()
+        should_close_db = True
+
+    try:
+        return await db.scalar(
+            select(ImageAnalysis).join(ImageAnalysis.moderation_event).options(
+                joinedload(ImageAnalysis.moderation_event)
+            ).where(
+                ImageAnalysis.image_hash == image_hash,
+                ModerationEvent.verdict != "error"
+            ).order_by(ImageAnalysis.id.desc()).limit(1)
+        )
+
+    finally:
+        if should_close_db:
+            await db.close()
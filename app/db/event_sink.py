@@ -0,0 +1,99 @@
+import atexit
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app.core.config import get_settings
+from app.core.instrumentation import STAGE_LATENCY
+from app.db.models import ImageAnalysis, ModerationEvent
+from app.db.session import get_db_session
+from app.db.write_behind import WriteBehindBuffer
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+@dataclass
+class PendingEvent:
+    event: Dict[str, Any]
+    image_analysis: Optional[Dict[str, Any]] = None
+
+
+class EventSink(WriteBehindBuffer[PendingEvent]):
+    """Write-behind buffer for ``ModerationEvent``/``ImageAnalysis`` rows.
+
+    Each flush writes one multi-row ``INSERT ... RETURNING id`` per table;
+    see ``WriteBehindBuffer`` for batching, retry and overflow behaviour.
+    """
+
+    def __init__(self, max_batch_size: int = 500, flush_interval: float = 1.0, max_pending: int = 50000):
+        super().__init__("event-sink", max_batch_size, flush_interval, max_pending)
+
+    def _describe(self, item: PendingEvent) -> str:
+        return f"event for {item.event['item_id']}"
+
+    def add_event(
+            self,
+            source: str,
+            item_id: str,
+            verdict: str,
+            scores: Dict[str, Any],
+            file_path: Optional[str] = None,
+            file_size: Optional[int] = None,
+            file_type: Optional[str] = None,
+            image_dimensions: Optional[Dict[str, Any]] = None,
+            processing_time: Optional[float] = None,
+            image_analysis: Optional[Dict[str, Any]] = None
+    ):
+        event = {
+            "source": source,
+            "item_id": item_id,
+            "verdict": verdict,
+            "scores": scores,
+            "file_path": file_path,
+            "file_size": file_size,
+            "file_type": file_type,
+            "image_dimensions": image_dimensions,
+            "processing_time": processing_time,
+        }
+
+        self._append(PendingEvent(event, image_analysis))
+
+    def _write_batch(self, batch: List[PendingEvent]):
+        db = get_db_session()
+        start = time.perf_counter()
+
+        try:
+            event_ids = db.scalars(
+                insert(ModerationEvent).returning(ModerationEvent.id, sort_by_parameter_order=True),
+                [pending.event for pending in batch]
+            ).all()
+
+            analyses = [
+                {**pending.image_analysis, "moderation_event_id": event_id}
+                for pending, event_id in zip(batch, event_ids)
+                if pending.image_analysis is not None
+            ]
+            if analyses:
+                db.execute(insert(ImageAnalysis), analyses)
+
+            db.commit()
+            STAGE_LATENCY.labels(stage="db_write").observe(time.perf_counter() - start)
+
+        except Exception:
+            db.rollback()
+            raise
+
+        finally:
+            db.close()
+
+event_sink = EventSink(
+    max_batch_size=settings.EVENT_SINK_BATCH_SIZE,
+    flush_interval=settings.EVENT_SINK_FLUSH_INTERVAL,
+    max_pending=settings.EVENT_SINK_MAX_PENDING
+)
+
+atexit.register(event_sink.flush)
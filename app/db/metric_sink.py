@@ -0,0 +1,156 @@
+import atexit
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import get_settings
+from app.db.models import SystemMetricRollup, SystemMetrics
+from app.db.session import get_db_session
+from app.db.write_behind import WriteBehindBuffer
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Rollup resolutions and the datetime fields zeroed to find a sample's bucket
+ROLLUP_RESOLUTIONS: Dict[str, Dict[str, int]] = {
+    "1m": {"second": 0, "microsecond": 0},
+    "1h": {"minute": 0, "second": 0, "microsecond": 0},
+}
+
+@dataclass
+class MetricSample:
+    metric_name: str
+    metric_value: float
+    metric_unit: Optional[str]
+    metric_tags: Dict[str, Any]
+    timestamp: datetime
+
+
+@dataclass
+class _Rollup:
+    sample_count: int
+    value_sum: float
+    value_min: float
+    value_max: float
+    metric_unit: Optional[str]
+
+    def add(self, sample: MetricSample):
+        self.sample_count += 1
+        self.value_sum += sample.metric_value
+        self.value_min = min(self.value_min, sample.metric_value)
+        self.value_max = max(self.value_max, sample.metric_value)
+        self.metric_unit = self.metric_unit or sample.metric_unit
+
+
+def rollup_samples(samples: List[MetricSample]) -> Dict[Tuple[str, str, datetime], _Rollup]:
+    """Fold samples into per ``(metric_name, resolution, bucket)`` aggregates."""
+
+    rollups: Dict[Tuple[str, str, datetime], _Rollup] = {}
+
+    for sample in samples:
+        for resolution, truncate in ROLLUP_RESOLUTIONS.items():
+            key = (sample.metric_name, resolution, sample.timestamp.replace(**truncate))
+            rollup = rollups.get(key)
+            if rollup is None:
+                rollups[key] = _Rollup(1, sample.metric_value, sample.metric_value, sample.metric_value, sample.metric_unit)
+            else:
+                rollup.add(sample)
+
+    return rollups
+
+
+class MetricSink(WriteBehindBuffer[MetricSample]):
+    """Write-behind buffer for ``system_metrics`` samples.
+
+    Each flush bulk-inserts the raw samples and, in the same transaction,
+    merges them into the 1m/1h rows of ``system_metric_rollups`` with one
+    ``INSERT ... ON CONFLICT DO UPDATE``. Rollups are folded in memory
+    first, so a batch touches each bucket once however many samples it
+    holds, and the rollups never disagree with the raw table.
+    """
+
+    def __init__(self, max_batch_size: int = 1000, flush_interval: float = 5.0, max_pending: int = 100000):
+        super().__init__("metric-sink", max_batch_size, flush_interval, max_pending)
+
+    def _describe(self, item: MetricSample) -> str:
+        return f"sample of {item.metric_name}"
+
+    def add_sample(
+            self,
+            metric_name: str,
+            metric_value: float,
+            metric_unit: Optional[str] = None,
+            metric_tags: Optional[Dict] = None,
+            timestamp: Optional[datetime] = None
+    ):
+        self._append(MetricSample(
+            metric_name,
+            float(metric_value),
+            metric_unit,
+            metric_tags or {},
+            (timestamp or datetime.now(timezone.utc)).astimezone(timezone.utc)
+        ))
+
+    def _write_batch(self, batch: List[MetricSample]):
+        rollups = rollup_samples(batch)
+        db = get_db_session()
+
+        try:
+            db.execute(insert(SystemMetrics), [
+                {
+                    "metric_name": sample.metric_name,
+                    "metric_value": sample.metric_value,
+                    "metric_unit": sample.metric_unit,
+                    "metric_tags": sample.metric_tags,
+                    "timestamp": sample.timestamp
+                }
+                for sample in batch
+            ])
+
+            stmt = pg_insert(SystemMetricRollup).values([
+                {
+                    "metric_name": metric_name,
+                    "resolution": resolution,
+                    "bucket": bucket,
+                    "sample_count": rollup.sample_count,
+                    "value_sum": rollup.value_sum,
+                    "value_min": rollup.value_min,
+                    "value_max": rollup.value_max,
+                    "metric_unit": rollup.metric_unit
+                }
+                # Lock rows in one global order so concurrent flushes can't deadlock
+                for (metric_name, resolution, bucket), rollup in sorted(rollups.items(), key=lambda item: item[0])
+            ])
+            current = SystemMetricRollup.__table__.c
+            db.execute(stmt.on_conflict_do_update(
+                constraint="uq_system_metric_rollups_name_resolution_bucket",
+                set_={
+                    "sample_count": current.sample_count + stmt.excluded.sample_count,
+                    "value_sum": current.value_sum + stmt.excluded.value_sum,
+                    "value_min": func.least(current.value_min, stmt.excluded.value_min),
+                    "value_max": func.greatest(current.value_max, stmt.excluded.value_max),
+                    "metric_unit": func.coalesce(current.metric_unit, stmt.excluded.metric_unit)
+                }
+            ))
+
+            db.commit()
+
+        except Exception:
+            db.rollback()
+            raise
+
+        finally:
+            db.close()
+
+metric_sink = MetricSink(
+    max_batch_size=settings.METRIC_SINK_BATCH_SIZE,
+    flush_interval=settings.METRIC_SINK_FLUSH_INTERVAL,
+    max_pending=settings.METRIC_SINK_MAX_PENDING
+)
+
+atexit.register(metric_sink.flush)
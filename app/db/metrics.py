@@ -1,11 +1,13 @@
 from datetime import date, datetime, timedelta, timezone
 import logging
 from typing import Dict, List, Optional
-from sqlalchemy import func
+from sqlalchemy import Row, Select, func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.models import DailyAnalytics, ModerationEvent, SystemMetrics
-from app.db.session import get_db_session
+from app.db.models import DailyAnalytics, ModerationEvent, SystemMetricRollup, SystemMetrics
+from app.db.session import get_async_db_session, get_db_session
 
 
 
@@ -27,10 +29,10 @@ def create_system_metric(
     
     try:
         metric = SystemMetrics(
-            metric_name,
-            metric_value,
-            metric_unit,
-            metric_tags or {}
+            metric_name=metric_name,
+            metric_value=metric_value,
+            metric_unit=metric_unit,
+            metric_tags=metric_tags or {}
         )
 
         db.add(metric)
@@ -62,30 +64,20 @@ def upsert_daily_analytics(
         should_close_db = True
 
     try:
+        stmt = pg_insert(DailyAnalytics).values(
+            date=target_date,
+            source_type=source_type,
+            **stats
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_daily_analytics_date_source_type",
+            set_={
+                **{key: stmt.excluded[key] for key in stats},
+                "updated_at": func.now()
+            }
+        ).returning(DailyAnalytics)
 
-        daily_record = db.query(DailyAnalytics).filter(
-            DailyAnalytics.date == target_date,
-            DailyAnalytics.source_type == source_type
-        ).first()
-
-        if daily_record:
-            daily_record.total_requests = stats['total_requests']
-            daily_record.flagged_count = stats['flagged_count']
-            daily_record.clean_count = stats['clean_count']
-            daily_record.error_count = stats['error_count']
-            daily_record.avg_processing_time = stats['avg_processing_time']
-            daily_record.total_file_size = stats['total_file_size']
-            daily_record.updated_at = func.now()
-
-        else:
-            daily_record = DailyAnalytics(
-                date = target_date,
-                source_type = source_type,
-                **stats
-            )
-            
-            db.add(daily_record)
-        
+        daily_record = db.scalars(stmt, execution_options={"populate_existing": True}).one()
         db.commit()
         db.refresh(daily_record)
 
@@ -147,6 +139,75 @@ def get_moderation_events_by_date_and_source(
         if should_close_db:
             db.close()
 
+def get_daily_stats_by_source(
+        target_date: date,
+        source_types: List[str],
+        db: Optional[Session] = None
+) -> Dict[str, Dict]:
+    """Aggregate one day of moderation events per source with a single ``GROUP BY source, verdict``."""
+
+    should_close_db = False
+
+    if db is None:
+        db = get_db_session()
+        should_close_db = True
+
+    try:
+        start_datetime = datetime.combine(target_date, datetime.min.time())
+        end_datetime = start_datetime + timedelta(days=1)
+
+        rows = db.query(
+            ModerationEvent.source,
+            ModerationEvent.verdict,
+            func.count(ModerationEvent.id).label('event_count'),
+            func.sum(ModerationEvent.processing_time).label('processing_time_sum'),
+            func.count(ModerationEvent.processing_time).label('processing_time_count'),
+            func.sum(ModerationEvent.file_size).label('file_size_sum')
+        ).filter(
+            ModerationEvent.source.in_(source_types),
+            ModerationEvent.created_at >= start_datetime,
+            ModerationEvent.created_at < end_datetime
+        ).group_by(ModerationEvent.source, ModerationEvent.verdict).all()
+
+        totals = {
+            source_type: {
+                'total_requests': 0,
+                'flagged_count': 0,
+                'clean_count': 0,
+                'error_count': 0,
+                'processing_time_sum': 0.0,
+                'processing_time_count': 0,
+                'total_file_size': 0
+            }
+            for source_type in source_types
+        }
+
+        for row in rows:
+            source_totals = totals[row.source]
+            source_totals['total_requests'] += row.event_count
+            if row.verdict in ('flagged', 'clean', 'error'):
+                source_totals[f'{row.verdict}_count'] += row.event_count
+            source_totals['processing_time_sum'] += row.processing_time_sum or 0.0
+            source_totals['processing_time_count'] += row.processing_time_count
+            source_totals['total_file_size'] += row.file_size_sum or 0
+
+        stats = {}
+        for source_type, source_totals in totals.items():
+            timed = source_totals.pop('processing_time_count')
+            elapsed = source_totals.pop('processing_time_sum')
+
+            source_totals['avg_processing_time'] = elapsed / timed if timed else None
+            if source_type != 'image':
+                source_totals['total_file_size'] = None
+
+            stats[source_type] = source_totals
+
+        return stats
+
+    finally:
+        if should_close_db:
+            db.close()
+
 def get_daily_analytics_range(
         start_date: date,
         end_date: date,
@@ -170,6 +231,75 @@ def get_daily_analytics_range(
         if should_close_db:
             db.close()
 
+def _daily_analytics_totals_stmt(start_date: date, end_date: date, source_types: List[str]) -> Select:
+    return select(
+        DailyAnalytics.date,
+        DailyAnalytics.source_type,
+        func.sum(DailyAnalytics.total_requests).label('total_requests'),
+        func.sum(DailyAnalytics.flagged_count).label('flagged'),
+        func.sum(DailyAnalytics.clean_count).label('clean'),
+        func.sum(DailyAnalytics.error_count).label('error')
+    ).where(
+        DailyAnalytics.date >= start_date,
+        DailyAnalytics.date <= end_date,
+        DailyAnalytics.source_type.in_(source_types)
+    ).group_by(
+        func.grouping_sets(DailyAnalytics.date, DailyAnalytics.source_type)
+    )
+
+def get_daily_analytics_totals(
+        start_date: date,
+        end_date: date,
+        source_types: List[str],
+        db: Optional[Session] = None
+) -> List[Row]:
+    """Request/verdict totals per day and per source in one ``GROUP BY GROUPING SETS`` query.
+
+    Per-day rows have ``source_type`` NULL, per-source rows have ``date`` NULL.
+    """
+
+    should_close_db = False
+
+    if db is None:
+        db = get_db_session()
+        should_close_db = True
+
+    try:
+        return list(db.execute(_daily_analytics_totals_stmt(start_date, end_date, source_types)).all())
+
+    finally:
+        if should_close_db:
+            db.close()
+
+async def get_daily_analytics_totals_async(
+        start_date: date,
+        end_date: date,
+        source_types: List[str],
+        replica: bool = True,
+        db: Optional[AsyncSession] = None
+) -> List[Row]:
+
+    should_close_db = False
+
+    if db is None:
+        db = get_async_db_session(replica=replica)
+        should_close_db = True
+
+    try:
+        result = await db.execute(_daily_analytics_totals_stmt(start_date, end_date, source_types))
+        return list(result.all())
+
+    finally:
+        if should_close_db:
+            await db.close()
+
+def _system_metrics_stmt(metric_name: str, start_time: datetime, end_time: datetime) -> Select:
+    return select(SystemMetrics).where(
+        SystemMetrics.metric_name == metric_name,
+        SystemMetrics.timestamp >= start_time,
+        SystemMetrics.timestamp <= end_time
+    ).order_by(SystemMetrics.timestamp)
+
 def get_system_metrics_by_name_and_timeframe(
     metric_name: str,
     start_time: datetime,
@@ -184,12 +314,224 @@ def get_system_metrics_by_name_and_timeframe(
         should_close_db = True
     
     try:
-        return db.query(SystemMetrics).filter(
-            SystemMetrics.metric_name == metric_name,
-            SystemMetrics.timestamp >= start_time,
-            SystemMetrics.timestamp <= end_time
-        ).order_by(SystemMetrics.timestamp).all()
+        return list(db.scalars(_system_metrics_stmt(metric_name, start_time, end_time)).all())
     
     finally:
         if should_close_db:
-            db.close()
\ No newline at end of file
+            db.close()
+
+async def get_system_metrics_by_name_and_timeframe_async(
+    metric_name: str,
+    start_time: datetime,
+    end_time: datetime,
+    db: Optional[AsyncSession] = None
+) -> List[SystemMetrics]:
+
+    should_close_db = False
+
+    if db is None:
+        db = get_async_db_session(replica=True)
+        should_close_db = True
+
+    try:
+        result = await db.scalars(_system_metrics_stmt(metric_name, start_time, end_time))
+        return list(result.all())
+
+    finally:
+        if should_close_db:
+            await db.close()
+
+def _metric_rollups_stmt(metric_name: str, resolution: str, start_time: datetime, end_time: datetime) -> Select:
+    return select(SystemMetricRollup).where(
+        SystemMetricRollup.metric_name == metric_name,
+        SystemMetricRollup.resolution == resolution,
+        SystemMetricRollup.bucket >= start_time,
+        SystemMetricRollup.bucket <= end_time
+    ).order_by(SystemMetricRollup.bucket)
+
+def get_metric_rollups(
+    metric_name: str,
+    resolution: str,
+    start_time: datetime,
+    end_time: datetime,
+    db: Optional[Session] = None
+) -> List[SystemMetricRollup]:
+
+    should_close_db = False
+
+    if db is None:
+        db = get_db_session()
+        should_close_db = True
+
+    try:
+        return list(db.scalars(_metric_rollups_stmt(metric_name, resolution, start_time, end_time)).all())
+
+    finally:
+        if should_close_db:
+            db.close()
+
+async def get_metric_rollups_async(
+    metric_name: str,
+    resolution: str,
+    start_time: datetime,
+    end_time: datetime,
+    db: Optional[AsyncSession] = None
+) -> List[SystemMetricRollup]:
+
+    should_close_db = False
+
+    if db is None:
+        db = get_async_db_session(replica=True)
+        should_close_db = True
+
+    try:
+        result = await db.scalars(_metric_rollups_stmt(metric_name, resolution, start_time, end_time))
+        return list(result.all())
+
+    finally:
+        if should_close_db:
+            await db.close()
+
+def _epoch_bucket(column, bucket_seconds: int):
+    epoch = func.extract('epoch', column)
+    return func.to_timestamp(func.floor(epoch / bucket_seconds) * bucket_seconds).label('bucket')
+
+def _metric_rollup_buckets_stmt(
+    metric_name: str,
+    resolution: str,
+    start_time: datetime,
+    end_time: datetime,
+    bucket_seconds: int,
+    limit: int
+) -> Select:
+    sample_count = func.sum(SystemMetricRollup.sample_count)
+
+    return select(
+        _epoch_bucket(SystemMetricRollup.bucket, bucket_seconds),
+        sample_count.label('sample_count'),
+        func.min(SystemMetricRollup.value_min).label('value_min'),
+        (func.sum(SystemMetricRollup.value_sum) / sample_count).label('value_avg'),
+        func.max(SystemMetricRollup.value_max).label('value_max')
+    ).where(
+        SystemMetricRollup.metric_name == metric_name,
+        SystemMetricRollup.resolution == resolution,
+        SystemMetricRollup.bucket >= start_time,
+        SystemMetricRollup.bucket <= end_time
+    ).group_by(
+        # By output name: repeating the expression would bind bucket_seconds
+        # again and Postgres would not match it to the select list
+        literal_column('bucket')
+    ).order_by(literal_column('bucket')).limit(limit)
+
+def get_metric_rollup_buckets(
+    metric_name: str,
+    resolution: str,
+    start_time: datetime,
+    end_time: datetime,
+    bucket_seconds: int,
+    limit: int,
+    db: Optional[Session] = None
+) -> List[Row]:
+    """Downsample a metric from its ``resolution`` rollups: one row per ``bucket_seconds`` wide bucket.
+
+    ``bucket_seconds`` must be a multiple of the rollup resolution. Buckets
+    are aligned to the Unix epoch, so a bucket's start doubles as a stable
+    pagination cursor. Rows carry ``bucket``, ``sample_count`` and the
+    min/avg/max of the values in the bucket.
+    """
+
+    should_close_db = False
+
+    if db is None:
+        db = get_db_session()
+        should_close_db = True
+
+    try:
+        return list(db.execute(_metric_rollup_buckets_stmt(
+            metric_name, resolution, start_time, end_time, bucket_seconds, limit
+        )).all())
+
+    finally:
+        if should_close_db:
+            db.close()
+
+async def get_metric_rollup_buckets_async(
+    metric_name: str,
+    resolution: str,
+    start_time: datetime,
+    end_time: datetime,
+    bucket_seconds: int,
+    limit: int,
+    db: Optional[AsyncSession] = None
+) -> List[Row]:
+
+    should_close_db = False
+
+    if db is None:
+        db = get_async_db_session(replica=True)
+        should_close_db = True
+
+    try:
+        result = await db.execute(_metric_rollup_buckets_stmt(
+            metric_name, resolution, start_time, end_time, bucket_seconds, limit
+        ))
+        return list(result.all())
+
+    finally:
+        if should_close_db:
+            await db.close()
+
+def _metric_p95_stmt(metric_name: str, start_time: datetime, end_time: datetime, bucket_seconds: int) -> Select:
+    return select(
+        _epoch_bucket(SystemMetrics.timestamp, bucket_seconds),
+        func.percentile_cont(0.95).within_group(SystemMetrics.metric_value).label('value_p95')
+    ).where(
+        SystemMetrics.metric_name == metric_name,
+        SystemMetrics.timestamp >= start_time,
+        SystemMetrics.timestamp < end_time
+    ).group_by(literal_column('bucket'))
+
+def get_metric_p95(
+    metric_name: str,
+    start_time: datetime,
+    end_time: datetime,
+    bucket_seconds: int,
+    db: Optional[Session] = None
+) -> Dict[datetime, float]:
+    """Per-bucket p95 of a metric from the raw samples (rollups can't give percentiles)."""
+
+    should_close_db = False
+
+    if db is None:
+        db = get_db_session()
+        should_close_db = True
+
+    try:
+        rows = db.execute(_metric_p95_stmt(metric_name, start_time, end_time, bucket_seconds)).all()
+        return {row.bucket: row.value_p95 for row in rows}
+
+    finally:
+        if should_close_db:
+            db.close()
+
+async def get_metric_p95_async(
+    metric_name: str,
+    start_time: datetime,
+    end_time: datetime,
+    bucket_seconds: int,
+    db: Optional[AsyncSession] = None
+) -> Dict[datetime, float]:
+
+    should_close_db = False
+
+    if db is None:
+        db = get_async_db_session(replica=True)
+        should_close_db = True
+
+    try:
+        result = await db.execute(_metric_p95_stmt(metric_name, start_time, end_time, bucket_seconds))
+        return {row.bucket: row.value_p95 for row in result.all()}
+
+    finally:
+        if should_close_db:
+            await db.close()
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import BigInteger, Date, Float, ForeignKey, Integer, String, DateTime, Text, func
+from sqlalchemy import BigInteger, Date, Float, Index, Integer, String, DateTime, Text, UniqueConstraint, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship, Mapped, mapped_column
@@ -10,13 +10,19 @@ Base = declarative_base()
 
 class ModerationEvent(Base):
     __tablename__ = "moderation_events"
+    __table_args__ = (
+        Index("ix_moderation_events_source_created_at", "source", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    # The partition key has to be part of the primary key
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True, index=True)
     source: Mapped[str] = mapped_column(String, nullable=False, index=True)
-    item_id: Mapped[str] = mapped_column(String, nullable=False)
+    item_id: Mapped[str] = mapped_column(String, nullable=False, index=True)
     verdict: Mapped[str] = mapped_column(String, nullable=False)
     scores: Mapped[Dict[str, Any]] = mapped_column(JSONB, nullable=False, default={})
-    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    processing_time: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), primary_key=True, server_default=func.now())
 
     # Image support fields
     file_path: Mapped[Optional[str]] = mapped_column(String, nullable=True)
@@ -25,35 +31,68 @@ class ModerationEvent(Base):
     image_dimensions: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)
     
     # Relationship
-    image_analysis = relationship("ImageAnalysis", back_populates="moderation_event")
+    image_analysis = relationship(
+        "ImageAnalysis",
+        back_populates="moderation_event",
+        primaryjoin="ModerationEvent.id == foreign(ImageAnalysis.moderation_event_id)"
+    )
 
 class ImageAnalysis(Base):
     __tablename__ = "image_analysis"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    moderation_event_id: Mapped[int] = mapped_column(Integer, ForeignKey("moderation_events.id"), nullable=False)
+    # No FK: moderation_events is partitioned and its key includes created_at
+    moderation_event_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
     detected_objects: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)
     nsfw_scores: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)
     text_in_image: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     image_hash: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
+    perceptual_hash: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
     processing_time: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     
     # Relationship
-    moderation_event = relationship("ModerationEvent", back_populates="image_analysis")
+    moderation_event = relationship(
+        "ModerationEvent",
+        back_populates="image_analysis",
+        primaryjoin="foreign(ImageAnalysis.moderation_event_id) == ModerationEvent.id"
+    )
 
 class SystemMetrics(Base):
     __tablename__ = "system_metrics"
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
     
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    # The partition key has to be part of the primary key
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True, index=True)
     metric_name: Mapped[str] = mapped_column(String, nullable=False, index=True)
     metric_value: Mapped[float] = mapped_column(Float, nullable=False)
     metric_unit: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     metric_tags: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)
-    timestamp: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
+    timestamp: Mapped[DateTime] = mapped_column(DateTime(timezone=True), primary_key=True, server_default=func.now(), index=True)
+
+class SystemMetricRollup(Base):
+    """Per-minute and per-hour aggregates of ``system_metrics``, kept up to date on ingest."""
+
+    __tablename__ = "system_metric_rollups"
+    __table_args__ = (
+        UniqueConstraint("metric_name", "resolution", "bucket", name="uq_system_metric_rollups_name_resolution_bucket"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    metric_name: Mapped[str] = mapped_column(String, nullable=False)
+    resolution: Mapped[str] = mapped_column(String, nullable=False)
+    bucket: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False)
+    sample_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    value_sum: Mapped[float] = mapped_column(Float, nullable=False)
+    value_min: Mapped[float] = mapped_column(Float, nullable=False)
+    value_max: Mapped[float] = mapped_column(Float, nullable=False)
+    metric_unit: Mapped[Optional[str]] = mapped_column(String, nullable=True)
 
 class DailyAnalytics(Base):
     __tablename__ = "daily_analytics"
+    __table_args__ = (
+        UniqueConstraint("date", "source_type", name="uq_daily_analytics_date_source_type"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     date: Mapped[Date] = mapped_column(Date, nullable=False, index=True)
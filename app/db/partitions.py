@@ -0,0 +1,164 @@
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.session import get_db_session
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# SQLSTATE raised when lock_timeout expires
+LOCK_NOT_AVAILABLE = "55P03"
+
+# Parent table -> partition key column, monthly RANGE partitions on UTC boundaries
+PARTITIONED_TABLES: Dict[str, str] = {
+    "moderation_events": "created_at",
+    "system_metrics": "timestamp",
+}
+
+_PARTITION_NAME_RE = re.compile(r"_y(\d{4})m(\d{2})$")
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+def _utc_bound(month: date) -> str:
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc).isoformat()
+
+def list_partitions(table: str, db: Optional[Session] = None) -> Dict[str, date]:
+    """Monthly partitions of ``table`` keyed by name, mapped to the month they hold."""
+
+    should_close_db = False
+
+    if db is None:
+        db = get_db_session()
+        should_close_db = True
+
+    try:
+        rows = db.execute(text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :table
+        """), {"table": table}).scalars().all()
+
+        partitions = {}
+        for name in rows:
+            match = _PARTITION_NAME_RE.search(name)
+            if match:
+                partitions[name] = date(int(match.group(1)), int(match.group(2)), 1)
+
+        return partitions
+
+    finally:
+        if should_close_db:
+            db.close()
+
+def ensure_partitions(months_ahead: int = 2, db: Optional[Session] = None) -> List[str]:
+    """Create any missing monthly partitions from the current month to ``months_ahead`` months out."""
+
+    should_close_db = False
+
+    if db is None:
+        db = get_db_session()
+        should_close_db = True
+
+    created = []
+    current = month_start(datetime.now(timezone.utc).date())
+
+    try:
+        for table in PARTITIONED_TABLES:
+            existing = set(list_partitions(table, db))
+
+            for offset in range(months_ahead + 1):
+                month = add_months(current, offset)
+                name = partition_name(table, month)
+                if name in existing:
+                    continue
+
+                db.execute(text(
+                    f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+                    f"FOR VALUES FROM ('{_utc_bound(month)}') TO ('{_utc_bound(add_months(month, 1))}')"
+                ))
+                created.append(name)
+
+        db.commit()
+
+        if created:
+            logger.info(f"Created partitions: {', '.join(created)}")
+        return created
+
+    except Exception as e:
+        db.rollback()
+        raise e
+
+    finally:
+        if should_close_db:
+            db.close()
+
+def drop_partitions_before(table: str, cutoff: datetime, db: Optional[Session] = None) -> Dict[str, int]:
+    """Drop partitions of ``table`` whose whole month ends on or before ``cutoff``.
+
+    Returns the dropped partition names mapped to the bytes they occupied.
+    """
+
+    should_close_db = False
+
+    if db is None:
+        db = get_db_session()
+        should_close_db = True
+
+    dropped = {}
+
+    try:
+        for name, month in sorted(list_partitions(table, db).items(), key=lambda item: item[1]):
+            month_end = datetime.combine(add_months(month, 1), datetime.min.time(), tzinfo=timezone.utc)
+            if month_end > cutoff:
+                continue
+
+            size = db.execute(text("SELECT pg_total_relation_size(CAST(:name AS regclass))"), {"name": name}).scalar() or 0
+
+            # DETACH takes ACCESS EXCLUSIVE on the parent, and every query on the
+            # table queues behind it while it waits. CONCURRENTLY isn't allowed
+            # because the parent has a DEFAULT partition, so bound the wait
+            # instead: if the lock isn't free soon, give up and retry next run.
+            db.execute(text(f"SET LOCAL lock_timeout = {int(settings.PARTITION_DROP_LOCK_TIMEOUT_MS)}"))
+            try:
+                db.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+                db.execute(text(f'DROP TABLE "{name}"'))
+                db.commit()
+
+            except OperationalError as e:
+                if getattr(e.orig, "pgcode", None) != LOCK_NOT_AVAILABLE:
+                    raise
+                db.rollback()
+                logger.warning(f"Skipped dropping partition {name}: {table} lock not available within "
+                               f"{settings.PARTITION_DROP_LOCK_TIMEOUT_MS}ms")
+                continue
+
+            dropped[name] = size
+            logger.info(f"Dropped partition {name} ({size} bytes)")
+
+        return dropped
+
+    except Exception as e:
+        db.rollback()
+        raise e
+
+    finally:
+        if should_close_db:
+            db.close()
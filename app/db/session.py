@@ -1,4 +1,8 @@
+from typing import AsyncIterator, Dict
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import get_settings
 
@@ -17,4 +21,54 @@ def get_db():
         db.close()
 
 def get_db_session():
-    return SessionLocal()
\ No newline at end of file
+    return SessionLocal()
+
+
+# Async (asyncpg) engines for the API's read paths. Created on first use so
+# Celery workers, which only use the sync engine, never import asyncpg.
+_async_sessionmakers: Dict[bool, async_sessionmaker] = {}
+
+def async_dsn(dsn: str) -> str:
+    return make_url(dsn).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+def _create_async_engine(dsn: str) -> AsyncEngine:
+    return create_async_engine(
+        async_dsn(dsn),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=300,
+        pool_pre_ping=True
+    )
+
+def get_async_sessionmaker(replica: bool = False) -> async_sessionmaker:
+    """Sessions on the primary, or on ``POSTGRES_REPLICA_DSN`` when ``replica`` is set and one is configured."""
+
+    replica = replica and bool(settings.POSTGRES_REPLICA_DSN)
+
+    if replica not in _async_sessionmakers:
+        dsn = settings.POSTGRES_REPLICA_DSN if replica else settings.POSTGRES_DSN
+        _async_sessionmakers[replica] = async_sessionmaker(
+            _create_async_engine(dsn),
+            autoflush=False,
+            # Objects outlive the session in handlers; don't expire them on commit
+            expire_on_commit=False
+        )
+
+    return _async_sessionmakers[replica]
+
+def get_async_db_session(replica: bool = False) -> AsyncSession:
+    return get_async_sessionmaker(replica)()
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with get_async_db_session() as db:
+        yield db
+
+async def get_async_replica_db() -> AsyncIterator[AsyncSession]:
+    async with get_async_db_session(replica=True) as db:
+        yield db
+
+async def dispose_async_engines():
+    for maker in _async_sessionmakers.values():
+        await maker.kw["bind"].dispose()
+    _async_sessionmakers.clear()
@@ -0,0 +1,183 @@
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Generic, List, Optional, Tuple, TypeVar
+
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+from app.core.instrumentation import WRITE_BEHIND_DEAD_LETTERS
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class WriteBehindBuffer(ABC, Generic[T]):
+    """In-memory queue drained to the database by a background thread.
+
+    Items are written in batches by ``_write_batch``, either when
+    ``max_batch_size`` items are waiting or every ``flush_interval``
+    seconds. If the database is unreachable, a failed batch goes back to
+    the head of the queue for the next flush. If the database rejects the
+    batch itself, it is split in halves down to the offending items, which
+    are logged and dropped so they can't wedge the sink; the rest is
+    written. ``max_pending`` bounds memory if the database stays down; past
+    it the oldest items are dropped and logged.
+    """
+
+    def __init__(self, name: str, max_batch_size: int = 500, flush_interval: float = 1.0, max_pending: int = 50000):
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._pending: Deque[T] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._last_flush_failed = False
+
+    @abstractmethod
+    def _write_batch(self, batch: List[T]):
+        """Persist ``batch`` in one transaction, raising if any of it fails."""
+
+    def _describe(self, item: T) -> str:
+        return repr(item)
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+
+            if self._pid is not None and self._pid != os.getpid():
+                # Items buffered in the parent belong to the parent
+                self._pending.clear()
+                self._flush_lock = threading.Lock()
+                self._wakeup = threading.Event()
+
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _append(self, item: T):
+        self._ensure_worker()
+
+        with self._lock:
+            self._pending.append(item)
+
+            overflow = len(self._pending) - self.max_pending
+            for _ in range(max(overflow, 0)):
+                dropped = self._pending.popleft()
+                logger.error(f"{self.name} full, dropping {self._describe(dropped)}")
+
+            if len(self._pending) >= self.max_batch_size:
+                self._wakeup.set()
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def _take_batch(self) -> List[T]:
+        with self._lock:
+            count = min(len(self._pending), self.max_batch_size)
+            return [self._pending.popleft() for _ in range(count)]
+
+    def _requeue(self, batch: List[T]):
+        with self._lock:
+            self._pending.extendleft(reversed(batch))
+
+    @staticmethod
+    def _is_connection_error(error: Exception) -> bool:
+        """True when the failure says nothing about the rows, only that the database is unreachable."""
+
+        if isinstance(error, DBAPIError) and error.connection_invalidated:
+            return True
+        return isinstance(error, (OperationalError, InterfaceError))
+
+    def _dead_letter(self, item: T, error: Exception):
+        WRITE_BEHIND_DEAD_LETTERS.labels(sink=self.name).inc()
+        logger.error(f"{self.name} dropping {self._describe(item)} rejected by the database: {error}; item: {item!r}")
+
+    def _write_isolating(self, batch: List[T]) -> Tuple[int, List[T]]:
+        """Write a rejected batch in halves, dead-lettering single items that still fail.
+
+        Returns the number of items written and, if the connection failed
+        part way, the items not yet attempted (to be requeued).
+        """
+
+        written = 0
+        chunks: Deque[List[T]] = deque()
+        mid = len(batch) // 2
+        chunks.extend([batch[:mid], batch[mid:]])
+
+        while chunks:
+            chunk = chunks.popleft()
+            if not chunk:
+                continue
+
+            try:
+                self._write_batch(chunk)
+                written += len(chunk)
+
+            except Exception as e:
+                if self._is_connection_error(e):
+                    return written, [item for remaining in (chunk, *chunks) for item in remaining]
+
+                if len(chunk) == 1:
+                    self._dead_letter(chunk[0], e)
+                    continue
+
+                mid = len(chunk) // 2
+                chunks.extendleft([chunk[mid:], chunk[:mid]])
+
+        return written, []
+
+    def flush(self) -> int:
+        """Write everything queued so far; returns the number of items persisted."""
+
+        written = 0
+
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    return written
+
+                try:
+                    self._write_batch(batch)
+                    unwritten: List[T] = []
+                    written += len(batch)
+
+                except Exception as e:
+                    if self._is_connection_error(e):
+                        unwritten = batch
+                    else:
+                        logger.warning(f"{self.name} batch of {len(batch)} items rejected ({e}); isolating bad items")
+                        isolated, unwritten = self._write_isolating(batch)
+                        written += isolated
+
+                    if unwritten:
+                        self._requeue(unwritten)
+                        self._last_flush_failed = True
+                        logger.error(f"{self.name} flush of {len(unwritten)} items failed, database unreachable: {e}")
+                        return written
+
+                self._last_flush_failed = False
+                logger.debug(f"{self.name} flushed {len(batch)} items")
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+            # Don't let size-triggered wakeups hammer a database that is down
+            if self._last_flush_failed:
+                time.sleep(self.flush_interval)
@@ -1,13 +1,36 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from prometheus_client import make_asgi_app
 
-from app.api.v1 import health, moderation
+from app.api.v1 import analytics, events, health, image_moderation, moderation
+from app.core.body_limit import BodySizeLimitMiddleware
+from app.core.config import get_settings
+from app.core.instrumentation import build_registry
+from app.db.session import dispose_async_engines
+from app.services.http_client import close_provider_clients
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await close_provider_clients()
+    await dispose_async_engines()
 
 def create_app() -> FastAPI:
+    settings = get_settings()
+
     app = FastAPI(
         title="AI Moderation Platform",
         description="AI-powered content moderation service",
-        version="1.0.0"
+        version="1.0.0",
+        lifespan=lifespan
+    )
+
+    # Oversized uploads are refused before Starlette spools them to disk
+    app.add_middleware(
+        BodySizeLimitMiddleware,
+        max_bytes=settings.UPLOAD_MAX_BODY_BYTES,
+        paths=["/api/v1/moderate/image"]
     )
 
     app.include_router(
@@ -16,13 +39,29 @@ def create_app() -> FastAPI:
         tags=["moderation"]
     )
 
+    app.include_router(
+        image_moderation.router,
+        prefix="/api/v1/moderate",
+        tags=["moderation"]
+    )
+
+    app.include_router(
+        analytics.router,
+        prefix="/api/v1"
+    )
+
+    app.include_router(
+        events.router,
+        prefix="/api/v1"
+    )
+
     app.include_router(
         health.router,
         prefix="/health",
         tags=["health"]
     )
 
-    app.mount("/metrics", make_asgi_app())
+    app.mount("/metrics", make_asgi_app(registry=build_registry(settings.REDIS_URL, settings.QUEUE_DEPTH_QUEUES)))
     
     @app.get("/")
     def read_root():
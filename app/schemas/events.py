@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict
+
+
+class EventImageAnalysis(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    detected_objects: Optional[Dict[str, Any]] = None
+    nsfw_scores: Optional[Dict[str, Any]] = None
+    text_in_image: Optional[str] = None
+    image_hash: Optional[str] = None
+    processing_time: Optional[float] = None
+    created_at: datetime
+
+class ModerationEventResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    source: str
+    item_id: str
+    verdict: str
+    scores: Dict[str, Any]
+    processing_time: Optional[float] = None
+    created_at: datetime
+    file_path: Optional[str] = None
+    file_size: Optional[int] = None
+    file_type: Optional[str] = None
+    image_dimensions: Optional[Dict[str, Any]] = None
+    image_analysis: List[EventImageAnalysis] = []
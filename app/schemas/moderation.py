@@ -1,9 +1,10 @@
-from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from pydantic import BaseModel, HttpUrl
+from typing import Dict, Any, List, Optional
 
 class TextPayload(BaseModel):
     content: str
     source_id: str
+    callback_url: Optional[HttpUrl] = None
 
 class ModerationResponse(BaseModel):
     verdict: str
@@ -16,3 +17,31 @@ class TaskResult(BaseModel):
     status: Optional[str] = None
     verdict: Optional[str] = None
     scores: Optional[Dict[str, Any]] = None
+
+class TextBatchPayload(BaseModel):
+    items: List[TextPayload]
+    # Called once per completed chunk, with the batch_id in the payload
+    callback_url: Optional[HttpUrl] = None
+
+class BatchItemRef(BaseModel):
+    source_id: str
+    # The chunk's task; the item's result is GET /task/{task_id}?index={index}
+    task_id: str
+    index: int
+
+class BatchResponse(BaseModel):
+    batch_id: str
+    items: List[BatchItemRef]
+
+class BatchItemResult(BaseModel):
+    source_id: str
+    verdict: str
+    scores: Dict[str, Any]
+    error: Optional[str] = None
+
+class BatchResult(BaseModel):
+    batch_id: str
+    status: str
+    total_chunks: int
+    completed_chunks: int
+    results: List[BatchItemResult]
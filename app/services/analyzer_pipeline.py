@@ -0,0 +1,120 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class AnalyzerStage:
+    name: str
+    # Called as run(subject, budget): budget is the stage's timeout in seconds,
+    # for bounding I/O so the call ends when the pipeline stops waiting for it
+    run: Callable[[Any, float], Any]
+    timeout: float
+    # Value recorded when the stage times out, fails or is skipped
+    default: Any = None
+    # Returns a verdict when this stage's result alone settles it
+    decides: Optional[Callable[[Any], Optional[str]]] = None
+
+
+class AnalyzerPipeline:
+    """Runs independent analyzer stages concurrently on a shared thread pool.
+
+    Each stage's timeout runs from when a pool thread picks it up, so time
+    queued behind other images' stages isn't charged to it; a stage still
+    queued when its timeout has passed since the start of the run is
+    cancelled without running. As soon as a stage with ``decides`` returns
+    a verdict, stages still pending are abandoned and recorded with their
+    defaults. Python threads can't be killed, so stages must honour the
+    budget they are given (e.g. as an HTTP timeout, without retries) for
+    an abandoned call to free its thread promptly.
+    """
+
+    def __init__(self, stages: List[AnalyzerStage], max_workers: int = 4):
+        self.stages = stages
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Pool threads don't survive fork(); recreate in each Celery child process
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="analyzer"
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _timed(self, stage: AnalyzerStage, subject: Any, started: Dict[str, float]) -> Tuple[Any, float]:
+        started[stage.name] = time.monotonic()
+        start = time.perf_counter()
+        result = stage.run(subject, stage.timeout)
+        return result, time.perf_counter() - start
+
+    def run(self, subject: Any) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], Optional[str]]:
+        """Returns ``(results, timings, decided_verdict)``, keyed by stage name."""
+
+        executor = self._get_executor()
+        start = time.monotonic()
+
+        started: Dict[str, float] = {}
+        futures: Dict[Future, AnalyzerStage] = {
+            executor.submit(self._timed, stage, subject, started): stage for stage in self.stages
+        }
+
+        def deadline(future: Future) -> float:
+            stage = futures[future]
+            return started.get(stage.name, start) + stage.timeout
+
+        results: Dict[str, Any] = {}
+        timings: Dict[str, Dict[str, Any]] = {}
+        decided: Optional[str] = None
+        pending = set(futures)
+
+        while pending and decided is None:
+            now = time.monotonic()
+            next_deadline = min(deadline(f) for f in pending)
+
+            done, pending = wait(pending, timeout=max(next_deadline - now, 0), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                stage = futures[future]
+
+                try:
+                    result, seconds = future.result()
+                    results[stage.name] = result
+                    timings[stage.name] = {"seconds": round(seconds, 4), "status": "ok"}
+
+                    if stage.decides is not None and decided is None:
+                        decided = stage.decides(result)
+
+                except Exception as e:
+                    logger.warning(f"Analyzer stage {stage.name} failed: {e}")
+                    results[stage.name] = stage.default
+                    timings[stage.name] = {"seconds": round(time.monotonic() - started.get(stage.name, start), 4), "status": "error"}
+
+            now = time.monotonic()
+            for future in [f for f in pending if now >= deadline(f)]:
+                stage = futures[future]
+                never_ran = future.cancel()
+                pending.discard(future)
+                logger.warning(f"Analyzer stage {stage.name} timed out after {stage.timeout}s{' in the queue' if never_ran else ''}")
+                results[stage.name] = stage.default
+                timings[stage.name] = {"seconds": round(now - started.get(stage.name, start), 4), "status": "timeout"}
+
+        for future in pending:
+            stage = futures[future]
+            future.cancel()
+            results[stage.name] = stage.default
+            timings[stage.name] = {"seconds": None, "status": "skipped"}
+
+        return results, timings, decided
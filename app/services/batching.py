@@ -0,0 +1,115 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Generic, List, Optional, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+class MicroBatcher(Generic[T, R]):
+    """Coalesces concurrent single-item calls into batched calls.
+
+    Callers ``submit`` one item and get a ``Future``; a background thread
+    collects pending items until ``max_batch_size`` is reached or
+    ``max_wait_ms`` has passed since the first one arrived, then hands the
+    whole list to ``process_batch`` and fans the results back out in order.
+
+    Batching only happens between callers that share a process, so Celery
+    workers need a threads/gevent/eventlet pool (``--pool threads
+    --concurrency N``) for more than one task to land in the same batch.
+    Under prefork every batch degenerates to a single item.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        process_batch: Callable[[List[T]], List[R]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 20.0
+    ):
+        self.name = name
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue: "queue.Queue[tuple[T, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self):
+        # Threads don't survive fork(); restart in each Celery child process
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=f"batcher-{self.name}", daemon=True)
+            self._thread.start()
+
+    def submit(self, item: T) -> "Future[R]":
+        future: "Future[R]" = Future()
+        self._ensure_worker()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item: T, timeout: Optional[float] = None) -> R:
+        future = self.submit(item)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Still queued: drop it so the model doesn't score an abandoned item
+            future.cancel()
+            raise
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            # Skips items whose caller gave up waiting while they were queued
+            batch = [entry for entry in self._collect() if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            items = [item for item, _ in batch]
+
+            try:
+                results = self.process_batch(items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"Batch {self.name} returned {len(results)} results for {len(items)} items"
+                    )
+
+            except Exception as e:
+                logger.error(f"Batch {self.name} of {len(items)} items failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            logger.debug(f"Batch {self.name} processed {len(items)} items")
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,250 @@
+import io
+import logging
+import mmap
+import os
+import re
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from app.core.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+BLOB_KEY_RE = re.compile(r"^[0-9a-f]{64}$")
+
+class BlobStore(ABC):
+    """Content-addressed storage for uploaded files, keyed by SHA-256.
+
+    ``put_file`` consumes a finished local temp file; storing a key that
+    already exists just discards the temp file, so duplicate uploads are
+    kept once. It does refresh the existing blob's modification time: the
+    retention sweep spares recently modified blobs, and the new upload's
+    task may still be queued with no row referencing the blob yet.
+    """
+
+    @abstractmethod
+    def put_file(self, key: str, src_path: Path) -> bool:
+        """Store ``src_path`` under ``key``; returns False if the blob already existed."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    @contextmanager
+    def open(self, key: str) -> Iterator[BinaryIO]:
+        """Readable, seekable file object over the blob's bytes."""
+
+    @abstractmethod
+    def iter_blobs(self, older_than: float) -> Iterator[Tuple[str, int, float]]:
+        """Yield ``(key, size, mtime)`` for blobs last modified before ``older_than`` (epoch seconds)."""
+
+    def get_bytes(self, key: str) -> bytes:
+        with self.open(key) as f:
+            return f.read()
+
+
+class LocalBlobStore(BlobStore):
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, key: str) -> Path:
+        # Two levels of fan-out keep directory sizes sane
+        return self.root / key[:2] / key[2:4] / key
+
+    def put_file(self, key: str, src_path: Path) -> bool:
+        dest = self.path_for(key)
+
+        if dest.exists():
+            try:
+                os.utime(dest)
+                Path(src_path).unlink(missing_ok=True)
+                return False
+            except FileNotFoundError:
+                pass  # Swept since the check; store this copy instead
+
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(src_path, dest)
+        return True
+
+    def exists(self, key: str) -> bool:
+        return self.path_for(key).exists()
+
+    def delete(self, key: str) -> bool:
+        try:
+            self.path_for(key).unlink(missing_ok=True)
+            return True
+        except OSError as e:
+            logger.warning(f"Blob deletion failed for {key}: {e}")
+            return False
+
+    @contextmanager
+    def open(self, key: str) -> Iterator[BinaryIO]:
+        with open(self.path_for(key), "rb") as f:
+            yield f
+
+    def iter_blobs(self, older_than: float) -> Iterator[Tuple[str, int, float]]:
+        for path in self.root.glob("??/??/*"):
+            if not path.is_file():
+                continue
+
+            stat = path.stat()
+            if stat.st_mtime < older_than:
+                yield path.name, stat.st_size, stat.st_mtime
+
+
+class MmapBlobStore(LocalBlobStore):
+    """Local store whose readers map the blob instead of copying it.
+
+    ``open`` returns an ``mmap`` (which PIL reads like any file object) and
+    ``view`` a ``memoryview`` over it, so co-located workers read straight
+    from the page cache without an extra copy.
+    """
+
+    @contextmanager
+    def open(self, key: str) -> Iterator[BinaryIO]:
+        with open(self.path_for(key), "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped  # type: ignore[misc]
+
+    @contextmanager
+    def view(self, key: str) -> Iterator[memoryview]:
+        with self.open(key) as mapped:
+            view = memoryview(mapped)  # type: ignore[arg-type]
+            try:
+                yield view
+            finally:
+                view.release()
+
+
+class S3BlobStore(BlobStore):
+    """S3-compatible store; point ``endpoint_url`` at MinIO for local runs."""
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        region: Optional[str] = None
+    ):
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError as e:
+            raise RuntimeError("S3 blob store requires boto3") from e
+
+        self.bucket = bucket
+        self._client_error = ClientError
+        self._client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            aws_access_key_id=access_key or None,
+            aws_secret_access_key=secret_key or None,
+            region_name=region or None
+        )
+
+    def put_file(self, key: str, src_path: Path) -> bool:
+        try:
+            if self._touch(key):
+                return False
+
+            self._client.upload_file(str(src_path), self.bucket, key)
+            return True
+
+        finally:
+            Path(src_path).unlink(missing_ok=True)
+
+    def _touch(self, key: str) -> bool:
+        """Copy the object onto itself for a fresh LastModified; False if it doesn't exist."""
+
+        try:
+            self._client.copy_object(
+                Bucket=self.bucket,
+                Key=key,
+                CopySource={"Bucket": self.bucket, "Key": key},
+                MetadataDirective="REPLACE"
+            )
+            return True
+        except self._client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def exists(self, key: str) -> bool:
+        try:
+            self._client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except self._client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def delete(self, key: str) -> bool:
+        try:
+            self._client.delete_object(Bucket=self.bucket, Key=key)
+            return True
+        except self._client_error as e:
+            logger.warning(f"Blob deletion failed for {key}: {e}")
+            return False
+
+    @contextmanager
+    def open(self, key: str) -> Iterator[BinaryIO]:
+        body = self._client.get_object(Bucket=self.bucket, Key=key)["Body"]
+        try:
+            yield io.BytesIO(body.read())
+        finally:
+            body.close()
+
+    def iter_blobs(self, older_than: float) -> Iterator[Tuple[str, int, float]]:
+        paginator = self._client.get_paginator("list_objects_v2")
+
+        for page in paginator.paginate(Bucket=self.bucket):
+            for obj in page.get("Contents", []):
+                mtime = obj["LastModified"].timestamp()
+                if mtime < older_than:
+                    yield obj["Key"], obj["Size"], mtime
+
+
+@lru_cache()
+def get_blob_store() -> BlobStore:
+    backend = settings.BLOB_STORE_BACKEND
+
+    if backend == "local":
+        return LocalBlobStore(settings.UPLOAD_DIR)
+
+    if backend == "mmap":
+        return MmapBlobStore(settings.UPLOAD_DIR)
+
+    if backend == "s3":
+        return S3BlobStore(
+            bucket=settings.BLOB_S3_BUCKET,
+            endpoint_url=settings.BLOB_S3_ENDPOINT_URL,
+            access_key=settings.BLOB_S3_ACCESS_KEY,
+            secret_key=settings.BLOB_S3_SECRET_KEY,
+            region=settings.BLOB_S3_REGION
+        )
+
+    raise ValueError(f"Unknown blob store backend: {backend}")
+
+@contextmanager
+def open_blob(ref: str) -> Iterator[BinaryIO]:
+    """Open a blob key, or a plain file path from before the blob store existed."""
+
+    if BLOB_KEY_RE.match(ref):
+        with get_blob_store().open(ref) as f:
+            yield f
+    else:
+        with open(ref, "rb") as f:
+            yield f
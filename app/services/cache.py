@@ -0,0 +1,121 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+import redis
+
+from app.core.config import get_settings
+from app.core.instrumentation import CACHE_LOOKUPS
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+class LRUCache:
+    """Thread-safe in-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TieredCache:
+    """In-process LRU tier in front of a shared Redis tier.
+
+    Values must be JSON-serialisable. Redis failures are logged and the cache
+    degrades to the local tier instead of failing the caller.
+    """
+
+    def __init__(self, name: str, ttl: int, max_entries: int, redis_url: Optional[str] = None):
+        self.name = name
+        self.ttl = ttl
+        self.local = LRUCache(max_entries=max_entries, ttl=ttl)
+        self._redis_url = redis_url or settings.REDIS_URL
+        self._redis: Optional[redis.Redis] = None
+
+    def _get_redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                self._redis_url,
+                socket_timeout=0.5,
+                socket_connect_timeout=0.5
+            )
+        return self._redis
+
+    def _redis_key(self, key: str) -> str:
+        return f"cache:{self.name}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            CACHE_LOOKUPS.labels(cache=self.name, result="hit_local").inc()
+            return value
+
+        try:
+            raw = self._get_redis().get(self._redis_key(key))
+        except redis.RedisError as e:
+            logger.warning(f"Cache {self.name}: redis get failed: {e}")
+            raw = None
+
+        if raw is None:
+            CACHE_LOOKUPS.labels(cache=self.name, result="miss").inc()
+            return None
+
+        value = json.loads(raw)
+        self.local.set(key, value)
+        CACHE_LOOKUPS.labels(cache=self.name, result="hit_redis").inc()
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        ttl = ttl if ttl is not None else self.ttl
+        self.local.set(key, value, ttl)
+
+        try:
+            self._get_redis().set(self._redis_key(key), json.dumps(value), ex=ttl)
+        except redis.RedisError as e:
+            logger.warning(f"Cache {self.name}: redis set failed: {e}")
+
+    def delete(self, key: str):
+        self.local.delete(key)
+
+        try:
+            self._get_redis().delete(self._redis_key(key))
+        except redis.RedisError as e:
+            logger.warning(f"Cache {self.name}: redis delete failed: {e}")
@@ -0,0 +1,210 @@
+import json
+import logging
+import math
+import re
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import get_settings
+from app.core.instrumentation import CASCADE_DECISIONS
+from app.services.verdict_cache import normalize_text
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_TOKEN_RE = re.compile(r"\w+")
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every pattern in one pass over the text.
+
+    Only whole-word matches count, so blocklisted terms don't fire inside
+    longer innocent words.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+
+        for pattern in patterns:
+            if pattern:
+                self._add(pattern)
+        self._build()
+
+    def __len__(self) -> int:
+        return sum(len(out) for out in self._output)
+
+    def _add(self, pattern: str):
+        node = 0
+        for char in pattern:
+            if char not in self._goto[node]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[node][char] = len(self._goto) - 1
+            node = self._goto[node][char]
+        self._output[node].append(pattern)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> Set[str]:
+        matches: Set[str] = set()
+        node = 0
+
+        for end, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+
+            for pattern in self._output[node]:
+                start = end - len(pattern) + 1
+                before = text[start - 1] if start > 0 else " "
+                after = text[end + 1] if end + 1 < len(text) else " "
+                if not before.isalnum() and not after.isalnum():
+                    matches.add(pattern)
+
+        return matches
+
+
+class LinearTextModel:
+    """Bag-of-words logistic regression, loaded from ``{"bias": b, "weights": {token: w}}``."""
+
+    def __init__(self, weights: Dict[str, float], bias: float = 0.0):
+        self.weights = weights
+        self.bias = bias
+
+    @classmethod
+    def from_file(cls, path: str) -> "LinearTextModel":
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["weights"], data.get("bias", 0.0))
+
+    def predict(self, normalized: str) -> float:
+        z = self.bias + sum(self.weights.get(token, 0.0) for token in set(_TOKEN_RE.findall(normalized)))
+        return 1.0 / (1.0 + math.exp(-z))
+
+
+def _read_terms(path: str) -> List[str]:
+    if not path:
+        return []
+
+    with open(path) as f:
+        return [normalize_text(line) for line in f if line.strip() and not line.startswith("#")]
+
+
+class TextCascade:
+    """Cheap first stage in front of the text model.
+
+    ``decide`` returns ``(verdict, scores)`` when the content is settled
+    without the model: blank or very short text, allow-listed text, a
+    blocklist hit, or a linear-model score outside ``[clean_below,
+    flag_above]``. Otherwise it returns None and the caller escalates to
+    the heavy model. Every outcome is counted on
+    ``moderation_cascade_decisions_total``.
+    """
+
+    def __init__(
+        self,
+        blocklist: Iterable[str] = (),
+        allowlist: Iterable[str] = (),
+        model: Optional[LinearTextModel] = None,
+        min_length: int = 3,
+        clean_below: float = 0.05,
+        flag_above: float = 0.95,
+        enabled: bool = True
+    ):
+        self.blocklist = AhoCorasick(blocklist)
+        self.allowlist = set(allowlist)
+        self.model = model
+        self.min_length = min_length
+        self.clean_below = clean_below
+        self.flag_above = flag_above
+        self.enabled = enabled
+
+    def _decided(self, reason: str, verdict: str, scores: Dict[str, float]) -> Tuple[str, Dict[str, Any]]:
+        CASCADE_DECISIONS.labels(kind="text", decision=reason).inc()
+        return verdict, scores
+
+    def decide(self, content: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        if not self.enabled:
+            return None
+
+        normalized = normalize_text(content)
+
+        if not normalized:
+            return self._decided("empty", "clean", {})
+
+        if normalized in self.allowlist:
+            return self._decided("allowlist", "clean", {})
+
+        if self.blocklist.find(normalized):
+            return self._decided("keyword", "flagged", {"keyword_match": 1.0})
+
+        if len(normalized) < self.min_length:
+            return self._decided("short", "clean", {})
+
+        if self.model is not None:
+            probability = self.model.predict(normalized)
+
+            if probability < self.clean_below:
+                return self._decided("linear_clean", "clean", {"prefilter_toxicity": probability})
+            if probability > self.flag_above:
+                return self._decided("linear_flagged", "flagged", {"prefilter_toxicity": probability})
+
+        CASCADE_DECISIONS.labels(kind="text", decision="escalated").inc()
+        return None
+
+
+class ImageCascade:
+    """Answers tiny images (icons, spacers) as clean without running the analyzers."""
+
+    def __init__(self, tiny_max_side: int = 32, enabled: bool = True):
+        self.tiny_max_side = tiny_max_side
+        self.enabled = enabled
+
+    def decide(self, width: int, height: int) -> Optional[str]:
+        if not self.enabled:
+            return None
+
+        if max(width, height) <= self.tiny_max_side:
+            CASCADE_DECISIONS.labels(kind="image", decision="tiny").inc()
+            return "clean"
+
+        CASCADE_DECISIONS.labels(kind="image", decision="escalated").inc()
+        return None
+
+
+def _build_text_cascade() -> TextCascade:
+    model = None
+    if settings.CASCADE_TEXT_MODEL_PATH:
+        model = LinearTextModel.from_file(settings.CASCADE_TEXT_MODEL_PATH)
+
+    return TextCascade(
+        blocklist=_read_terms(settings.CASCADE_BLOCKLIST_PATH),
+        allowlist=_read_terms(settings.CASCADE_ALLOWLIST_PATH),
+        model=model,
+        min_length=settings.CASCADE_MIN_TEXT_LENGTH,
+        clean_below=settings.CASCADE_CLEAN_BELOW,
+        flag_above=settings.CASCADE_FLAG_ABOVE,
+        enabled=settings.CASCADE_ENABLED
+    )
+
+text_cascade = _build_text_cascade()
+
+image_cascade = ImageCascade(
+    tiny_max_side=settings.CASCADE_TINY_IMAGE_MAX_SIDE,
+    enabled=settings.CASCADE_ENABLED
+)
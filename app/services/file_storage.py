@@ -1,20 +1,38 @@
 import hashlib
 import logging
+import time
 
 from pathlib import Path
-from typing import Tuple
+from typing import Any, Optional, Tuple
 import uuid
 from PIL import Image
 import magic
 
+from app.core.concurrency import run_in_io_pool
+from app.core.config import get_settings
+from app.core.instrumentation import STAGE_LATENCY
+from app.services.blob_store import BLOB_KEY_RE, get_blob_store
+from app.services.image_dedup import dhash, format_hash
+
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+CHUNK_SIZE = 64 * 1024
 
 class FileStorageService:
+    """Receives uploads and hands them to the content-addressed blob store.
+
+    Files are written to ``.part`` files under ``<upload_dir>/.incoming`` and
+    then stored under their SHA-256, which is the reference passed to workers
+    and recorded on moderation events. Identical uploads share one blob.
+    """
 
-    def __init__(self, upload_dir: str = 'uploads/images'):
-        self.upload_dir = Path(upload_dir)
-        self.upload_dir.mkdir(parents=True, exist_ok=True)
+    def __init__(self, upload_dir: Optional[str] = None):
+        self.upload_dir = Path(upload_dir or settings.UPLOAD_DIR)
+        self.incoming_dir = self.upload_dir / ".incoming"
+        self.incoming_dir.mkdir(parents=True, exist_ok=True)
+        self.blob_store = get_blob_store()
 
         self.allowed_types = {
             'image/jpeg', 'image/jpg', 'image/png', 'image/gif', 
@@ -23,57 +41,160 @@ class FileStorageService:
 
         self.max_file_size = 10 * 1024 * 1024
 
-    def _get_image_dimensions(self, file_path: Path) -> dict:
+    def _inspect_image(self, file_path: Path) -> Tuple[dict, Optional[str]]:
 
         try:
             with Image.open(file_path) as img:
-                return {"width": img.width, "height": img.height}
+                dimensions = {"width": img.width, "height": img.height}
+                return dimensions, format_hash(dhash(img))
         except Exception as e:
-            logger.warning(f"Could not get dimensions for {file_path}: {e}")
-            return {}
+            logger.warning(f"Could not inspect image {file_path}: {e}")
+            return {}, None
+
+    def _check_file_type(self, head: bytes) -> str:
+        file_type = magic.from_buffer(head, mime=True)
+        if file_type not in self.allowed_types:
+            raise ValueError(f"Unsupported file type: {file_type}")
+        return file_type
+
+    def _new_part_path(self) -> Path:
+        return self.incoming_dir / f"{uuid.uuid4()}.part"
+
+    def _store(self, part_path: Path, file_size: int, file_type: str, file_hash: str, filename: str) -> dict:
+        # Inspect before storing: with a remote store the temp file is gone afterwards
+        dimensions, perceptual_hash = self._inspect_image(part_path)
+
+        if not self.blob_store.put_file(file_hash, part_path):
+            logger.info(f"Upload {filename} matches existing blob {file_hash}")
+
+        return {
+            "file_path": file_hash,
+            "file_size": file_size,
+            "file_type": file_type,
+            "dimensions": dimensions,
+            "file_hash": file_hash,
+            "perceptual_hash": perceptual_hash,
+            "original_filename": filename
+        }
 
     def save_uploaded_file(self, file_content: bytes, filename: str) -> Tuple[str, dict]:
 
+        part_path = self._new_part_path()
+
         try:
             if len(file_content) > self.max_file_size:
                 raise ValueError(f"File is too large: {len(file_content)} bytes")
 
-            file_type = magic.from_buffer(file_content, mime=True)
-            if file_type not in self.allowed_types:
-                raise ValueError(f"Unsupported file type: {file_type}")
-            
-            file_extension = Path(filename).suffix.lower()
-            unique_filename = f"{uuid.uuid4()}{file_extension}"
-            file_path = self.upload_dir / unique_filename
+            file_type = self._check_file_type(file_content)
 
-            with open(file_path, "wb") as f:
-                
+            with open(part_path, "wb") as f:
                 f.write(file_content)
 
-                dimensions = self._get_image_dimensions(file_path)
+            metadata = self._store(
+                part_path, len(file_content), file_type, hashlib.sha256(file_content).hexdigest(), filename
+            )
 
-                file_hash = hashlib.sha256(file_content).hexdigest()
+            logger.info(f"Saved file: {metadata['file_hash']}, size: {len(file_content)}, type: {file_type}")
 
-                metadata = {
-                    "file_path": str(file_path),
-                    "file_size": len(file_content),
-                    "file_type": file_type,
-                    "dimensions": dimensions,
-                    "file_hash": file_hash,
-                    "original_filename": filename
-                }
+            return metadata["file_path"], metadata
+            
+        except Exception as e:
+            part_path.unlink(missing_ok=True)
+            logger.error(f"File save failed: {e}")
+            raise
 
-                logger.info(f"Saved file: {unique_filename}, size: {len(file_content)}, type: {file_type}")
+    def _append_chunk(self, f: Any, hasher: Any, chunk: bytes, sniff: bool) -> Tuple[Optional[str], float]:
+        """Returns the sniffed type (first chunk only) and the time spent hashing."""
+
+        file_type = self._check_file_type(chunk) if sniff else None
+
+        start = time.perf_counter()
+        hasher.update(chunk)
+        hash_seconds = time.perf_counter() - start
+
+        f.write(chunk)
+        return file_type, hash_seconds
+
+    async def save_upload_stream(self, upload: Any, filename: str) -> Tuple[str, dict]:
+        """Stream an upload to disk in fixed-size chunks.
+
+        ``upload`` is anything with an async ``read(size)``, such as FastAPI's
+        ``UploadFile``. The type is sniffed from the first chunk, the size
+        limit is enforced as bytes arrive (an ``UploadFile`` has already been
+        spooled by then; ``BodySizeLimitMiddleware`` bounds the raw request
+        body before that happens), and SHA-256 is computed
+        incrementally while writing to a ``.part`` file that is moved into the
+        blob store once complete, so memory per upload stays at one chunk.
+        Returns the blob key and the file metadata.
+
+        Every blocking step (disk I/O, libmagic, hashing, PIL) runs on the
+        bounded I/O pool, never on the event loop.
+        """
+
+        declared_size = getattr(upload, "size", None)
+        if declared_size is not None and declared_size > self.max_file_size:
+            raise ValueError(f"File is too large: {declared_size} bytes")
+
+        part_path = self._new_part_path()
+
+        started = time.perf_counter()
+        hasher = hashlib.sha256()
+        hash_seconds = 0.0
+        file_size = 0
+        file_type = None
+
+        try:
+            f = await run_in_io_pool(open, part_path, "wb")
+
+            try:
+                while True:
+                    chunk = await upload.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+
+                    file_size += len(chunk)
+                    if file_size > self.max_file_size:
+                        raise ValueError(f"File is too large: more than {self.max_file_size} bytes")
+
+                    sniffed, chunk_hash_seconds = await run_in_io_pool(
+                        self._append_chunk, f, hasher, chunk, file_type is None
+                    )
+                    file_type = file_type or sniffed
+                    hash_seconds += chunk_hash_seconds
+
+            finally:
+                await run_in_io_pool(f.close)
+
+            if file_type is None:
+                raise ValueError("Uploaded file is empty")
+
+            metadata = await run_in_io_pool(
+                self._store, part_path, file_size, file_type, hasher.hexdigest(), filename
+            )
+
+            STAGE_LATENCY.labels(stage="hash").observe(hash_seconds)
+            STAGE_LATENCY.labels(stage="upload").observe(time.perf_counter() - started)
+
+            logger.info(f"Saved file: {metadata['file_hash']}, size: {file_size}, type: {file_type}")
+
+            return metadata["file_path"], metadata
 
-                return str(file_path), metadata
-            
         except Exception as e:
+            part_path.unlink(missing_ok=True)
             logger.error(f"File save failed: {e}")
             raise
 
     def delete_file(self, file_path: str) -> bool:
+        """Delete a blob or legacy upload path.
+
+        Blobs are shared between identical uploads, so callers should leave
+        unreferenced ones to the retention sweep rather than delete eagerly.
+        """
 
         try:
+            if BLOB_KEY_RE.match(file_path):
+                return self.blob_store.delete(file_path)
+
             Path(file_path).unlink(missing_ok=True)
             return True
         
@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import get_settings
+from app.core.instrumentation import PROVIDER_ERRORS, PROVIDER_LATENCY
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+def _error_reason(status_code: int) -> str:
+    if status_code == 429:
+        return "http_429"
+    return "http_5xx" if status_code >= 500 else "http_4xx"
+
+class ProviderClient:
+    """Pooled HTTP client for one model provider.
+
+    Keeps one keep-alive ``httpx.Client`` per process and one
+    ``httpx.AsyncClient`` per event loop (closed by ``aclose()`` on
+    shutdown), caps in-flight requests per
+    provider, and retries transport errors and retryable status codes with
+    full-jitter exponential backoff. Non-retryable responses and the last
+    retryable one are returned as-is; callers decide whether to
+    ``raise_for_status``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 10.0,
+        max_connections: int = 20,
+        max_concurrency: int = 8,
+        max_retries: int = 3,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        http2: bool = True
+    ):
+        self.name = name
+        self.headers = headers or {}
+        self.timeout = httpx.Timeout(timeout, connect=min(timeout, 5.0))
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections
+        )
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.http2 = http2
+
+        self._client: Optional[httpx.Client] = None
+        self._pid: Optional[int] = None
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_semaphore: Optional[asyncio.Semaphore] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _get_client(self) -> httpx.Client:
+        # Pooled sockets must not be shared across a Celery fork
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    self._client = httpx.Client(
+                        headers=self.headers,
+                        timeout=self.timeout,
+                        limits=self.limits,
+                        http2=self.http2
+                    )
+                    self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+                    self._pid = os.getpid()
+        return self._client
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2
+            )
+            self._async_semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._async_loop = loop
+        return self._async_client
+
+    async def aclose(self):
+        """Close the async client if it belongs to the running event loop."""
+
+        client = self._async_client
+        if client is None or self._async_loop is not asyncio.get_running_loop():
+            return
+
+        self._async_client = None
+        self._async_semaphore = None
+        self._async_loop = None
+        await client.aclose()
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method: str, url: str, max_retries: Optional[int] = None, **kwargs: Any) -> httpx.Response:
+        """Send with retries; ``max_retries`` overrides the client's default for this call."""
+
+        client = self._get_client()
+        max_retries = self.max_retries if max_retries is None else max_retries
+
+        for attempt in range(max_retries + 1):
+            is_last = attempt == max_retries
+
+            start = time.perf_counter()
+
+            try:
+                with self._semaphore:
+                    response = client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                PROVIDER_ERRORS.labels(provider=self.name, reason="transport").inc()
+                if is_last:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"{self.name}: {type(e).__name__} on attempt {attempt + 1}, retrying in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+
+            PROVIDER_LATENCY.labels(provider=self.name).observe(time.perf_counter() - start)
+            if response.status_code >= 400:
+                PROVIDER_ERRORS.labels(provider=self.name, reason=_error_reason(response.status_code)).inc()
+
+            if response.status_code not in RETRYABLE_STATUS_CODES or is_last:
+                return response
+
+            delay = self._backoff(attempt, response)
+            logger.warning(f"{self.name}: HTTP {response.status_code} on attempt {attempt + 1}, retrying in {delay:.2f}s")
+            time.sleep(delay)
+
+        raise RuntimeError("unreachable")
+
+    async def arequest(self, method: str, url: str, max_retries: Optional[int] = None, **kwargs: Any) -> httpx.Response:
+        client = self._get_async_client()
+        assert self._async_semaphore is not None
+        max_retries = self.max_retries if max_retries is None else max_retries
+
+        for attempt in range(max_retries + 1):
+            is_last = attempt == max_retries
+
+            start = time.perf_counter()
+
+            try:
+                async with self._async_semaphore:
+                    response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                PROVIDER_ERRORS.labels(provider=self.name, reason="transport").inc()
+                if is_last:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"{self.name}: {type(e).__name__} on attempt {attempt + 1}, retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            PROVIDER_LATENCY.labels(provider=self.name).observe(time.perf_counter() - start)
+            if response.status_code >= 400:
+                PROVIDER_ERRORS.labels(provider=self.name, reason=_error_reason(response.status_code)).inc()
+
+            if response.status_code not in RETRYABLE_STATUS_CODES or is_last:
+                return response
+
+            delay = self._backoff(attempt, response)
+            logger.warning(f"{self.name}: HTTP {response.status_code} on attempt {attempt + 1}, retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+        raise RuntimeError("unreachable")
+
+    def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    async def apost(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.arequest("POST", url, **kwargs)
+
+
+_provider_clients: Dict[str, ProviderClient] = {}
+_registry_lock = threading.Lock()
+
+def _build_provider_client(name: str) -> ProviderClient:
+    headers = {}
+    max_concurrency = settings.HTTP_MAX_CONCURRENCY
+
+    if name == "huggingface":
+        headers = {"Authorization": f"Bearer {settings.HUGGING_FACE_ACCESS_TOKEN}"}
+        max_concurrency = settings.HF_MAX_CONCURRENCY
+
+    return ProviderClient(
+        name,
+        headers=headers,
+        timeout=settings.HTTP_TIMEOUT_SECONDS,
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_concurrency=max_concurrency,
+        max_retries=settings.HTTP_MAX_RETRIES,
+        http2=settings.HTTP2_ENABLED
+    )
+
+def get_provider_client(name: str) -> ProviderClient:
+    client = _provider_clients.get(name)
+    if client is None:
+        with _registry_lock:
+            client = _provider_clients.get(name)
+            if client is None:
+                client = _build_provider_client(name)
+                _provider_clients[name] = client
+    return client
+
+async def close_provider_clients():
+    for client in list(_provider_clients.values()):
+        await client.aclose()
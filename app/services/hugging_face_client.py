@@ -1,66 +1,151 @@
+import asyncio
 import logging
-import requests
+from typing import Any, Dict, List, Tuple
+import httpx
 
 from app.core.config import get_settings
+from app.services.batching import MicroBatcher
+from app.services.http_client import get_provider_client
+from app.services.local_text_model import local_text_classifier
+from app.services.text_chunking import estimate_tokens, needs_chunking, score_texts_chunked
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 # HF_API_URL = "https://api-inference.huggingface.co/models/martin-ha/toxic-comment-model"
-HF_API_URL = "https://api-inference.huggingface.co/models/unitary/toxic-bert"
-headers = {"Authorization": f"Bearer {settings.HUGGING_FACE_ACCESS_TOKEN}"}
+HF_MODEL_ID = "unitary/toxic-bert"
+HF_API_URL = f"https://api-inference.huggingface.co/models/{HF_MODEL_ID}"
+hf_client = get_provider_client("huggingface")
+
+FLAG_THRESHOLD = 0.3
+
+def _parse_predictions(predictions: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+    scores = {}
+    max_score = 0.0
+
+    for item in predictions:
+        if isinstance(item, dict) and "label" in item and "score" in item:
+
+            label = item["label"].lower()
+            score = float(item["score"])
+            scores[label] = score
+
+            max_score = max(max_score, score)
+
+    verdict = "flagged" if max_score > FLAG_THRESHOLD else "clean"
+    logger.info(f"Moderation result: {verdict}, max_score: {max_score}")
+    return verdict, scores
+
+def _split_batch_response(result: Any, count: int) -> List[List[Dict[str, Any]]]:
+    if not isinstance(result, list) or len(result) == 0:
+        raise ValueError(f"Invalid API response: {result}")
+
+    # One prediction list per input
+    if all(isinstance(entry, list) for entry in result) and len(result) == count:
+        return result
+
+    # Single input answered with a flat list of predictions
+    if count == 1 and all(isinstance(entry, dict) for entry in result):
+        return [result]
+
+    raise ValueError(f"Unexpected response format: {result}")
+
+def text_model_id() -> str:
+    """Identity of the model answering text requests, used to key cached verdicts."""
+
+    if settings.TEXT_MODEL_BACKEND == "local":
+        return local_text_classifier.model_id
+    return HF_MODEL_ID
+
+def _count_tokens(content: str) -> int:
+    """Exact with the local backend's tokenizer; a conservative estimate for the remote API."""
+
+    if settings.TEXT_MODEL_BACKEND == "local":
+        return local_text_classifier.count_tokens(content)
+    return estimate_tokens(content)
+
+def _check_texts_local(contents: List[str]) -> List[Tuple[str, Dict[str, Any]]]:
+    try:
+        return [_parse_predictions(predictions) for predictions in local_text_classifier.predict(contents)]
+
+    except Exception as e:
+        logger.error(f"Local text model failed: {e}")
+        return [("error", {"error": "Moderation service temporarily unavailable"})] * len(contents)
+
+def _parse_remote_response(response: httpx.Response, count: int) -> List[Tuple[str, Dict[str, Any]]]:
+    response.raise_for_status()
+
+    result = response.json()
+    logger.debug(f"HF API Response: {result}")
+
+    return [_parse_predictions(predictions) for predictions in _split_batch_response(result, count)]
+
+def _remote_failure(e: Exception, count: int) -> List[Tuple[str, Dict[str, Any]]]:
+    if isinstance(e, httpx.HTTPError):
+        logger.error(f"HTTP request failed: {e}")
+        return [("error", {"error": f"API request failed: {str(e)}"})] * count
+
+    if isinstance(e, ValueError):
+        logger.error(str(e))
+        return [("error", {"error": "Unexpected API response format"})] * count
+
+    logger.error(f"Unexpected error: {e}")
+    return [("error", {"error": "Moderation service temporarily unavailable"})] * count
+
+def _score_texts(contents: List[str]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Moderate several texts with a single inference call, preserving order."""
+
+    if not contents:
+        return []
+
+    if settings.TEXT_MODEL_BACKEND == "local":
+        return _check_texts_local(contents)
+
+    try:
+        response = hf_client.post(HF_API_URL, json={"inputs": contents})
+        return _parse_remote_response(response, len(contents))
+
+    except Exception as e:
+        return _remote_failure(e, len(contents))
+
+def check_texts_hf(contents: List[str]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Moderate several texts, preserving order; texts past the model's window are chunked."""
+
+    return score_texts_chunked(contents, _score_texts, _count_tokens)
+
+async def acheck_texts_hf(contents: List[str]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Event-loop friendly variant of ``check_texts_hf`` for FastAPI handlers."""
+
+    if not contents:
+        return []
+
+    if settings.TEXT_MODEL_BACKEND == "local":
+        return await asyncio.to_thread(_check_texts_local, contents)
+
+    try:
+        response = await hf_client.apost(HF_API_URL, json={"inputs": contents})
+        return _parse_remote_response(response, len(contents))
+
+    except Exception as e:
+        return _remote_failure(e, len(contents))
+
+hf_batcher: MicroBatcher[str, Tuple[str, Dict[str, Any]]] = MicroBatcher(
+    "hf_text",
+    check_texts_hf,
+    max_batch_size=settings.HF_BATCH_MAX_SIZE,
+    max_wait_ms=settings.HF_BATCH_MAX_WAIT_MS
+)
 
 def check_text_hf(content: str):
     try:
         if not content.strip():
             return "clean", {}
-        
-        response = requests.post(HF_API_URL, headers=headers, json={"inputs": content})
-        response.raise_for_status()
-
-        result = response.json()
-        logger.info(f"HF API Response: {result}")
-
-        if isinstance(result, list) and len(result) > 0:
-            first_result = result[0]
-
-            if isinstance(first_result, list):
-                predictions = first_result
-            
-            elif isinstance(first_result, dict):
-                predictions = result
-
-            else:
-                logger.error(f"Unexpected response format: {result}")
-                return "error", {"error": "Unexpected API response format"}
-            
-            scores = {}
-            max_score = 0.0
-            flagged_categories = []
-
-            for item in predictions:
-                if isinstance(item, dict) and "label" in item or "score" in item:
-
-                    label = item["label"].lower()
-                    score = float(item["score"])
-                    scores[label] = score
-
-                    max_score = max(max_score, score)
-
-                    if max_score > 0.3:
-                        flagged_categories.append(label)
-
-            verdict = "flagged" if flagged_categories else "clean"
-            logger.info(f"Moderation result: {verdict}, max_score: {max_score}")
-            return verdict, scores
-        
-        else:
-            logger.error(f"Invalid API response: {result}")
-            return "error", {"error": "Invalid API response"}
-    
-    except requests.exceptions.RequestException as e:
-        logger.error(f"HTTP request failed: {e}")
-        return "error", {"error": f"API request failed: {str(e)}"}
-    
+
+        # Long texts already fan out into batched chunk calls of their own
+        if needs_chunking(content, _count_tokens):
+            return check_texts_hf([content])[0]
+
+        return hf_batcher(content)
+
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         return "error", {"error": "Moderation service temporarily unavailable"}
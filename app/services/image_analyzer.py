@@ -1,53 +1,83 @@
-import base64
-import io
 import logging
-from typing import Any, Dict, Tuple
-
-from PIL import Image
-import requests
+from typing import Any, BinaryIO, Dict, Tuple, Union
 
 from app.core.config import get_settings
+from app.services.analyzer_pipeline import AnalyzerPipeline, AnalyzerStage
+from app.services.cascade import image_cascade
+from app.services.http_client import get_provider_client
+from app.services.image_preprocessing import NSFW_INPUT_SIZE, PreparedImage
+from app.services.local_image_model import image_batcher
 
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+NSFW_API_URL = "https://api-inference.huggingface.co/models/Falconsai/nsfw_image_detection"
+NSFW_FLAG_THRESHOLD = 0.7
+
 class ImageAnalyzer:
 
-    def _analyze_nsfw(self, img: Image.Image) -> Dict[str, float]:
-        try:
-            buffer = io.BytesIO()
-            img.save(buffer, format='JPEG')
-            img_base64 = base64.b64encode(buffer.getvalue()).decode
-
-            API_URL = "https://api-inference.huggingface.co/models/Falconsai/nsfw_image_detection"
-            headers = {"Authorization": f"Bearer {settings.HUGGING_FACE_ACCESS_TOKEN}"}
-
-            response = requests.post(
-                API_URL,
-                headers=headers,
-                json={"inputs": img_base64},
-                timeout=30
+    def __init__(self):
+        self.pipeline = AnalyzerPipeline(
+            [
+                AnalyzerStage(
+                    name="nsfw_scores",
+                    run=self._analyze_nsfw,
+                    timeout=settings.IMAGE_NSFW_TIMEOUT_SECONDS,
+                    default={},
+                    decides=lambda scores: "flagged" if scores.get('nsfw', 0.0) > NSFW_FLAG_THRESHOLD else None
+                ),
+                AnalyzerStage(
+                    name="detected_objects",
+                    run=self._detect_objects,
+                    timeout=settings.IMAGE_OBJECTS_TIMEOUT_SECONDS,
+                    default={}
+                ),
+                AnalyzerStage(
+                    name="extracted_text",
+                    run=self._extract_text,
+                    timeout=settings.IMAGE_OCR_TIMEOUT_SECONDS,
+                    default=""
+                ),
+            ],
+            max_workers=settings.IMAGE_PIPELINE_WORKERS
+        )
+
+    def _analyze_nsfw(self, prepared: PreparedImage, budget: float) -> Dict[str, float]:
+        """Score the image; raises on failure rather than guessing scores."""
+
+        if settings.IMAGE_MODEL_BACKEND == "local":
+            import numpy as np
+
+            # Bounded like the HTTP call below, so a stalled batcher can't hold a pipeline worker
+            result = image_batcher(np.asarray(prepared.model_input(NSFW_INPUT_SIZE)), timeout=budget)
+        else:
+            # The image classification endpoint takes raw image bytes; send the
+            # model-sized JPEG rather than the full working image
+            response = get_provider_client("huggingface").post(
+                NSFW_API_URL,
+                content=prepared.jpeg_bytes(NSFW_INPUT_SIZE),
+                headers={"Content-Type": "image/jpeg"},
+                # One attempt bounded by the stage budget: the pipeline stops
+                # waiting after that, and retries would only hold its thread
+                timeout=budget,
+                max_retries=0
             )
+            response.raise_for_status()
+            result = response.json()
 
-            if response.status_code == 200:
-                result = response.json()
+        scores = {}
+        if isinstance(result, list):
+            for item in result:
+                if isinstance(item, dict) and 'label' in item:
+                    scores[item['label'].lower()] = item.get('score', 0.0)
 
-                if isinstance(result, list) and len(result) > 0:
-                    scores = {}
-                    for item in result:
-                        if isinstance(item, dict) and 'label' in item:
-                            scores[item['label'].lower()] = item.get('score', 0.0)
+        if not scores:
+            raise ValueError(f"Unexpected NSFW model response: {result}")
 
-                    return scores
-                
-            return {"nsfw": 0.1, "safe": 0.9}
-        
-        except Exception as e:
-            logger.warning(f"NSFW analysis failed: {e}")
-            return {"nsfw": 0.0, "safe": 1.0}
+        return scores
 
-    def _detect_objects(self, img: Image.Image) -> Dict[str, Any]:
+    def _detect_objects(self, prepared: PreparedImage, budget: float) -> Dict[str, Any]:
         try:
             # Mock object detection for now
             # In production, use services like:
@@ -65,7 +95,7 @@ class ImageAnalyzer:
             logger.warning(f"Object detection failed: {e}")
             return {}
 
-    def _extract_text(self, img: Image.Image) -> str:
+    def _extract_text(self, prepared: PreparedImage, budget: float) -> str:
         try:
             # Mock OCR for now
             # In production, use:
@@ -84,7 +114,7 @@ class ImageAnalyzer:
         nsfw_scores = analysis_data.get('nsfw_scores', {})
         
         nsfw_score = nsfw_scores.get('nsfw', 0.0)
-        if nsfw_score > 0.7:
+        if nsfw_score > NSFW_FLAG_THRESHOLD:
             return "flagged"
         
         extracted_text = analysis_data.get('extracted_text', '')
@@ -93,32 +123,44 @@ class ImageAnalyzer:
         
         return "clean"
 
-    def analyze_image(self, image_path: str) -> Tuple[str, Dict[str, Any]]:
+    def analyze_image(self, image: Union[str, BinaryIO]) -> Tuple[str, Dict[str, Any]]:
+        """``image`` is a path or an open file object, e.g. an mmap from the blob store."""
 
         try:
-            with Image.open(image_path) as img:
-
-                if img.width > 1024 or img.height > 1024:
-                    img.thumbnail((1024,1024), Image.Resampling.LANCZOS)
-
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
+            prepared = PreparedImage.load(image)
+
+            if image_cascade.decide(*prepared.original_size) is not None:
+                return "clean", {
+                    'nsfw_scores': {},
+                    'detected_objects': {},
+                    'extracted_text': "",
+                    'prefilter': "tiny_image",
+                }
 
-                nsfw_result = self._analyze_nsfw(img)
-                object_detection = self._detect_objects(img)
-                text_extraction = self._extract_text(img)
+            # Stages run concurrently; a decisive NSFW score skips the rest
+            results, timings, decided = self.pipeline.run(prepared)
 
-                analysis_data = {
-                    'nsfw_scores': nsfw_result,
-                    'detected_objects': object_detection,
-                    'extracted_text': text_extraction,
+            # Without NSFW scores there is no basis for a verdict; don't report "clean"
+            if timings['nsfw_scores']['status'] != "ok":
+                return "error", {
+                    "error": f"NSFW analysis {timings['nsfw_scores']['status']}",
+                    "stage_timings": timings
                 }
-                
-                verdict = self._determine_verdict(analysis_data)
-                
-                return verdict, analysis_data
+
+            analysis_data = {
+                'nsfw_scores': results['nsfw_scores'],
+                'detected_objects': results['detected_objects'],
+                'extracted_text': results['extracted_text'],
+                'stage_timings': timings,
+            }
+            
+            verdict = decided or self._determine_verdict(analysis_data)
+            
+            return verdict, analysis_data
         
         except Exception as e:
             logger.error(f"Image analysis failed: {e}")
             return "error", {"error": str(e)}
-        
\ No newline at end of file
+        
+
+image_analyzer = ImageAnalyzer()
@@ -0,0 +1,75 @@
+import io
+from typing import BinaryIO, Dict, Tuple, Union
+
+from PIL import Image
+
+
+# Largest side kept for analyzers that want more than a model thumbnail
+WORKING_SIZE = 1024
+
+# Falconsai/nsfw_image_detection is a ViT taking 224x224 inputs
+NSFW_INPUT_SIZE = 224
+
+JPEG_QUALITY = 90
+
+class PreparedImage:
+    """An image decoded and converted once, shared by every analyzer.
+
+    Loading asks libjpeg for a reduced-size decode via ``draft`` (DCT
+    scaling by 1/2, 1/4 or 1/8), so a 12MP photo is never fully decoded
+    just to be shrunk to 1024px. Colour conversion happens once, resizing
+    uses a cheaper filter than LANCZOS (the models resample again anyway),
+    and per-size variants and their JPEG encodings are cached so analyzers
+    don't each redo the work.
+    """
+
+    def __init__(self, img: Image.Image, original_size: Tuple[int, int]):
+        self.image = img
+        self.original_size = original_size
+        self._resized: Dict[int, Image.Image] = {}
+        self._jpeg: Dict[int, bytes] = {}
+
+    @classmethod
+    def load(cls, source: Union[str, BinaryIO], max_size: int = WORKING_SIZE) -> "PreparedImage":
+        with Image.open(source) as img:
+            original_size = img.size
+
+            if img.format == "JPEG":
+                # Decodes straight to RGB at the smallest scale still >= max_size
+                img.draft("RGB", (max_size, max_size))
+
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            else:
+                img.load()
+
+        if img.width > max_size or img.height > max_size:
+            img.thumbnail((max_size, max_size), Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+        return cls(img, original_size)
+
+    @property
+    def width(self) -> int:
+        return self.image.width
+
+    @property
+    def height(self) -> int:
+        return self.image.height
+
+    def model_input(self, size: int = NSFW_INPUT_SIZE) -> Image.Image:
+        """Square ``size`` x ``size`` RGB image, as ViT-style processors resize to."""
+
+        if size not in self._resized:
+            self._resized[size] = self.image.resize(
+                (size, size), Image.Resampling.BILINEAR, reducing_gap=2.0
+            )
+        return self._resized[size]
+
+    def jpeg_bytes(self, size: int = NSFW_INPUT_SIZE) -> bytes:
+        """JPEG encoding of ``model_input(size)``, for remote inference APIs."""
+
+        if size not in self._jpeg:
+            buffer = io.BytesIO()
+            self.model_input(size).save(buffer, format="JPEG", quality=JPEG_QUALITY)
+            self._jpeg[size] = buffer.getvalue()
+        return self._jpeg[size]
@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from app.core.config import get_settings
+from app.services.batching import MicroBatcher
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+class LocalImageClassifier:
+    """In-process CPU image classifier, run with ``torch`` or ONNX Runtime.
+
+    Callers pass square RGB arrays already at the model's input size (see
+    ``PreparedImage.model_input``). Batches are stacked and normalised in
+    a single vectorised NumPy pass, and the image processor is never run.
+    The model loads lazily, once per process.
+
+    With the ``onnx`` runtime, ``model_path`` must be a directory holding
+    ``model.onnx``, ``config.json`` and ``preprocessor_config.json``. That
+    is the layout ``optimum-cli export onnx`` writes.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        runtime: str = "torch",
+        num_threads: int = 0,
+        batch_size: int = 16
+    ):
+        self.model_path = model_path
+        self.runtime = runtime
+        self.num_threads = num_threads
+        self.batch_size = batch_size
+
+        self._model: Any = None
+        self._labels: List[str] = []
+        self._mean: Any = None
+        self._std: Any = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def model_id(self) -> str:
+        return f"local:{self.model_path}:{self.runtime}"
+
+    def _load_torch(self):
+        import torch
+        from transformers import AutoImageProcessor, AutoModelForImageClassification
+
+        if self.num_threads > 0:
+            torch.set_num_threads(self.num_threads)
+
+        local_only = os.path.isdir(self.model_path)
+        processor = AutoImageProcessor.from_pretrained(self.model_path, local_files_only=local_only)
+        model = AutoModelForImageClassification.from_pretrained(self.model_path, local_files_only=local_only)
+        model.eval()
+
+        config = model.config
+        return model, [config.id2label[i] for i in range(config.num_labels)], processor.image_mean, processor.image_std
+
+    def _load_onnx(self):
+        import onnxruntime
+
+        with open(os.path.join(self.model_path, "config.json")) as f:
+            config = json.load(f)
+        with open(os.path.join(self.model_path, "preprocessor_config.json")) as f:
+            preprocessor = json.load(f)
+
+        options = onnxruntime.SessionOptions()
+        if self.num_threads > 0:
+            options.intra_op_num_threads = self.num_threads
+
+        session = onnxruntime.InferenceSession(
+            os.path.join(self.model_path, "model.onnx"),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+
+        id2label = config["id2label"]
+        labels = [id2label[str(i)] for i in range(len(id2label))]
+        return session, labels, preprocessor["image_mean"], preprocessor["image_std"]
+
+    def load(self):
+        if self._model is not None and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._model is not None and self._pid == os.getpid():
+                return
+
+            import numpy as np
+
+            if self.runtime == "onnx":
+                model, labels, mean, std = self._load_onnx()
+            elif self.runtime == "torch":
+                model, labels, mean, std = self._load_torch()
+            else:
+                raise ValueError(f"Unknown image model runtime: {self.runtime}")
+
+            # Shaped for NHWC broadcasting, with the 1/255 rescale folded in
+            self._mean = np.asarray(mean, dtype=np.float32).reshape(1, 1, 1, 3) * 255.0
+            self._std = np.asarray(std, dtype=np.float32).reshape(1, 1, 1, 3) * 255.0
+            self._labels = labels
+            self._model = model
+            self._pid = os.getpid()
+
+            logger.info(f"Loaded local image model {self.model_id}")
+
+    def _preprocess(self, images: List[Any]) -> Any:
+        import numpy as np
+
+        batch = np.stack(images).astype(np.float32)
+        batch -= self._mean
+        batch /= self._std
+        return np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+
+    def _logits(self, pixel_values: Any) -> Any:
+        if self.runtime == "onnx":
+            return self._model.run(None, {"pixel_values": pixel_values})[0]
+
+        import torch
+
+        with torch.no_grad():
+            return self._model(pixel_values=torch.from_numpy(pixel_values)).logits.numpy()
+
+    def predict(self, images: List[Any]) -> List[List[Dict[str, Any]]]:
+        """Return HF-style ``[{"label", "score"}, ...]`` predictions for each HxWx3 uint8 array."""
+
+        import numpy as np
+
+        self.load()
+        predictions: List[List[Dict[str, Any]]] = []
+
+        for start in range(0, len(images), self.batch_size):
+            logits = self._logits(self._preprocess(images[start:start + self.batch_size]))
+
+            exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probabilities = exp / exp.sum(axis=1, keepdims=True)
+
+            for row in probabilities.tolist():
+                predictions.append([
+                    {"label": label, "score": score} for label, score in zip(self._labels, row)
+                ])
+
+        return predictions
+
+local_image_classifier = LocalImageClassifier(
+    model_path=settings.LOCAL_IMAGE_MODEL_PATH,
+    runtime=settings.LOCAL_IMAGE_MODEL_RUNTIME,
+    num_threads=settings.LOCAL_IMAGE_MODEL_THREADS,
+    batch_size=settings.IMAGE_BATCH_MAX_SIZE
+)
+
+# Coalesces images from concurrently running tasks into one forward pass
+image_batcher: MicroBatcher[Any, List[Dict[str, Any]]] = MicroBatcher(
+    "nsfw_image",
+    local_image_classifier.predict,
+    max_batch_size=settings.IMAGE_BATCH_MAX_SIZE,
+    max_wait_ms=settings.IMAGE_BATCH_MAX_WAIT_MS
+)
@@ -0,0 +1,119 @@
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from app.core.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+class LocalTextClassifier:
+    """In-process CPU text classifier built on ``transformers``.
+
+    The model is loaded lazily, once per process, and every call runs under
+    ``torch.no_grad``. Inputs are sorted by length and split into
+    sub-batches so padding stays short. ``torch`` and ``transformers`` are
+    only imported when the local backend is actually used.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        quantize: bool = False,
+        num_threads: int = 0,
+        batch_size: int = 32,
+        max_length: int = 512
+    ):
+        self.model_path = model_path
+        self.quantize = quantize
+        self.num_threads = num_threads
+        self.batch_size = batch_size
+        self.max_length = max_length
+
+        self._model: Any = None
+        self._tokenizer: Any = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def model_id(self) -> str:
+        suffix = ":int8" if self.quantize else ""
+        return f"local:{self.model_path}{suffix}"
+
+    def load(self):
+        if self._model is not None and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._model is not None and self._pid == os.getpid():
+                return
+
+            import torch
+            from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+            if self.num_threads > 0:
+                torch.set_num_threads(self.num_threads)
+
+            local_only = os.path.isdir(self.model_path)
+            tokenizer = AutoTokenizer.from_pretrained(self.model_path, local_files_only=local_only)
+            model = AutoModelForSequenceClassification.from_pretrained(self.model_path, local_files_only=local_only)
+            model.eval()
+
+            if self.quantize:
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+            self._tokenizer = tokenizer
+            self._model = model
+            self._pid = os.getpid()
+
+            logger.info(f"Loaded local text model {self.model_id} (threads: {torch.get_num_threads()})")
+
+    def count_tokens(self, content: str) -> int:
+        """Tokens ``content`` occupies in the model's input, excluding special tokens."""
+
+        self.load()
+        return len(self._tokenizer(content, add_special_tokens=False, verbose=False)["input_ids"])
+
+    def predict(self, contents: List[str]) -> List[List[Dict[str, Any]]]:
+        """Return HF-style ``[{"label", "score"}, ...]`` predictions for each input, in order."""
+
+        import torch
+
+        self.load()
+
+        config = self._model.config
+        multi_label = config.problem_type == "multi_label_classification"
+        labels = [config.id2label[i] for i in range(config.num_labels)]
+
+        order = sorted(range(len(contents)), key=lambda i: len(contents[i]))
+        predictions: List[List[Dict[str, Any]]] = [[] for _ in contents]
+
+        with torch.no_grad():
+            for start in range(0, len(order), self.batch_size):
+                indices = order[start:start + self.batch_size]
+
+                encoded = self._tokenizer(
+                    [contents[i] for i in indices],
+                    padding=True,
+                    truncation=True,
+                    max_length=self.max_length,
+                    return_tensors="pt"
+                )
+                logits = self._model(**encoded).logits
+                probabilities = torch.sigmoid(logits) if multi_label else torch.softmax(logits, dim=-1)
+
+                for index, row in zip(indices, probabilities.tolist()):
+                    predictions[index] = [
+                        {"label": label, "score": score} for label, score in zip(labels, row)
+                    ]
+
+        return predictions
+
+local_text_classifier = LocalTextClassifier(
+    model_path=settings.LOCAL_TEXT_MODEL_PATH,
+    quantize=settings.LOCAL_TEXT_MODEL_QUANTIZE,
+    num_threads=settings.LOCAL_TEXT_MODEL_THREADS,
+    batch_size=settings.LOCAL_TEXT_MODEL_BATCH_SIZE
+)
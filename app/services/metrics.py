@@ -1,46 +1,37 @@
+from app.core.config import get_settings
 from app.db import metrics as metrics_db
+from app.db.metric_sink import ROLLUP_RESOLUTIONS, metric_sink
+from app.services.summary_cache import summary_cache
 from datetime import date, datetime, timedelta, timezone
-from typing import Dict, Optional, cast
+from typing import Any, Dict, List, Optional, Tuple, cast
 import logging
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Bucket widths offered by get_metric_series, narrowest first
+SERIES_INTERVALS: Dict[str, int] = {
+    '1m': 60,
+    '5m': 5 * 60,
+    '15m': 15 * 60,
+    '1h': 60 * 60,
+    '6h': 6 * 60 * 60,
+    '1d': 24 * 60 * 60,
+}
+
+def pick_series_interval(hours: int, max_points: int) -> str:
+    """Narrowest interval that keeps ``hours`` within ``max_points`` buckets."""
+
+    for name, seconds in SERIES_INTERVALS.items():
+        if hours * 3600 / seconds <= max_points:
+            return name
+    return '1d'
 
 class MetricsCollector:
-    def _calculate_daily_stats(self, target_date: date, source_type: str) -> Dict:
+    source_types = ['text', 'image']
 
-        try:
-            events = metrics_db.get_moderation_events_by_date_and_source(target_date, source_type)
-            
-            total_requests = len(events)
-            flagged_count = sum(1 for e in events if e.verdict == 'flagged')
-            clean_count = sum(1 for e in events if e.verdict == 'clean')
-            error_count = sum(1 for e in events if e.verdict == 'error')
-            
-            avg_processing_time = None
-            
-            total_file_size = None
-            if source_type == 'image':
-                total_file_size = sum(e.file_size or 0 for e in events)
-            
-            return {
-                'total_requests': total_requests,
-                'flagged_count': flagged_count,
-                'clean_count': clean_count,
-                'error_count': error_count,
-                'avg_processing_time': avg_processing_time,
-                'total_file_size': total_file_size
-            }
-        
-        except Exception as e:
-            logger.error(f"Failed to calculate daily stats: {e}")
-            return {
-                'total_requests': 0,
-                'flagged_count': 0,
-                'clean_count': 0,
-                'error_count': 0,
-                'avg_processing_time': None,
-                'total_file_size': None
-            }
+    def _calculate_daily_stats(self, target_date: date) -> Dict[str, Dict]:
+        return metrics_db.get_daily_stats_by_source(target_date, self.source_types)
     
     def record_metric(
         self, 
@@ -49,92 +40,108 @@ class MetricsCollector:
         unit: Optional[str] = None, 
         tags: Optional[Dict] = None
     ):
-        
+        """Queue a sample; it reaches ``system_metrics`` and the rollups on the sink's next flush."""
+
         try:
-            metrics_db.create_system_metric(
-                metric_name=metric_name,
-                metric_value=value,
-                metric_unit=unit,
-                metric_tags=tags
-            )
+            metric_sink.add_sample(metric_name, value, unit, tags)
             logger.debug(f"Recorded metric: {metric_name} = {value}")
         except Exception as e:
             logger.error(f"Failed to record metric {metric_name}: {e}")
 
+    @staticmethod
+    def _history_resolution(hours: int) -> str:
+        if hours <= settings.METRIC_HISTORY_RAW_MAX_HOURS:
+            return "raw"
+        if hours <= settings.METRIC_HISTORY_MINUTE_MAX_HOURS:
+            return "1m"
+        return "1h"
+
     def update_daily_analytics(self, target_date: Optional[date] = None):
 
         if target_date is None:
             target_date = date.today()
         
         try:
-            for source_type in ['text', 'image']:
+            stats_by_source = self._calculate_daily_stats(target_date)
 
-                stats = self._calculate_daily_stats(target_date, source_type)
-                
+            for source_type, stats in stats_by_source.items():
                 metrics_db.upsert_daily_analytics(target_date, source_type, stats)
-                
+
+            summary_cache.bump()
             logger.info(f"Updated daily analytics for {target_date}")
             
         except Exception as e:
             logger.error(f"Failed to update daily analytics: {e}")
 
+    @staticmethod
+    def _summary_window(days: int) -> Tuple[date, date]:
+        end_date = date.today()
+        return end_date - timedelta(days=days - 1), end_date
+
+    def _build_summary(self, rows: List[Any], start_date: date, days: int) -> Dict:
+        empty = {'total_requests': 0, 'flagged': 0, 'clean': 0, 'error': 0}
+        by_source = {source_type: dict(empty) for source_type in self.source_types}
+        by_day = {}
+
+        for row in rows:
+            counts = {key: int(getattr(row, key) or 0) for key in empty}
+            if row.source_type is not None:
+                by_source[row.source_type] = counts
+            else:
+                by_day[row.date] = counts
+
+        return {
+            'period': f'Last {days} days',
+            'total_requests': sum(s['total_requests'] for s in by_source.values()),
+            'by_source': by_source,
+            'by_verdict': {
+                verdict: sum(s[verdict] for s in by_source.values())
+                for verdict in ('flagged', 'clean', 'error')
+            },
+            'daily_breakdown': [
+                {'date': single_date.isoformat(), **by_day.get(single_date, empty)}
+                for single_date in (start_date + timedelta(n) for n in range(days))
+            ]
+        }
+
     def get_metrics_summary(self, days: int = 7) -> Dict:
+        """Totals for the last ``days`` days, today included, from one grouped query."""
+
         try:
-            end_date = date.today()
-            start_date = end_date - timedelta(days=days)
-            
-            daily_stats = metrics_db.get_daily_analytics_range(start_date, end_date)
-            
-            summary = {
-                'period': f'Last {days} days',
-                'total_requests': sum(s.total_requests for s in daily_stats),
-                'by_source': {},
-                'by_verdict': {
-                    'flagged': sum(s.flagged_count for s in daily_stats),
-                    'clean': sum(s.clean_count for s in daily_stats),
-                    'error': sum(s.error_count for s in daily_stats)
-                },
-                'daily_breakdown': []
-            }
-            
-            for source_type in ['text', 'image']:
-                source_stats = [s for s in daily_stats if s.source_type == source_type]
-                summary['by_source'][source_type] = {
-                    'total_requests': sum(s.total_requests for s in source_stats),
-                    'flagged': sum(s.flagged_count for s in source_stats),
-                    'clean': sum(s.clean_count for s in source_stats),
-                    'error': sum(s.error_count for s in source_stats)
-                }
-            
-            for single_date in (start_date + timedelta(n) for n in range(days)):
-                day_stats = [s for s in daily_stats if s.date == single_date]
-                summary['daily_breakdown'].append({
-                    'date': single_date.isoformat(),
-                    'total_requests': sum(s.total_requests for s in day_stats),
-                    'flagged': sum(s.flagged_count for s in day_stats),
-                    'clean': sum(s.clean_count for s in day_stats),
-                    'error': sum(s.error_count for s in day_stats)
-                })
-            
-            return summary
+            start_date, end_date = self._summary_window(days)
+            rows = metrics_db.get_daily_analytics_totals(start_date, end_date, self.source_types)
+            return self._build_summary(rows, start_date, days)
             
         except Exception as e:
             logger.error(f"Failed to get metrics summary: {e}")
             return {'error': str(e)}
 
+    async def get_metrics_summary_async(self, days: int = 7, replica: bool = True) -> Dict:
+        """``get_metrics_summary`` on the async engine, on the read replica (if configured) unless ``replica`` is off."""
+
+        try:
+            start_date, end_date = self._summary_window(days)
+            rows = await metrics_db.get_daily_analytics_totals_async(
+                start_date, end_date, self.source_types, replica=replica
+            )
+            return self._build_summary(rows, start_date, days)
+
+        except Exception as e:
+            logger.error(f"Failed to get metrics summary: {e}")
+            return {'error': str(e)}
+
     def get_metric_history(self, metric_name: str, hours: int = 24) -> Dict:
         try:
             end_time = datetime.now(timezone.utc)
             start_time = end_time - timedelta(hours=hours)
             
-            metrics = metrics_db.get_system_metrics_by_name_and_timeframe(
-                metric_name, start_time, end_time
-            )
-            
-            return {
-                'metric_name': metric_name,
-                'period': f'Last {hours} hours',
-                'data': [
+            resolution = self._history_resolution(hours)
+
+            if resolution == "raw":
+                metrics = metrics_db.get_system_metrics_by_name_and_timeframe(
+                    metric_name, start_time, end_time
+                )
+                data = [
                     {
                         'timestamp': cast(datetime, m.timestamp).isoformat(),
                         'value': m.metric_value,
@@ -143,9 +150,137 @@ class MetricsCollector:
                     }
                     for m in metrics
                 ]
+            else:
+                rollups = metrics_db.get_metric_rollups(
+                    metric_name, resolution, start_time, end_time
+                )
+                data = [
+                    {
+                        'timestamp': cast(datetime, r.bucket).isoformat(),
+                        'value': r.value_sum / r.sample_count,
+                        'min': r.value_min,
+                        'max': r.value_max,
+                        'count': r.sample_count,
+                        'unit': r.metric_unit
+                    }
+                    for r in rollups
+                ]
+
+            return {
+                'metric_name': metric_name,
+                'period': f'Last {hours} hours',
+                'resolution': resolution,
+                'data': data
             }
         except Exception as e:
             logger.error(f"Failed to get metric history for {metric_name}: {e}")
             return {'error': str(e)}
 
+    @staticmethod
+    def _series_window(hours: int, interval: str, after: Optional[datetime]) -> Tuple[datetime, datetime, int, str]:
+        bucket_seconds = SERIES_INTERVALS[interval]
+        # Coarsest rollup whose buckets tile the interval exactly
+        resolution = max(
+            (r for r in ROLLUP_RESOLUTIONS if bucket_seconds % SERIES_INTERVALS[r] == 0),
+            key=lambda r: SERIES_INTERVALS[r]
+        )
+
+        end_time = datetime.now(timezone.utc)
+        start_time = end_time - timedelta(hours=hours)
+        if after is not None:
+            start_time = max(start_time, after + timedelta(seconds=bucket_seconds))
+
+        # Widen the window back to the start of its first bucket, so that bucket
+        # isn't partial; bucket_seconds is a multiple of the rollup resolution
+        start_time = datetime.fromtimestamp(
+            start_time.timestamp() // bucket_seconds * bucket_seconds, timezone.utc
+        )
+        return start_time, end_time, bucket_seconds, resolution
+
+    @staticmethod
+    def _wants_p95(hours: int) -> bool:
+        return hours <= settings.METRIC_SERIES_P95_MAX_HOURS
+
+    @staticmethod
+    def _build_series(
+        metric_name: str,
+        hours: int,
+        interval: str,
+        rows: List[Any],
+        p95: Dict[datetime, float],
+        limit: int
+    ) -> Dict[str, Any]:
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        return {
+            'metric_name': metric_name,
+            'period': f'Last {hours} hours',
+            'interval': interval,
+            'data': [
+                {
+                    'timestamp': row.bucket.isoformat(),
+                    'count': row.sample_count,
+                    'min': row.value_min,
+                    'avg': float(row.value_avg),
+                    'max': row.value_max,
+                    'p95': p95.get(row.bucket)
+                }
+                for row in rows
+            ],
+            'next': rows[-1].bucket if has_more else None
+        }
+
+    def get_metric_series(
+        self,
+        metric_name: str,
+        hours: int,
+        interval: str,
+        after: Optional[datetime] = None,
+        limit: int = 500
+    ) -> Dict[str, Any]:
+        """Bucketed min/avg/max/p95 of a metric over the last ``hours``, aggregated in SQL.
+
+        Count, min, avg and max come from the 1m/1h rollups. p95 needs the
+        raw samples, so it is only computed for windows of up to
+        ``METRIC_SERIES_P95_MAX_HOURS`` and is ``None`` beyond that.
+        Returns up to ``limit`` buckets starting after the bucket ``after``;
+        ``next`` is the start of the last bucket returned when more remain.
+        Unlike the other readers, errors propagate to the caller.
+        """
+
+        start_time, end_time, bucket_seconds, resolution = self._series_window(hours, interval, after)
+        rows = metrics_db.get_metric_rollup_buckets(
+            metric_name, resolution, start_time, end_time, bucket_seconds, limit + 1
+        )
+
+        p95: Dict[datetime, float] = {}
+        if rows and self._wants_p95(hours):
+            last_end = rows[:limit][-1].bucket + timedelta(seconds=bucket_seconds)
+            p95 = metrics_db.get_metric_p95(metric_name, start_time, last_end, bucket_seconds)
+
+        return self._build_series(metric_name, hours, interval, rows, p95, limit)
+
+    async def get_metric_series_async(
+        self,
+        metric_name: str,
+        hours: int,
+        interval: str,
+        after: Optional[datetime] = None,
+        limit: int = 500
+    ) -> Dict[str, Any]:
+        """``get_metric_series`` on the async engine (the read replica, if configured)."""
+
+        start_time, end_time, bucket_seconds, resolution = self._series_window(hours, interval, after)
+        rows = await metrics_db.get_metric_rollup_buckets_async(
+            metric_name, resolution, start_time, end_time, bucket_seconds, limit + 1
+        )
+
+        p95: Dict[datetime, float] = {}
+        if rows and self._wants_p95(hours):
+            last_end = rows[:limit][-1].bucket + timedelta(seconds=bucket_seconds)
+            p95 = await metrics_db.get_metric_p95_async(metric_name, start_time, last_end, bucket_seconds)
+
+        return self._build_series(metric_name, hours, interval, rows, p95, limit)
+
 metrics_collector = MetricsCollector()
\ No newline at end of file
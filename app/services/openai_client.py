@@ -9,6 +9,7 @@ from app.core.config import get_settings
 logger = logging.getLogger(__name__)
 
 settings = get_settings()
+OPENAI_MODEL_ID = "text-moderation-latest"
 openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
 
 def check_text(content: str) -> Tuple[str, Dict[str, Any]]:
@@ -18,7 +19,7 @@ def check_text(content: str) -> Tuple[str, Dict[str, Any]]:
         
         response = openai_client.moderations.create(
             input=content,
-            model="text-moderation-latest"
+            model=OPENAI_MODEL_ID
         )
 
         result = response.results[0]
@@ -39,7 +40,7 @@ def check_text(content: str) -> Tuple[str, Dict[str, Any]]:
         return "error", {"error": str(e)}
     
     except Exception as e:
-        logger.error("Encountered an unexpected error: ${e}")
+        logger.error(f"Encountered an unexpected error: {e}")
 
         return "error", {"error": "Service unavailable"}
     
\ No newline at end of file
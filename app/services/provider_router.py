@@ -0,0 +1,366 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.instrumentation import PROVIDER_CALLS, PROVIDER_HEDGES
+from app.services.hugging_face_client import check_text_hf, check_texts_hf, text_model_id
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+Verdict = Tuple[str, Dict[str, Any]]
+
+class ProviderError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` consecutive failures.
+
+    While open, calls are refused until ``reset_timeout`` has passed; then a
+    single trial call is let through (half-open) and its outcome either
+    closes the breaker or re-opens it for another period.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class ProviderStats:
+    """EWMA latency and error rate, plus a window of recent latencies for p95."""
+
+    def __init__(self, alpha: float = 0.2, window: int = 200):
+        self.alpha = alpha
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self.latency = latency if self.latency is None else self.alpha * latency + (1 - self.alpha) * self.latency
+            self.error_rate = self.alpha * (0.0 if ok else 1.0) + (1 - self.alpha) * self.error_rate
+            if ok:
+                self._recent.append(latency)
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if not self._recent:
+                return None
+            ordered = sorted(self._recent)
+            return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class Provider:
+    """A text moderation backend; ``model_id`` names the model behind it, to key cached verdicts.
+
+    ``call_batch`` scores several texts in one request; without one, the
+    texts are sent through ``call`` one at a time.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        call: Callable[[str], Verdict],
+        breaker: CircuitBreaker,
+        model_id: Callable[[], str],
+        call_batch: Optional[Callable[[List[str]], List[Verdict]]] = None
+    ):
+        self.name = name
+        self.call = call
+        self.breaker = breaker
+        self.model_id = model_id
+        self.call_batch = call_batch or (lambda contents: [call(content) for content in contents])
+        self.stats = ProviderStats()
+
+    def score(self, error_penalty: float) -> float:
+        # Unmeasured providers rank first so they get sampled
+        if self.stats.latency is None:
+            return 0.0
+        return self.stats.latency + self.stats.error_rate * error_penalty
+
+
+class ProviderRouter:
+    """Routes each text to the best-scoring provider and hedges slow calls.
+
+    Providers are ranked by EWMA latency plus an error-rate penalty, and
+    any whose circuit breaker is open are skipped. If the chosen provider
+    hasn't answered within its own recent p95 latency (clamped to
+    ``[hedge_min_delay, hedge_max_delay]``), the same text goes to the
+    runner-up and whichever succeeds first wins. An "error" verdict counts
+    as a failure, for the breaker and for picking the winner.
+    """
+
+    def __init__(
+        self,
+        providers: List[Provider],
+        hedge_min_delay: float = 0.05,
+        hedge_max_delay: float = 2.0,
+        timeout: float = 30.0,
+        error_penalty: float = 5.0,
+        max_workers: int = 8
+    ):
+        self.providers = providers
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self.timeout = timeout
+        self.error_penalty = error_penalty
+        self.max_workers = max_workers
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Pool threads don't survive fork(); recreate in each Celery child process
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="provider"
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+    def ranked(self) -> List[Provider]:
+        return sorted(self.providers, key=lambda provider: provider.score(self.error_penalty))
+
+    def _next_allowed(self, candidates: List[Provider]) -> Optional[Provider]:
+        while candidates:
+            provider = candidates.pop(0)
+            if provider.breaker.allow():
+                return provider
+            PROVIDER_CALLS.labels(provider=provider.name, outcome="rejected").inc()
+        return None
+
+    def _measure(self, provider: Provider, call: Callable[[], Any], timed: bool = True) -> Any:
+        """Run ``call`` against ``provider``, feeding its breaker and, if ``timed``, its latency stats."""
+
+        start = time.perf_counter()
+
+        try:
+            result = call()
+
+        except Exception:
+            if timed:
+                provider.stats.record(time.perf_counter() - start, ok=False)
+            provider.breaker.record_failure()
+            PROVIDER_CALLS.labels(provider=provider.name, outcome="failure").inc()
+            raise
+
+        if timed:
+            provider.stats.record(time.perf_counter() - start, ok=True)
+        provider.breaker.record_success()
+        PROVIDER_CALLS.labels(provider=provider.name, outcome="success").inc()
+        return result
+
+    def _call(self, provider: Provider, content: str) -> Verdict:
+        def call() -> Verdict:
+            verdict, scores = provider.call(content)
+            if verdict == "error":
+                raise ProviderError(scores.get("error", "provider returned an error verdict"))
+            return verdict, scores
+
+        return self._measure(provider, call)
+
+    def _call_batch(self, provider: Provider, contents: List[str]) -> List[Verdict]:
+        def call() -> List[Verdict]:
+            verdicts = provider.call_batch(contents)
+            # One bad item is that item's problem; every item failing is the provider's
+            if verdicts and all(verdict == "error" for verdict, _ in verdicts):
+                raise ProviderError(verdicts[0][1].get("error", "provider returned error verdicts"))
+            return verdicts
+
+        # Batch latency says nothing about single-call latency, which drives hedging
+        return self._measure(provider, call, timed=False)
+
+    def _hedge_delay(self, provider: Provider) -> float:
+        p95 = provider.stats.p95()
+        if p95 is None:
+            return self.hedge_max_delay
+        return min(max(p95, self.hedge_min_delay), self.hedge_max_delay)
+
+    def _race(self, call: Callable[[Provider], Any], hedge: bool = True) -> Tuple[Any, Provider]:
+        """Run ``call`` on the best allowed provider, failing over (and hedging) to the next ones.
+
+        Returns the first successful result and who produced it; raises
+        ``ProviderError`` when no provider is allowed or all of them failed.
+        """
+
+        executor = self._get_executor()
+        candidates = self.ranked()
+        deadline = time.monotonic() + self.timeout
+
+        primary = self._next_allowed(candidates)
+        if primary is None:
+            raise ProviderError("All moderation providers unavailable")
+
+        in_flight: Dict[Future, Provider] = {executor.submit(call, primary): primary}
+        hedge_at = time.monotonic() + self._hedge_delay(primary) if hedge else None
+        last_error: Optional[Exception] = None
+
+        while in_flight:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+
+            # Before the hedge fires, wake up in time to send it
+            wake_at = hedge_at if hedge_at is not None else deadline
+            done, _ = wait(list(in_flight), timeout=max(min(wake_at, deadline) - now, 0), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                provider = in_flight.pop(future)
+                try:
+                    return future.result(), provider
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"Provider {provider.name} failed: {e}")
+
+            # Send the hedge when the primary is slow, or fail over once everything in flight has failed
+            hedge_due = hedge_at is not None and time.monotonic() >= hedge_at
+            if hedge_due or not in_flight:
+                hedge_at = None
+                secondary = self._next_allowed(candidates)
+
+                if secondary is not None:
+                    if in_flight:
+                        PROVIDER_HEDGES.labels(provider=secondary.name).inc()
+                    in_flight[executor.submit(call, secondary)] = secondary
+
+        if last_error is None and in_flight:
+            last_error = TimeoutError(f"No provider answered within {self.timeout}s")
+
+        logger.error(f"All moderation providers failed: {last_error}")
+        raise ProviderError("Moderation service temporarily unavailable")
+
+    def check(self, content: str) -> Verdict:
+        return self.route(content)[0]
+
+    def route(self, content: str) -> Tuple[Verdict, Optional[str]]:
+        """Verdict for ``content`` and the model id of the provider that gave it (None on error)."""
+
+        try:
+            verdict, provider = self._race(lambda provider: self._call(provider, content))
+        except ProviderError as e:
+            return ("error", {"error": str(e)}), None
+
+        return verdict, provider.model_id()
+
+    def route_batch(self, contents: List[str]) -> List[Tuple[Verdict, Optional[str]]]:
+        """``route`` for several texts sent as one batch call per provider.
+
+        Batches fail over between providers and respect their breakers but
+        aren't hedged, which would duplicate a whole batch of provider work.
+        Items the answering provider still errored on get no model id.
+        """
+
+        if not contents:
+            return []
+
+        try:
+            verdicts, provider = self._race(lambda provider: self._call_batch(provider, contents), hedge=False)
+        except ProviderError as e:
+            return [(("error", {"error": str(e)}), None)] * len(contents)
+
+        model_id = provider.model_id()
+        return [(verdict, None if verdict[0] == "error" else model_id) for verdict in verdicts]
+
+
+def _build_router() -> ProviderRouter:
+
+    def breaker() -> CircuitBreaker:
+        return CircuitBreaker(settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_SECONDS)
+
+    providers = [Provider("huggingface", check_text_hf, breaker(), text_model_id, call_batch=check_texts_hf)]
+
+    # Only route to OpenAI when it's configured; importing the client builds it
+    if settings.OPENAI_API_KEY:
+        from app.services.openai_client import OPENAI_MODEL_ID, check_text
+
+        providers.append(Provider("openai", check_text, breaker(), lambda: f"openai:{OPENAI_MODEL_ID}"))
+
+    return ProviderRouter(
+        providers,
+        hedge_min_delay=settings.PROVIDER_HEDGE_MIN_DELAY_MS / 1000.0,
+        hedge_max_delay=settings.PROVIDER_HEDGE_MAX_DELAY_MS / 1000.0,
+        timeout=settings.PROVIDER_REQUEST_TIMEOUT_SECONDS
+    )
+
+_router: Optional[ProviderRouter] = None
+_router_lock = threading.Lock()
+
+def get_provider_router() -> ProviderRouter:
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = _build_router()
+    return _router
+
+def route_text(content: str) -> Tuple[Verdict, Optional[str]]:
+    """Moderate one text through the provider router, or straight to HF when routing is off.
+
+    Also returns the model id of whichever provider answered, so callers
+    cache the verdict under the model that actually produced it.
+    """
+
+    if not content.strip():
+        return ("clean", {}), None
+
+    if not settings.PROVIDER_ROUTING_ENABLED:
+        return check_text_hf(content), text_model_id()
+
+    return get_provider_router().route(content)
+
+def route_texts(contents: List[str]) -> List[Tuple[Verdict, Optional[str]]]:
+    """``route_text`` for several texts at once, one batch call per provider tried."""
+
+    if not settings.PROVIDER_ROUTING_ENABLED:
+        model_id = text_model_id()
+        return [(verdict, model_id) for verdict in check_texts_hf(contents)]
+
+    return get_provider_router().route_batch(contents)
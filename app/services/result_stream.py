@@ -0,0 +1,203 @@
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import socket
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional, Set
+from urllib.parse import urlsplit
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.celery_app import celery_app
+from app.core.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+CALLBACK_TTL_SECONDS = 24 * 60 * 60
+
+WEBHOOK_TASK = "tasks.notify.webhook"
+
+# Tasks whose completion is published and can carry a webhook
+MODERATION_TASKS = frozenset({"tasks.text.scan", "tasks.text.scan_batch", "tasks.image.scan"})
+
+
+class CallbackUrlError(ValueError):
+    pass
+
+
+def _host_allowed(host: str) -> bool:
+    # Entries starting with "." match any subdomain
+    return any(
+        host == allowed or (allowed.startswith(".") and host.endswith(allowed))
+        for allowed in settings.WEBHOOK_ALLOWED_HOSTS
+    )
+
+def validate_callback_url(callback_url: str):
+    """Refuse webhook targets workers must not POST to; blocking (resolves DNS).
+
+    Requires https (unless ``WEBHOOK_REQUIRE_HTTPS`` is off). With
+    ``WEBHOOK_ALLOWED_HOSTS`` set the host must be listed; otherwise every
+    address it resolves to must be public, which rules out loopback,
+    private, link-local (cloud metadata) and reserved ranges.
+    """
+
+    url = urlsplit(callback_url)
+
+    if settings.WEBHOOK_REQUIRE_HTTPS and url.scheme != "https":
+        raise CallbackUrlError("Callback URL must use https")
+    if url.scheme not in ("http", "https") or not url.hostname:
+        raise CallbackUrlError("Callback URL must be an absolute http(s) URL")
+
+    host = url.hostname.lower().rstrip(".")
+
+    if settings.WEBHOOK_ALLOWED_HOSTS:
+        if not _host_allowed(host):
+            raise CallbackUrlError(f"Callback host {host} is not allowed")
+        return
+
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, url.port or 443, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError) as e:
+        raise CallbackUrlError(f"Callback host {host} does not resolve") from e
+
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])
+        if not ip.is_global or ip.is_multicast:
+            raise CallbackUrlError(f"Callback host {host} resolves to a non-public address")
+
+def task_channel(task_id: str) -> str:
+    return f"results:task:{task_id}"
+
+def batch_channel(batch_id: str) -> str:
+    return f"results:batch:{batch_id}"
+
+def _callback_key(task_id: str) -> str:
+    return f"callback:{task_id}"
+
+def completion_event(task_id: str, result: Any, group_id: Optional[str] = None) -> Dict[str, Any]:
+    event = {"task_id": task_id, "status": "completed", "result": result}
+    if group_id:
+        event["batch_id"] = group_id
+    return event
+
+def sign_payload(body: bytes, timestamp: str) -> str:
+    """HMAC-SHA256 over ``"<timestamp>.<body>"``, hex encoded."""
+
+    message = timestamp.encode("utf-8") + b"." + body
+    return hmac.new(settings.WEBHOOK_SECRET.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+def queue_webhook(callback_url: str, event: Dict[str, Any]):
+    celery_app.send_task(WEBHOOK_TASK, args=[callback_url, event])
+
+
+class ResultPublisher:
+    """Worker side: announces finished tasks on Redis pub/sub and queues webhooks."""
+
+    def __init__(self, redis_url: Optional[str] = None):
+        self.redis_url = redis_url or settings.REDIS_URL
+        self._redis: Optional[redis.Redis] = None
+
+    def _get_redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(self.redis_url)
+        return self._redis
+
+    def register_callback(self, task_id: str, callback_url: str):
+        self._get_redis().set(_callback_key(task_id), callback_url, ex=CALLBACK_TTL_SECONDS)
+
+    def publish(self, task_id: str, result: Any, group_id: Optional[str] = None):
+        event = completion_event(task_id, result, group_id)
+        message = json.dumps(event, default=str)
+
+        try:
+            client = self._get_redis()
+            pipe = client.pipeline(transaction=False)
+            pipe.publish(task_channel(task_id), message)
+            if group_id:
+                pipe.publish(batch_channel(group_id), message)
+            pipe.get(_callback_key(task_id))
+            pipe.delete(_callback_key(task_id))
+            callback_url = pipe.execute()[-2]
+
+        except redis.RedisError as e:
+            logger.warning(f"Could not publish result of task {task_id}: {e}")
+            return
+
+        if callback_url:
+            queue_webhook(callback_url.decode("utf-8"), event)
+
+result_publisher = ResultPublisher()
+
+
+_async_redis: Optional[aioredis.Redis] = None
+
+def _get_async_redis() -> aioredis.Redis:
+    global _async_redis
+    if _async_redis is None:
+        _async_redis = aioredis.Redis.from_url(settings.REDIS_URL)
+    return _async_redis
+
+async def register_callback_async(task_id: str, callback_url: str):
+    await _get_async_redis().set(_callback_key(task_id), callback_url, ex=CALLBACK_TTL_SECONDS)
+
+def _sse(event: str, data: Any) -> str:
+    payload = data if isinstance(data, str) else json.dumps(data, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+async def stream_results(
+    channel: str,
+    expected: Iterable[str],
+    lookup: Callable[[], Awaitable[Dict[str, Any]]],
+    timeout: Optional[float] = None,
+    keepalive: Optional[float] = None
+) -> AsyncIterator[str]:
+    """Server-sent events for the tasks in ``expected``, ending once all have completed.
+
+    Subscribes before calling ``lookup`` (which returns already-stored
+    results keyed by task id), so a task finishing in between is never
+    missed. A ``done`` event closes the stream; after ``timeout`` seconds
+    it gives up with a ``timeout`` event. Comment lines every ``keepalive``
+    seconds keep proxies from cutting the connection.
+    """
+
+    timeout = timeout if timeout is not None else settings.RESULT_STREAM_TIMEOUT_SECONDS
+    keepalive = keepalive if keepalive is not None else settings.RESULT_STREAM_KEEPALIVE_SECONDS
+
+    remaining: Set[str] = set(expected)
+    pubsub = _get_async_redis().pubsub()
+    await pubsub.subscribe(channel)
+
+    try:
+        for task_id, result in (await lookup()).items():
+            if task_id in remaining:
+                remaining.discard(task_id)
+                yield _sse("result", completion_event(task_id, result))
+
+        deadline = time.monotonic() + timeout
+
+        while remaining:
+            wait = min(keepalive, deadline - time.monotonic())
+            if wait <= 0:
+                yield _sse("timeout", {"pending": sorted(remaining)})
+                return
+
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=wait)
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+
+            event = json.loads(message["data"])
+            if event.get("task_id") in remaining:
+                remaining.discard(event["task_id"])
+                yield _sse("result", event)
+
+        yield _sse("done", {})
+
+    finally:
+        await pubsub.unsubscribe(channel)
+        await pubsub.aclose()
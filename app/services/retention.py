@@ -0,0 +1,308 @@
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import redis
+from sqlalchemy import text
+
+from app.core.config import get_settings
+from app.core.instrumentation import RETENTION_BYTES_RECLAIMED, RETENTION_ROWS_DELETED
+from app.db import partitions
+from app.db.session import get_db_session
+from app.services.blob_store import BLOB_KEY_RE, get_blob_store
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PROGRESS_KEY = "retention:progress"
+
+@dataclass
+class RetentionPolicy:
+    name: str
+    table: str
+    time_column: str
+    max_age_days: int
+    # Extra SQL predicate and its bind params, e.g. to scope a policy to one source
+    condition: Optional[str] = None
+    params: Dict[str, Any] = field(default_factory=dict)
+    # Whole partitions older than this may be dropped instead of deleted row by row
+    drop_partitions_after_days: Optional[int] = None
+
+
+def build_policies() -> List[RetentionPolicy]:
+    default_days = settings.MODERATION_EVENTS_RETENTION_DAYS
+    by_source = settings.RETENTION_DAYS_BY_SOURCE
+
+    policies = [
+        RetentionPolicy(
+            name=f"moderation_events:{source}",
+            table="moderation_events",
+            time_column="created_at",
+            max_age_days=days,
+            condition="source = :source",
+            params={"source": source}
+        )
+        for source, days in by_source.items()
+    ]
+
+    # A partition may only go once every source's retention has passed
+    policies.append(RetentionPolicy(
+        name="moderation_events",
+        table="moderation_events",
+        time_column="created_at",
+        max_age_days=default_days,
+        condition="NOT (source = ANY(:overridden))" if by_source else None,
+        params={"overridden": list(by_source)} if by_source else {},
+        drop_partitions_after_days=max([default_days, *by_source.values()])
+    ))
+
+    policies.append(RetentionPolicy(
+        name="image_analysis",
+        table="image_analysis",
+        time_column="created_at",
+        max_age_days=by_source.get("image", default_days)
+    ))
+
+    policies.append(RetentionPolicy(
+        name="system_metrics",
+        table="system_metrics",
+        time_column="timestamp",
+        max_age_days=settings.SYSTEM_METRICS_RETENTION_DAYS,
+        drop_partitions_after_days=settings.SYSTEM_METRICS_RETENTION_DAYS
+    ))
+
+    for resolution, days in (("1m", settings.METRIC_ROLLUP_1M_RETENTION_DAYS), ("1h", settings.METRIC_ROLLUP_1H_RETENTION_DAYS)):
+        policies.append(RetentionPolicy(
+            name=f"system_metric_rollups:{resolution}",
+            table="system_metric_rollups",
+            time_column="bucket",
+            max_age_days=days,
+            condition="resolution = :resolution",
+            params={"resolution": resolution}
+        ))
+
+    return policies
+
+
+class RetentionEngine:
+    """Applies retention policies without long locks or WAL spikes.
+
+    Expired months of partitioned tables are dropped whole. Everything else
+    goes in bounded ``DELETE ... WHERE (id, ts) IN (SELECT ... LIMIT n)``
+    chunks, each committed on its own, so a run can stop at
+    ``max_runtime_seconds`` and the next run simply carries on. Per-policy
+    progress is recorded in Redis under ``retention:progress``.
+    """
+
+    def __init__(
+        self,
+        policies: List[RetentionPolicy],
+        chunk_size: int = 5000,
+        max_runtime_seconds: int = 600,
+        upload_dir: Optional[str] = None,
+        orphan_grace_hours: int = 24
+    ):
+        self.policies = policies
+        self.chunk_size = chunk_size
+        self.max_runtime_seconds = max_runtime_seconds
+        self.upload_dir = Path(upload_dir or settings.UPLOAD_DIR)
+        self.orphan_grace_hours = orphan_grace_hours
+        self._redis: Optional[redis.Redis] = None
+
+    def _get_redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(settings.REDIS_URL)
+        return self._redis
+
+    def _save_progress(self, policy_name: str, progress: Dict[str, Any]):
+        try:
+            self._get_redis().hset(PROGRESS_KEY, policy_name, json.dumps(progress))
+        except redis.RedisError as e:
+            logger.warning(f"Could not record retention progress for {policy_name}: {e}")
+
+    def _delete_chunk(self, policy: RetentionPolicy, cutoff: datetime) -> int:
+        where = f'"{policy.time_column}" < :cutoff'
+        if policy.condition:
+            where = f"{where} AND {policy.condition}"
+
+        db = get_db_session()
+
+        try:
+            deleted = db.execute(text(f'''
+                DELETE FROM "{policy.table}"
+                WHERE (id, "{policy.time_column}") IN (
+                    SELECT id, "{policy.time_column}" FROM "{policy.table}"
+                    WHERE {where}
+                    LIMIT :limit
+                )
+            '''), {"cutoff": cutoff, "limit": self.chunk_size, **policy.params}).rowcount
+            db.commit()
+            return deleted
+
+        except Exception:
+            db.rollback()
+            raise
+
+        finally:
+            db.close()
+
+    def apply_policy(self, policy: RetentionPolicy, deadline: float) -> Dict[str, Any]:
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=policy.max_age_days)
+        progress: Dict[str, Any] = {
+            "cutoff": cutoff.isoformat(),
+            "rows_deleted": 0,
+            "partitions_dropped": [],
+            "bytes_reclaimed": 0,
+            "status": "in_progress",
+        }
+
+        if policy.drop_partitions_after_days is not None:
+            dropped = partitions.drop_partitions_before(
+                policy.table,
+                now - timedelta(days=policy.drop_partitions_after_days)
+            )
+            progress["partitions_dropped"] = list(dropped)
+            progress["bytes_reclaimed"] = sum(dropped.values())
+            RETENTION_BYTES_RECLAIMED.labels(target=policy.table).inc(progress["bytes_reclaimed"])
+
+        while time.monotonic() < deadline:
+            deleted = self._delete_chunk(policy, cutoff)
+            progress["rows_deleted"] += deleted
+            RETENTION_ROWS_DELETED.labels(table=policy.table).inc(deleted)
+
+            if deleted < self.chunk_size:
+                progress["status"] = "completed"
+                break
+
+        progress["updated_at"] = datetime.now(timezone.utc).isoformat()
+        self._save_progress(policy.name, progress)
+
+        logger.info(f"Retention {policy.name}: {progress['rows_deleted']} rows, "
+                    f"{len(progress['partitions_dropped'])} partitions, {progress['status']}")
+        return progress
+
+    def _referenced_paths(self, refs: List[str], oldest_mtime: datetime) -> set:
+        db = get_db_session()
+
+        try:
+            # Events are written shortly after their upload, so the created_at
+            # bound lets Postgres prune partitions and use the source index
+            rows = db.execute(text('''
+                SELECT DISTINCT file_path FROM moderation_events
+                WHERE source = 'image'
+                  AND created_at >= :since
+                  AND file_path = ANY(:paths)
+            '''), {"since": oldest_mtime - timedelta(days=1), "paths": refs}).scalars().all()
+            return set(rows)
+
+        finally:
+            db.close()
+
+    def _iter_upload_candidates(self, grace_cutoff: float) -> Iterator[Tuple[str, int, float]]:
+        """Yield ``(ref, size, mtime)`` for blobs and legacy upload files past the grace period."""
+
+        yield from get_blob_store().iter_blobs(grace_cutoff)
+
+        # Uploads from before the blob store sit directly in the upload dir,
+        # referenced by path
+        if self.upload_dir.exists():
+            for path in self.upload_dir.iterdir():
+                if not path.is_file():
+                    continue
+
+                stat = path.stat()
+                if stat.st_mtime < grace_cutoff:
+                    yield str(path), stat.st_size, stat.st_mtime
+
+    def _remove_upload(self, ref: str):
+        if BLOB_KEY_RE.match(ref):
+            get_blob_store().delete(ref)
+        else:
+            Path(ref).unlink(missing_ok=True)
+
+    def _remove_stale_parts(self, grace_cutoff: float) -> Tuple[int, int]:
+        files_removed = 0
+        bytes_reclaimed = 0
+        incoming_dir = self.upload_dir / ".incoming"
+
+        if not incoming_dir.exists():
+            return files_removed, bytes_reclaimed
+
+        for path in incoming_dir.glob("*.part"):
+            stat = path.stat()
+            if stat.st_mtime < grace_cutoff:
+                path.unlink(missing_ok=True)
+                files_removed += 1
+                bytes_reclaimed += stat.st_size
+
+        return files_removed, bytes_reclaimed
+
+    def sweep_orphaned_uploads(self, deadline: float) -> Tuple[int, int]:
+        """Remove blobs and upload files no moderation event references; returns (files, bytes).
+
+        Blobs are content-addressed and shared by identical uploads, so a blob
+        only goes once no event at all points at it.
+        """
+
+        grace_cutoff = time.time() - self.orphan_grace_hours * 3600
+        files_removed, bytes_reclaimed = self._remove_stale_parts(grace_cutoff)
+        batch: List[Tuple[str, int, float]] = []
+
+        def sweep_batch():
+            nonlocal files_removed, bytes_reclaimed
+
+            oldest = datetime.fromtimestamp(min(mtime for _, _, mtime in batch), tz=timezone.utc)
+            referenced = self._referenced_paths([ref for ref, _, _ in batch], oldest)
+
+            for ref, size, _ in batch:
+                if ref in referenced:
+                    continue
+                self._remove_upload(ref)
+                files_removed += 1
+                bytes_reclaimed += size
+
+            batch.clear()
+
+        for candidate in self._iter_upload_candidates(grace_cutoff):
+            if time.monotonic() >= deadline:
+                break
+
+            batch.append(candidate)
+            if len(batch) >= 500:
+                sweep_batch()
+
+        if batch:
+            sweep_batch()
+
+        RETENTION_BYTES_RECLAIMED.labels(target="uploads").inc(bytes_reclaimed)
+        logger.info(f"Upload sweep removed {files_removed} files, {bytes_reclaimed} bytes")
+        return files_removed, bytes_reclaimed
+
+    def run(self) -> Dict[str, Any]:
+        deadline = time.monotonic() + self.max_runtime_seconds
+        results: Dict[str, Any] = {}
+
+        for policy in self.policies:
+            if time.monotonic() >= deadline:
+                results[policy.name] = {"status": "deferred"}
+                continue
+
+            results[policy.name] = self.apply_policy(policy, deadline)
+
+        files_removed, bytes_reclaimed = self.sweep_orphaned_uploads(deadline)
+        results["uploads"] = {"files_removed": files_removed, "bytes_reclaimed": bytes_reclaimed}
+
+        return results
+
+retention_engine = RetentionEngine(
+    build_policies(),
+    chunk_size=settings.RETENTION_CHUNK_SIZE,
+    max_runtime_seconds=settings.RETENTION_MAX_RUNTIME_SECONDS,
+    orphan_grace_hours=settings.UPLOAD_ORPHAN_GRACE_HOURS
+)
@@ -0,0 +1,91 @@
+import json
+import logging
+from datetime import date
+from typing import Any, Dict, Optional
+
+import redis
+
+from app.core.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+GENERATION_KEY = "analytics:summary:generation"
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` header against ``etag``."""
+
+    if not if_none_match:
+        return False
+
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in [c.removeprefix("W/") for c in candidates]
+
+
+class SummaryCache:
+    """Redis cache for the analytics summary, invalidated by a generation counter.
+
+    Entries are keyed by the current generation, the window length and
+    today's date. ``bump()`` after ``daily_analytics`` changes orphans
+    every entry at once (they expire on their TTL), and because a
+    generation's summary never changes, the ETag can be derived from the
+    key alone: a conditional request costs one ``GET`` and no database work.
+    When Redis is unavailable the summary is computed uncached, without an ETag.
+    """
+
+    def __init__(self, ttl: int, redis_url: Optional[str] = None):
+        self.ttl = ttl
+        self._redis_url = redis_url or settings.REDIS_URL
+        self._redis: Optional[redis.Redis] = None
+
+    def _get_redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                self._redis_url,
+                socket_timeout=0.5,
+                socket_connect_timeout=0.5
+            )
+        return self._redis
+
+    def _key(self, generation: int, days: int) -> str:
+        return f"analytics:summary:{generation}:{days}:{date.today().isoformat()}"
+
+    def generation(self) -> Optional[int]:
+        try:
+            return int(self._get_redis().get(GENERATION_KEY) or 0)
+        except redis.RedisError as e:
+            logger.warning(f"Summary cache: redis get failed: {e}")
+            return None
+
+    def bump(self):
+        try:
+            self._get_redis().incr(GENERATION_KEY)
+        except redis.RedisError as e:
+            logger.warning(f"Summary cache: could not invalidate: {e}")
+
+    def etag(self, generation: int, days: int) -> str:
+        return f'W/"{self._key(generation, days).removeprefix("analytics:summary:")}"'
+
+    def get(self, generation: Optional[int], days: int) -> Optional[Dict[str, Any]]:
+        if generation is None:
+            return None
+
+        try:
+            raw = self._get_redis().get(self._key(generation, days))
+        except redis.RedisError as e:
+            logger.warning(f"Summary cache: redis get failed: {e}")
+            return None
+
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, generation: Optional[int], days: int, summary: Dict[str, Any]):
+        if generation is None or "error" in summary:
+            return
+
+        try:
+            self._get_redis().set(self._key(generation, days), json.dumps(summary), ex=self.ttl)
+        except redis.RedisError as e:
+            logger.warning(f"Summary cache: redis set failed: {e}")
+
+summary_cache = SummaryCache(ttl=settings.ANALYTICS_SUMMARY_CACHE_TTL_SECONDS)
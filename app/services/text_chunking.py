@@ -0,0 +1,213 @@
+import logging
+import re
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.core.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+Verdict = Tuple[str, Dict[str, Any]]
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+|(?<=[。！？])\s*|\n\s*")
+
+# Characters a BERT tokenizer gives a token of their own: CJK ideographs,
+# kana, hangul, fullwidth forms, and punctuation or symbols
+_SINGLE_TOKEN_CHAR_RE = re.compile(
+    r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]|[^\w\s]"
+)
+
+def estimate_tokens(text: str) -> int:
+    """Upper-bound guess at a text's token count when no tokenizer is loaded.
+
+    CJK and punctuation count one token per character; word characters
+    count one token per three, which overestimates typical English.
+    """
+
+    single = len(_SINGLE_TOKEN_CHAR_RE.findall(text))
+    other = len(text) - single - sum(1 for char in text if char.isspace())
+    return single + -(-other // 3)
+
+def _fits(text: str, max_tokens: int, count_tokens: Callable[[str], int]) -> int:
+    """Length of the longest prefix of ``text`` within ``max_tokens``."""
+
+    low, high = 1, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def _split_long_sentence(
+    sentence: str,
+    max_tokens: int,
+    overlap_tokens: int,
+    count_tokens: Callable[[str], int]
+) -> List[str]:
+    pieces = []
+    start = 0
+
+    while start < len(sentence):
+        end = start + _fits(sentence[start:], max_tokens, count_tokens)
+
+        # Prefer to cut at whitespace rather than mid-word
+        if end < len(sentence):
+            space = sentence.rfind(" ", start + (end - start) // 2, end)
+            if space != -1:
+                end = space
+
+        pieces.append(sentence[start:end].strip())
+        if end >= len(sentence):
+            break
+
+        overlap_chars = (end - start) * overlap_tokens // max_tokens
+        start = max(end - overlap_chars, start + 1)
+
+    return [piece for piece in pieces if piece]
+
+def split_into_chunks(
+    content: str,
+    max_tokens: int = 500,
+    overlap_tokens: int = 64,
+    count_tokens: Callable[[str], int] = estimate_tokens
+) -> List[str]:
+    """Pack whole sentences into chunks of at most ``max_tokens`` by ``count_tokens``.
+
+    Each chunk starts with the trailing sentences of the previous one, up
+    to ``overlap_tokens``, so content spanning a boundary is seen whole at
+    least once. Sentences over ``max_tokens`` are cut, at whitespace where
+    there is any. Sentences are measured once and their counts summed,
+    which is exact for tokenizers that split on whitespace first.
+    """
+
+    sentences: List[Tuple[str, int]] = []
+    for sentence in _SENTENCE_END_RE.split(content):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+
+        tokens = count_tokens(sentence)
+        if tokens > max_tokens:
+            sentences.extend(
+                (piece, count_tokens(piece))
+                for piece in _split_long_sentence(sentence, max_tokens, overlap_tokens, count_tokens)
+            )
+        else:
+            sentences.append((sentence, tokens))
+
+    chunks: List[str] = []
+    current: List[Tuple[str, int]] = []
+    current_tokens = 0
+
+    for sentence, tokens in sentences:
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(" ".join(text for text, _ in current))
+
+            # Carry trailing sentences over as overlap
+            carried: List[Tuple[str, int]] = []
+            carried_tokens = 0
+            for previous in reversed(current):
+                if carried_tokens + previous[1] > overlap_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_tokens += previous[1]
+
+            if carried_tokens + tokens > max_tokens:
+                carried, carried_tokens = [], 0
+            current, current_tokens = carried, carried_tokens
+
+        current.append((sentence, tokens))
+        current_tokens += tokens
+
+    if current:
+        chunks.append(" ".join(text for text, _ in current))
+
+    return chunks
+
+def aggregate_chunk_verdicts(verdicts: List[Verdict]) -> Verdict:
+    """Max score per label; flagged if any chunk is, otherwise error if any chunk failed."""
+
+    scores: Dict[str, Any] = {}
+    for _, chunk_scores in verdicts:
+        for label, score in chunk_scores.items():
+            if isinstance(score, (int, float)):
+                scores[label] = max(score, scores.get(label, 0.0))
+
+    outcomes = [verdict for verdict, _ in verdicts]
+
+    if "flagged" in outcomes:
+        return "flagged", scores
+    if "error" in outcomes:
+        errors = [chunk_scores for verdict, chunk_scores in verdicts if verdict == "error"]
+        return "error", errors[0]
+    return "clean", scores
+
+def score_long_text(
+    content: str,
+    score_batch: Callable[[List[str]], List[Verdict]],
+    max_tokens: int = 500,
+    overlap_tokens: int = 64,
+    wave_size: int = 16,
+    max_chunks: int = 64,
+    count_tokens: Callable[[str], int] = estimate_tokens
+) -> Verdict:
+    """Score text longer than the model's input window chunk by chunk.
+
+    Chunks go to ``score_batch`` in waves of ``wave_size``, one batched
+    call per wave, and scoring stops after the first wave containing a
+    flagged chunk. Texts beyond ``max_chunks`` chunks are cut off there to
+    keep latency bounded.
+    """
+
+    chunks = split_into_chunks(content, max_tokens, overlap_tokens, count_tokens)
+
+    if len(chunks) > max_chunks:
+        logger.warning(f"Text of {len(content)} chars split into {len(chunks)} chunks; scoring the first {max_chunks}")
+        chunks = chunks[:max_chunks]
+
+    verdicts: List[Verdict] = []
+
+    for start in range(0, len(chunks), wave_size):
+        verdicts.extend(score_batch(chunks[start:start + wave_size]))
+
+        if any(verdict == "flagged" for verdict, _ in verdicts):
+            break
+
+    logger.info(f"Scored {len(verdicts)}/{len(chunks)} chunks of a {len(content)} char text")
+    return aggregate_chunk_verdicts(verdicts)
+
+def needs_chunking(content: str, count_tokens: Callable[[str], int] = estimate_tokens) -> bool:
+    # A text never has more tokens than characters, so short ones skip measuring
+    max_tokens = settings.TEXT_CHUNK_MAX_TOKENS
+    return len(content) > max_tokens and count_tokens(content) > max_tokens
+
+def score_texts_chunked(
+    contents: List[str],
+    score_batch: Callable[[List[str]], List[Verdict]],
+    count_tokens: Callable[[str], int] = estimate_tokens
+) -> List[Verdict]:
+    """``score_batch`` for any mix of lengths: short texts share one call, long ones are chunked."""
+
+    short = [index for index, content in enumerate(contents) if not needs_chunking(content, count_tokens)]
+    results: List[Any] = [None] * len(contents)
+
+    if short:
+        for index, verdict in zip(short, score_batch([contents[index] for index in short])):
+            results[index] = verdict
+
+    for index, content in enumerate(contents):
+        if results[index] is None:
+            results[index] = score_long_text(
+                content,
+                score_batch,
+                max_tokens=settings.TEXT_CHUNK_MAX_TOKENS,
+                overlap_tokens=settings.TEXT_CHUNK_OVERLAP_TOKENS,
+                wave_size=settings.TEXT_CHUNK_WAVE_SIZE,
+                max_chunks=settings.TEXT_CHUNK_MAX_CHUNKS,
+                count_tokens=count_tokens
+            )
+
+    return results
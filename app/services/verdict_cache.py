@@ -0,0 +1,58 @@
+import hashlib
+import logging
+import re
+import unicodedata
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import get_settings
+from app.services.cache import TieredCache
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_text(content: str) -> str:
+    normalized = unicodedata.normalize("NFKC", content).casefold()
+    return _WHITESPACE_RE.sub(" ", normalized).strip()
+
+def verdict_cache_key(content: str, model_id: str) -> str:
+    digest = hashlib.sha256(f"{model_id}\0{normalize_text(content)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class VerdictCache:
+
+    def __init__(self, cache: TieredCache, enabled: bool = True):
+        self.cache = cache
+        self.enabled = enabled
+
+    def get(self, content: str, model_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        if not self.enabled:
+            return None
+
+        cached = self.cache.get(verdict_cache_key(content, model_id))
+        if cached is None:
+            return None
+
+        return cached["verdict"], cached["scores"]
+
+    def set(self, content: str, model_id: str, verdict: str, scores: Dict[str, Any]):
+        # Errors are transient, never pin them for the TTL
+        if not self.enabled or verdict == "error":
+            return
+
+        self.cache.set(
+            verdict_cache_key(content, model_id),
+            {"verdict": verdict, "scores": scores}
+        )
+
+verdict_cache = VerdictCache(
+    TieredCache(
+        name="text_verdict",
+        ttl=settings.VERDICT_CACHE_TTL_SECONDS,
+        max_entries=settings.VERDICT_CACHE_MAX_ENTRIES
+    ),
+    enabled=settings.VERDICT_CACHE_ENABLED
+)
@@ -1,3 +1,33 @@
-from app.tasks import text
+import os
 
-__all__ = ["text"]
\ No newline at end of file
+from celery.signals import worker_init, worker_process_shutdown
+from prometheus_client import multiprocess, start_http_server
+
+from app.core.config import get_settings
+from app.core.instrumentation import build_registry
+from app.db.event_sink import event_sink
+from app.db.metric_sink import metric_sink
+from app.tasks import analytics, image, notify, text
+
+__all__ = ["analytics", "image", "notify", "text"]
+
+settings = get_settings()
+
+@worker_init.connect
+def serve_worker_metrics(**kwargs):
+    # The parent process serves metrics for all prefork children via PROMETHEUS_MULTIPROC_DIR
+    if settings.WORKER_METRICS_PORT:
+        start_http_server(settings.WORKER_METRICS_PORT, registry=build_registry())
+
+@worker_process_shutdown.connect
+def flush_event_sink(**kwargs):
+    event_sink.flush()
+
+@worker_process_shutdown.connect
+def flush_metric_sink(**kwargs):
+    metric_sink.flush()
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(**kwargs):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
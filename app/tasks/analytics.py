@@ -1,23 +1,29 @@
 from celery.schedules import crontab
 from app.core.celery_app import celery_app
+from app.core.config import get_settings
+from app.db import partitions
 from app.services.metrics import metrics_collector
-from datetime import date, timedelta
+from app.services.retention import retention_engine
+from datetime import date, datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 @celery_app.task(name="tasks.analytics.update_daily")
 def update_daily_analytics():
 
     try:
-        yesterday = date.today() - timedelta(days=1)
-        metrics_collector.update_daily_analytics(yesterday)
-        
+        today = date.today()
+
+        # Events for yesterday keep trickling in from retries shortly after midnight
+        if datetime.now().hour < 2:
+            metrics_collector.update_daily_analytics(today - timedelta(days=1))
 
-        metrics_collector.update_daily_analytics(date.today())
+        metrics_collector.update_daily_analytics(today)
         
         logger.info("Daily analytics update completed")
-        return {"status": "completed", "date": yesterday.isoformat()}
+        return {"status": "completed", "date": today.isoformat()}
         
     except Exception as e:
         logger.error(f"Daily analytics update failed: {e}")
@@ -27,21 +33,41 @@ def update_daily_analytics():
 def cleanup_old_metrics():
 
     try:
+        results = retention_engine.run()
+
         logger.info("Old metrics cleanup completed")
-        return {"status": "completed"}
+        return {"status": "completed", "results": results}
         
     except Exception as e:
         logger.error(f"Metrics cleanup failed: {e}")
         return {"status": "failed", "error": str(e)}
 
+@celery_app.task(name="tasks.analytics.maintain_partitions")
+def maintain_partitions():
+
+    try:
+        # Expired partitions are dropped by the retention engine in cleanup_old_metrics
+        created = partitions.ensure_partitions(settings.PARTITION_MONTHS_AHEAD)
+
+        logger.info(f"Partition maintenance completed: created {len(created)}")
+        return {"status": "completed", "created": created}
+
+    except Exception as e:
+        logger.error(f"Partition maintenance failed: {e}")
+        return {"status": "failed", "error": str(e)}
+
 
 celery_app.conf.beat_schedule = {
     'update-daily-analytics': {
         'task': 'tasks.analytics.update_daily',
-        'schedule': crontab(hour='1', minute='0'),
+        'schedule': crontab(minute='5'),
+    },
+    'maintain-partitions': {
+        'task': 'tasks.analytics.maintain_partitions',
+        'schedule': crontab(hour='0', minute='30'),
     },
     'cleanup-old-metrics': {
         'task': 'tasks.analytics.cleanup_old_metrics',
-        'schedule': crontab(day_of_week='0', hour='2', minute='0'),
+        'schedule': crontab(hour='2', minute='0'),
     },
 }
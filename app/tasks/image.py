@@ -1,62 +1,58 @@
 import logging
 import time
 
+from celery.signals import worker_process_init
+
 from app.core.celery_app import celery_app
-from app.db.crud import save_event, save_image_analysis
-from app.services.file_storage import FileStorageService
-from app.services.image_analyzer import ImageAnalyzer
+from app.core.config import get_settings
+from app.core.instrumentation import STAGE_LATENCY
+from app.db.event_sink import event_sink
+from app.services.blob_store import open_blob
+from app.services.image_analyzer import image_analyzer
+from app.services.local_image_model import local_image_classifier
 
 
 logger = logging.getLogger(__name__)
-file_storage = FileStorageService()
+settings = get_settings()
+
+@worker_process_init.connect
+def load_local_image_model(**kwargs):
+    if settings.IMAGE_MODEL_BACKEND == "local":
+        local_image_classifier.load()
 
 @celery_app.task(name="tasks.image.scan", bind=True, max_retries=3, default_retry_delay = 60)
-def scan_image(self, image_path: str, source_id: str, file_metadata: dict):
+def scan_image(self, image_ref: str, source_id: str, file_metadata: dict):
+    """``image_ref`` is a blob key (or, for tasks queued before the blob store, a file path)."""
 
     start_time = time.time()
 
     try:
         logger.info(f"Starting image moderation for source_id: {source_id}")
 
-        analyzer = ImageAnalyzer()
+        with open_blob(image_ref) as image_file, STAGE_LATENCY.labels(stage="analyze").time():
+            verdict, analysis_data = image_analyzer.analyze_image(image_file)
 
-        verdict, analysis_data = analyzer.analyze_image(image_path)
         processing_time = time.time() - start_time
 
-        try:
-            from app.db.session import get_db_session
-            db = get_db_session()
-
-            moderation_event = save_event(
-                source="image",
-                item_id=source_id,
-                verdict=verdict,
-                scores=analysis_data.get('nsfw_scores', {}),
-                file_path=image_path,
-                file_size=file_metadata.get('file_size'),
-                file_type=file_metadata.get('file_type'),
-                image_dimensions=file_metadata.get('dimensions', {}),
-                db=db
-            )
-
-            image_analysis = save_image_analysis(
-                moderation_event_id=moderation_event.id,
-                detected_objects=analysis_data.get('detected_objects'),
-                nsfw_scores=analysis_data.get('nsfw_scores'),
-                text_in_image=analysis_data.get('extracted_text'),
-                image_hash=file_metadata.get('file_hash'),
-                processing_time=processing_time,
-                db=db
-            )
-
-            logger.info(f"Saved image moderation event with ID: {moderation_event.id}")
-            db.close()
-            
-        except Exception as db_error:
-            if 'db' in locals():
-                db.rollback()
-                db.close()
-            logger.error(f"Database error: {db_error}")
+        event_sink.add_event(
+            source="image",
+            item_id=source_id,
+            verdict=verdict,
+            scores=analysis_data.get('nsfw_scores', {}),
+            file_path=image_ref,
+            file_size=file_metadata.get('file_size'),
+            file_type=file_metadata.get('file_type'),
+            image_dimensions=file_metadata.get('dimensions', {}),
+            processing_time=processing_time,
+            image_analysis={
+                "detected_objects": analysis_data.get('detected_objects'),
+                "nsfw_scores": analysis_data.get('nsfw_scores'),
+                "text_in_image": analysis_data.get('extracted_text'),
+                "image_hash": file_metadata.get('file_hash'),
+                "perceptual_hash": file_metadata.get('perceptual_hash'),
+                "processing_time": processing_time
+            }
+        )
 
         result = {
             "verdict": verdict,
@@ -71,12 +67,9 @@ def scan_image(self, image_path: str, source_id: str, file_metadata: dict):
         return result
     
     except Exception as exc:
+        # The blob may be shared with other uploads and is needed for retries;
+        # unreferenced blobs are left to the retention sweep
         logger.error(f"Image moderation task failed: {exc}")
-        
-        try:
-            file_storage.delete_file(image_path)
-        except:
-            pass
 
         # Retry logic
         if self.request.retries < self.max_retries:
@@ -0,0 +1,60 @@
+import json
+import logging
+import time
+from typing import Any, Dict
+
+from celery.signals import task_postrun
+
+from app.core.celery_app import celery_app
+from app.services.http_client import get_provider_client
+from app.services.result_stream import (
+    MODERATION_TASKS,
+    WEBHOOK_TASK,
+    CallbackUrlError,
+    result_publisher,
+    sign_payload,
+    validate_callback_url,
+)
+
+
+logger = logging.getLogger(__name__)
+
+@celery_app.task(name=WEBHOOK_TASK, bind=True, max_retries=5)
+def deliver_webhook(self, callback_url: str, event: Dict[str, Any]):
+    # Checked again here: the host may resolve differently than when the API accepted it
+    try:
+        validate_callback_url(callback_url)
+    except CallbackUrlError as e:
+        logger.error(f"Refusing webhook for task {event.get('task_id')} to {callback_url}: {e}")
+        return
+
+    body = json.dumps(event, default=str).encode("utf-8")
+    timestamp = str(int(time.time()))
+
+    try:
+        response = get_provider_client("webhook").post(
+            callback_url,
+            content=body,
+            headers={
+                "Content-Type": "application/json",
+                "X-Moderation-Timestamp": timestamp,
+                "X-Moderation-Signature": f"sha256={sign_payload(body, timestamp)}"
+            },
+            # A redirect could point the signed payload at an internal address
+            follow_redirects=False
+        )
+        response.raise_for_status()
+        logger.info(f"Delivered webhook for task {event.get('task_id')} to {callback_url}")
+
+    except Exception as exc:
+        logger.warning(f"Webhook delivery to {callback_url} failed: {exc}")
+        raise self.retry(countdown=min(30 * 2 ** self.request.retries, 900), exc=exc)
+
+@task_postrun.connect
+def publish_task_result(sender=None, task_id=None, retval=None, state=None, **kwargs):
+    # Retries re-run the task; only announce the final outcome
+    if state not in ("SUCCESS", "FAILURE") or sender is None or sender.name not in MODERATION_TASKS:
+        return
+
+    result = retval if state == "SUCCESS" else {"verdict": "error", "error": str(retval)}
+    result_publisher.publish(task_id, result, group_id=sender.request.group)
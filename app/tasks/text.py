@@ -1,30 +1,51 @@
 import logging
+import time
+from typing import Any, Dict, List
+
+from celery.signals import worker_process_init
 
 from app.core.celery_app import celery_app
-from app.db.crud import save_event
-from app.services.hugging_face_client import check_text_hf
-# from app.services.openai_client import check_text
+from app.core.config import get_settings
+from app.db.event_sink import event_sink
+from app.services.hugging_face_client import text_model_id
+from app.services.cascade import text_cascade
+from app.services.local_text_model import local_text_classifier
+from app.services.provider_router import route_text, route_texts
+from app.services.verdict_cache import verdict_cache
 
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+@worker_process_init.connect
+def load_local_text_model(**kwargs):
+    if settings.TEXT_MODEL_BACKEND == "local":
+        local_text_classifier.load()
 
 @celery_app.task(name="tasks.text.scan", bind=True, max_retries=3, default_retry_delay=60)
 def scan_text(self, content: str, source_id: str):
+    start_time = time.time()
+
     try:
         logger.info(f"Starting text moderation for source_id: {source_id}")
 
-        if not content.strip():
-            verdict, scores = "clean", {}
+        decided = text_cascade.decide(content) if content.strip() else ("clean", {})
+
+        if decided is not None:
+            verdict, scores = decided
         else:
-            verdict, scores = check_text_hf(content)
-            # verdict, scores = check_text(content)
+            cached = verdict_cache.get(content, text_model_id())
 
-        try:
-            event = save_event("text", source_id, verdict, scores)
-            logger.info(f"Saved Moderation event with ID: {event.id}")
+            if cached is not None:
+                verdict, scores = cached
+                logger.info(f"Verdict cache hit for source_id: {source_id}")
+            else:
+                (verdict, scores), model_id = route_text(content)
+                # Keyed by the provider that answered: a failover or hedge may not have been HF
+                if model_id is not None:
+                    verdict_cache.set(content, model_id, verdict, scores)
 
-        except Exception as db_error:
-            logger.error(f"Database error {db_error}")
+        event_sink.add_event("text", source_id, verdict, scores, processing_time=time.time() - start_time)
         
         result = {
             "verdict": verdict,
@@ -33,7 +54,7 @@ def scan_text(self, content: str, source_id: str):
             "content_length": len(content)
         }
 
-        logger.info(f"Completed text moderation: {result["verdict"]} for {source_id}")
+        logger.info(f"Completed text moderation: {verdict} for {source_id}")
 
         return result
     
@@ -49,4 +70,77 @@ def scan_text(self, content: str, source_id: str):
             "scores": {},
             "source_id": source_id,
             "error": str(e)
-        }
\ No newline at end of file
+        }
+
+@celery_app.task(name="tasks.text.scan_batch", bind=True, max_retries=3, default_retry_delay=60)
+def scan_batch(self, items: List[Dict[str, str]]):
+    start_time = time.time()
+
+    try:
+        logger.info(f"Starting batch text moderation of {len(items)} items")
+
+        model_id = text_model_id()
+        verdicts: List[Any] = [None] * len(items)
+        misses: List[int] = []
+
+        for index, item in enumerate(items):
+            content = item["content"]
+
+            if not content.strip():
+                verdicts[index] = ("clean", {})
+                continue
+
+            decided = text_cascade.decide(content)
+            if decided is not None:
+                verdicts[index] = decided
+                continue
+
+            cached = verdict_cache.get(content, model_id)
+            if cached is not None:
+                verdicts[index] = cached
+            else:
+                misses.append(index)
+
+        if misses:
+            # Same failover and breakers as scan_text, one batch call per provider tried
+            scored = route_texts([items[index]["content"] for index in misses])
+
+            for index, ((verdict, scores), answered_by) in zip(misses, scored):
+                verdicts[index] = (verdict, scores)
+                if answered_by is not None:
+                    verdict_cache.set(items[index]["content"], answered_by, verdict, scores)
+
+        # Items are scored together, so each one is charged an equal share of the batch
+        processing_time = (time.time() - start_time) / len(items)
+
+        results = []
+        for item, (verdict, scores) in zip(items, verdicts):
+            event_sink.add_event("text", item["source_id"], verdict, scores, processing_time=processing_time)
+
+            results.append({
+                "verdict": verdict,
+                "scores": scores,
+                "source_id": item["source_id"],
+                "content_length": len(item["content"])
+            })
+
+        logger.info(f"Completed batch text moderation: {len(items)} items, {len(misses)} scored")
+
+        return results
+
+    except Exception as e:
+        logger.error(f"Batch task failed: {e}")
+
+        if self.request.retries < self.max_retries:
+            logger.info(f"Retrying batch task attempt {self.request.retries + 1}")
+            raise self.retry(countdown=60, exc=e)
+
+        return [
+            {
+                "verdict": "error",
+                "scores": {},
+                "source_id": item["source_id"],
+                "error": str(e)
+            }
+            for item in items
+        ]
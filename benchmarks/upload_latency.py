@@ -0,0 +1,107 @@
+"""Upload latency under concurrency for ``POST /api/v1/moderate/image``.
+
+Runs against a live stack (API, Redis, Postgres), e.g.
+
+    python benchmarks/upload_latency.py --url http://localhost:8000 --requests 500 --concurrency 50
+
+and reports p50/p95/p99 of the time to the 202 response. Uploads are
+the images in ``--images`` or, by default, generated photos of mixed
+sizes; each request gets a few random bytes appended so content dedup
+doesn't short-circuit the storage path being measured.
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import httpx
+from PIL import Image
+
+
+ENDPOINT = "/api/v1/moderate/image"
+
+def synthetic_images(count: int) -> List[Tuple[str, bytes]]:
+    images = []
+    for index in range(count):
+        width, height = random.choice([(640, 480), (1920, 1080), (4000, 3000)])
+        img = Image.effect_noise((width // 4, height // 4), 64).convert("RGB").resize((width, height))
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=85)
+        images.append((f"synthetic-{index}.jpg", buffer.getvalue()))
+    return images
+
+def load_images(directory: str) -> List[Tuple[str, bytes]]:
+    paths = sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in {".jpg", ".jpeg", ".png", ".webp"})
+    return [(path.name, path.read_bytes()) for path in paths]
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+async def run(url: str, images: List[Tuple[str, bytes]], total: int, concurrency: int) -> Tuple[List[float], int]:
+    latencies: List[float] = []
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=60.0, limits=httpx.Limits(max_connections=concurrency)) as client:
+
+        async def upload(index: int):
+            nonlocal failures
+            name, data = images[index % len(images)]
+            # Trailing bytes are ignored by decoders but change the SHA-256
+            body = data + os.urandom(16)
+
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(ENDPOINT, files={"file": (name, body, "image/jpeg")})
+                except httpx.HTTPError:
+                    failures += 1
+                    return
+
+                elapsed = time.perf_counter() - start
+
+            if response.status_code == 202:
+                latencies.append(elapsed)
+            else:
+                failures += 1
+
+        await asyncio.gather(*(upload(index) for index in range(total)))
+
+    return latencies, failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--images", help="directory of sample images (default: generated)")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    images = load_images(args.images) if args.images else synthetic_images(12)
+    if not images:
+        sys.exit(f"No images found in {args.images}")
+
+    started = time.perf_counter()
+    latencies, failures = asyncio.run(run(args.url, images, args.requests, args.concurrency))
+    wall = time.perf_counter() - started
+
+    if not latencies:
+        sys.exit(f"All {failures} uploads failed")
+
+    print(f"{len(latencies)} uploads ok, {failures} failed, {args.concurrency} concurrent, "
+          f"{len(latencies) / wall:.1f} req/s")
+    print(f"p50 {percentile(latencies, 0.50) * 1000:.1f} ms  "
+          f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms  "
+          f"mean {statistics.mean(latencies) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
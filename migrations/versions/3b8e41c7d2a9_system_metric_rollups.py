@@ -0,0 +1,49 @@
+"""System metric rollups
+
+Revision ID: 3b8e41c7d2a9
+Revises: ad5b7225fab1
+Create Date: 2026-10-18 16:02:44.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8e41c7d2a9'
+down_revision: Union[str, None] = 'ad5b7225fab1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('system_metric_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('metric_name', sa.String(), nullable=False),
+    sa.Column('resolution', sa.String(), nullable=False),
+    sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('sample_count', sa.Integer(), nullable=False),
+    sa.Column('value_sum', sa.Float(), nullable=False),
+    sa.Column('value_min', sa.Float(), nullable=False),
+    sa.Column('value_max', sa.Float(), nullable=False),
+    sa.Column('metric_unit', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('metric_name', 'resolution', 'bucket', name='uq_system_metric_rollups_name_resolution_bucket')
+    )
+
+    # Backfill from the raw samples still retained; buckets are UTC like the sink's
+    for resolution, unit in (('1m', 'minute'), ('1h', 'hour')):
+        op.execute(f"""
+            INSERT INTO system_metric_rollups
+                (metric_name, resolution, bucket, sample_count, value_sum, value_min, value_max, metric_unit)
+            SELECT metric_name, '{resolution}', date_trunc('{unit}', timestamp AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+                   count(*), sum(metric_value), min(metric_value), max(metric_value), max(metric_unit)
+            FROM system_metrics
+            GROUP BY metric_name, date_trunc('{unit}', timestamp AT TIME ZONE 'UTC')
+        """)
+
+
+def downgrade() -> None:
+    op.drop_table('system_metric_rollups')
@@ -0,0 +1,28 @@
+"""Add image perceptual hash
+
+Revision ID: 456aabb44371
+Revises: 048da3cfb099
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '456aabb44371'
+down_revision: Union[str, None] = '048da3cfb099'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('image_analysis', sa.Column('perceptual_hash', sa.String(), nullable=True))
+    op.create_index(op.f('ix_image_analysis_perceptual_hash'), 'image_analysis', ['perceptual_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_image_analysis_perceptual_hash'), table_name='image_analysis')
+    op.drop_column('image_analysis', 'perceptual_hash')
@@ -0,0 +1,37 @@
+"""Event processing time and daily analytics upsert key
+
+Revision ID: 919fbfcef40c
+Revises: 456aabb44371
+Create Date: 2026-10-18 11:40:07.552913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '919fbfcef40c'
+down_revision: Union[str, None] = '456aabb44371'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('moderation_events', sa.Column('processing_time', sa.Float(), nullable=True))
+
+    # Keep the newest row per (date, source_type) so the unique key can be added
+    op.execute("""
+        DELETE FROM daily_analytics a
+        USING daily_analytics b
+        WHERE a.date = b.date
+          AND a.source_type = b.source_type
+          AND a.id < b.id
+    """)
+    op.create_unique_constraint('uq_daily_analytics_date_source_type', 'daily_analytics', ['date', 'source_type'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_daily_analytics_date_source_type', 'daily_analytics', type_='unique')
+    op.drop_column('moderation_events', 'processing_time')
@@ -0,0 +1,123 @@
+"""Partition moderation_events and system_metrics by month
+
+Revision ID: ad5b7225fab1
+Revises: 919fbfcef40c
+Create Date: 2026-10-18 13:05:52.104417
+
+Rebuilds both tables as native RANGE-partitioned tables (monthly, UTC
+boundaries), copies existing rows across and adds the (item_id) and
+(source, created_at) indexes used by event lookups and daily aggregation.
+
+A foreign key cannot point at a partitioned table unless it includes the
+partition key, so the image_analysis -> moderation_events constraint is
+replaced by a plain index on image_analysis.moderation_event_id.
+
+Future partitions are created ahead of time and expired ones dropped by the
+``tasks.analytics.maintain_partitions`` beat task (see app/db/partitions.py).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ad5b7225fab1'
+down_revision: Union[str, None] = '919fbfcef40c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PARTITIONED_TABLES = {
+    'moderation_events': 'created_at',
+    'system_metrics': 'timestamp',
+}
+
+
+def _partition_table(table: str, column: str) -> None:
+    legacy = f'{table}_legacy'
+
+    op.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+    op.execute(f'ALTER TABLE {legacy} DROP CONSTRAINT {table}_pkey')
+
+    op.execute(f'''
+        CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+        PARTITION BY RANGE ("{column}")
+    ''')
+    op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, "{column}")')
+
+    op.execute(f'''
+        DO $$
+        DECLARE
+            month_start date := date_trunc(
+                'month', COALESCE((SELECT min("{column}") FROM {legacy}), now()) AT TIME ZONE 'UTC'
+            )::date;
+            last_month date := (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '2 months')::date;
+        BEGIN
+            WHILE month_start <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+                    '{table}_' || to_char(month_start, '"y"YYYY"m"MM'),
+                    month_start::timestamp AT TIME ZONE 'UTC',
+                    (month_start + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+                );
+                month_start := (month_start + interval '1 month')::date;
+            END LOOP;
+        END $$
+    ''')
+    op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+    op.execute(f'INSERT INTO {table} SELECT * FROM {legacy}')
+    op.execute(f'DROP TABLE {legacy}')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+
+
+def _unpartition_table(table: str) -> None:
+    partitioned = f'{table}_partitioned'
+
+    op.execute(f'ALTER TABLE {table} RENAME TO {partitioned}')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+    op.execute(f'ALTER TABLE {partitioned} DROP CONSTRAINT {table}_pkey')
+
+    op.execute(f'CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    op.execute(f'INSERT INTO {table} SELECT * FROM {partitioned}')
+    op.execute(f'DROP TABLE {partitioned} CASCADE')
+
+    op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+
+
+def upgrade() -> None:
+    op.drop_constraint('image_analysis_moderation_event_id_fkey', 'image_analysis', type_='foreignkey')
+    op.create_index('ix_image_analysis_moderation_event_id', 'image_analysis', ['moderation_event_id'], unique=False)
+
+    for table, column in PARTITIONED_TABLES.items():
+        _partition_table(table, column)
+
+    op.create_index(op.f('ix_moderation_events_id'), 'moderation_events', ['id'], unique=False)
+    op.create_index(op.f('ix_moderation_events_source'), 'moderation_events', ['source'], unique=False)
+    op.create_index(op.f('ix_moderation_events_item_id'), 'moderation_events', ['item_id'], unique=False)
+    op.create_index('ix_moderation_events_source_created_at', 'moderation_events', ['source', 'created_at'], unique=False)
+
+    op.create_index(op.f('ix_system_metrics_id'), 'system_metrics', ['id'], unique=False)
+    op.create_index(op.f('ix_system_metrics_metric_name'), 'system_metrics', ['metric_name'], unique=False)
+    op.create_index(op.f('ix_system_metrics_timestamp'), 'system_metrics', ['timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    for table in PARTITIONED_TABLES:
+        _unpartition_table(table)
+
+    op.create_index(op.f('ix_moderation_events_id'), 'moderation_events', ['id'], unique=False)
+    op.create_index(op.f('ix_moderation_events_source'), 'moderation_events', ['source'], unique=False)
+
+    op.create_index(op.f('ix_system_metrics_id'), 'system_metrics', ['id'], unique=False)
+    op.create_index(op.f('ix_system_metrics_metric_name'), 'system_metrics', ['metric_name'], unique=False)
+    op.create_index(op.f('ix_system_metrics_timestamp'), 'system_metrics', ['timestamp'], unique=False)
+
+    op.drop_index('ix_image_analysis_moderation_event_id', table_name='image_analysis')
+    op.create_foreign_key(
+        'image_analysis_moderation_event_id_fkey',
+        'image_analysis', 'moderation_events',
+        ['moderation_event_id'], ['id']
+    )
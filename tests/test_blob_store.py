@@ -0,0 +1,146 @@
+import hashlib
+import os
+import time
+import uuid
+
+import pytest
+
+from app.services import blob_store
+from app.services.blob_store import LocalBlobStore, MmapBlobStore, S3BlobStore, open_blob
+
+
+CONTENT = b"\x89PNG fake image bytes"
+KEY = hashlib.sha256(CONTENT).hexdigest()
+
+def write_temp(tmp_path, content: bytes = CONTENT):
+    path = tmp_path / f"{uuid.uuid4().hex}.part"
+    path.write_bytes(content)
+    return path
+
+
+@pytest.fixture(params=[LocalBlobStore, MmapBlobStore], ids=["local", "mmap"])
+def store(request, tmp_path):
+    return request.param(str(tmp_path / "blobs"))
+
+
+def test_put_then_open_round_trips(store, tmp_path):
+    src = write_temp(tmp_path)
+
+    assert store.put_file(KEY, src) is True
+    assert not src.exists()
+    assert store.exists(KEY)
+
+    with store.open(KEY) as f:
+        assert f.read() == CONTENT
+    assert store.get_bytes(KEY) == CONTENT
+
+
+def test_duplicate_put_keeps_one_blob_and_refreshes_mtime(store, tmp_path):
+    store.put_file(KEY, write_temp(tmp_path))
+
+    path = store.path_for(KEY)
+    stale = time.time() - 7 * 24 * 3600
+    os.utime(path, (stale, stale))
+
+    duplicate = write_temp(tmp_path)
+    assert store.put_file(KEY, duplicate) is False
+    assert not duplicate.exists()
+
+    assert [p for p in (tmp_path / "blobs").rglob("*") if p.is_file()] == [path]
+    assert path.stat().st_mtime > stale + 3600
+
+    # A refreshed blob is no longer old enough for the retention sweep
+    assert list(store.iter_blobs(older_than=stale + 3600)) == []
+
+
+def test_put_after_blob_swept_stores_new_copy(store, tmp_path):
+    store.put_file(KEY, write_temp(tmp_path))
+    store.delete(KEY)
+
+    assert store.put_file(KEY, write_temp(tmp_path)) is True
+    assert store.get_bytes(KEY) == CONTENT
+
+
+def test_iter_blobs_reports_only_older_blobs(store, tmp_path):
+    other = b"other image"
+    other_key = hashlib.sha256(other).hexdigest()
+
+    store.put_file(KEY, write_temp(tmp_path))
+    store.put_file(other_key, write_temp(tmp_path, other))
+
+    stale = time.time() - 3600
+    os.utime(store.path_for(other_key), (stale, stale))
+
+    blobs = list(store.iter_blobs(older_than=time.time() - 60))
+    assert [(key, size) for key, size, _ in blobs] == [(other_key, len(other))]
+
+
+def test_mmap_view_reads_without_copy(tmp_path):
+    store = MmapBlobStore(str(tmp_path / "blobs"))
+    store.put_file(KEY, write_temp(tmp_path))
+
+    with store.view(KEY) as view:
+        assert bytes(view[:4]) == CONTENT[:4]
+        assert len(view) == len(CONTENT)
+
+
+def test_open_blob_resolves_keys_and_legacy_paths(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "get_blob_store", lambda: store)
+    store.put_file(KEY, write_temp(tmp_path))
+
+    with open_blob(KEY) as f:
+        assert f.read() == CONTENT
+
+    # Uploads stored before the blob store existed are referenced by path
+    legacy = tmp_path / "uploads" / "images" / "20240101_abcd1234.png"
+    legacy.parent.mkdir(parents=True)
+    legacy.write_bytes(b"legacy bytes")
+
+    with open_blob(str(legacy)) as f:
+        assert f.read() == b"legacy bytes"
+
+
+@pytest.fixture
+def s3_store():
+    """S3 store against a MinIO (or other S3-compatible) endpoint from ``BLOB_TEST_S3_ENDPOINT``."""
+
+    endpoint = os.environ.get("BLOB_TEST_S3_ENDPOINT")
+    if not endpoint:
+        pytest.skip("BLOB_TEST_S3_ENDPOINT not set")
+    pytest.importorskip("boto3")
+
+    store = S3BlobStore(
+        bucket=f"blob-test-{uuid.uuid4().hex[:12]}",
+        endpoint_url=endpoint,
+        access_key=os.environ.get("BLOB_TEST_S3_ACCESS_KEY", "minioadmin"),
+        secret_key=os.environ.get("BLOB_TEST_S3_SECRET_KEY", "minioadmin"),
+        region="us-east-1"
+    )
+    store._client.create_bucket(Bucket=store.bucket)
+    yield store
+
+    for key, _, _ in store.iter_blobs(older_than=time.time() + 3600):
+        store.delete(key)
+    store._client.delete_bucket(Bucket=store.bucket)
+
+
+def test_s3_duplicate_put_keeps_one_object_and_refreshes_last_modified(s3_store, tmp_path):
+    assert s3_store.put_file(KEY, write_temp(tmp_path)) is True
+    first = s3_store._client.head_object(Bucket=s3_store.bucket, Key=KEY)["LastModified"]
+
+    # LastModified has one-second resolution
+    time.sleep(1.1)
+
+    duplicate = write_temp(tmp_path)
+    assert s3_store.put_file(KEY, duplicate) is False
+    assert not duplicate.exists()
+
+    objects = list(s3_store.iter_blobs(older_than=time.time() + 3600))
+    assert [key for key, _, _ in objects] == [KEY]
+    assert s3_store._client.head_object(Bucket=s3_store.bucket, Key=KEY)["LastModified"] > first
+    assert s3_store.get_bytes(KEY) == CONTENT
+
+
+def test_s3_missing_key(s3_store):
+    assert not s3_store.exists(KEY)
+    assert s3_store._touch(KEY) is False
@@ -0,0 +1,199 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.services.provider_router import CircuitBreaker, Provider, ProviderRouter
+
+
+class FakeProviderServer:
+    """Local HTTP server standing in for moderation providers, one path per provider.
+
+    Each path's behaviour (``delay`` seconds, HTTP ``status``, ``verdict``)
+    can be changed between requests; ``hits`` counts requests per path.
+    """
+
+    def __init__(self):
+        self.behaviour = {}
+        self.hits = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                server.hits[self.path] = server.hits.get(self.path, 0) + 1
+                behaviour = server.behaviour.get(self.path, {})
+
+                time.sleep(behaviour.get("delay", 0))
+
+                status = behaviour.get("status", 200)
+                body = json.dumps({"verdict": behaviour.get("verdict", "clean"), "scores": {"toxic": 0.01}}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def provider(self, name: str, breaker: CircuitBreaker) -> Provider:
+        url = f"{self.base_url}/{name}"
+
+        def call(content: str):
+            response = httpx.post(url, json={"text": content}, timeout=5.0)
+            if response.status_code != 200:
+                return "error", {"error": f"HTTP {response.status_code}"}
+            body = response.json()
+            return body["verdict"], body["scores"]
+
+        return Provider(name, call, breaker, lambda: f"{name}-model")
+
+
+@pytest.fixture
+def fake_server():
+    server = FakeProviderServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+def test_breaker_opens_after_threshold_and_half_opens_after_reset(fake_server):
+    fake_server.behaviour["/primary"] = {"status": 503}
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+    router = ProviderRouter([fake_server.provider("primary", breaker)], timeout=5.0)
+
+    for _ in range(2):
+        assert router.route("hello")[0][0] == "error"
+    assert breaker.state == "open"
+
+    # Open: refused without a request reaching the provider
+    assert router.route("hello") == (("error", {"error": "All moderation providers unavailable"}), None)
+    assert fake_server.hits["/primary"] == 2
+
+    time.sleep(0.25)
+    assert breaker.state == "half_open"
+
+    # A failed trial re-opens straight away
+    assert router.route("hello")[0][0] == "error"
+    assert breaker.state == "open"
+    assert fake_server.hits["/primary"] == 3
+
+    time.sleep(0.25)
+    fake_server.behaviour["/primary"] = {"verdict": "flagged"}
+
+    # A successful trial closes it
+    (verdict, _), model_id = router.route("hello")
+    assert (verdict, model_id) == ("flagged", "primary-model")
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_a_single_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_fails_over_to_next_provider_and_reports_who_answered(fake_server):
+    fake_server.behaviour["/primary"] = {"status": 500}
+    fake_server.behaviour["/secondary"] = {"verdict": "flagged"}
+
+    router = ProviderRouter([
+        fake_server.provider("primary", CircuitBreaker()),
+        fake_server.provider("secondary", CircuitBreaker())
+    ], timeout=5.0)
+
+    (verdict, _), model_id = router.route("hello")
+
+    assert verdict == "flagged"
+    assert model_id == "secondary-model"
+    assert fake_server.hits == {"/primary": 1, "/secondary": 1}
+
+
+def test_skips_provider_with_open_breaker(fake_server):
+    open_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60.0)
+    open_breaker.record_failure()
+
+    router = ProviderRouter([
+        fake_server.provider("primary", open_breaker),
+        fake_server.provider("secondary", CircuitBreaker())
+    ], timeout=5.0)
+
+    assert router.route("hello")[1] == "secondary-model"
+    assert "/primary" not in fake_server.hits
+
+
+def test_hedges_slow_primary_after_its_p95(fake_server):
+    fake_server.behaviour["/primary"] = {"delay": 1.0}
+    fake_server.behaviour["/secondary"] = {"verdict": "flagged"}
+
+    primary = fake_server.provider("primary", CircuitBreaker())
+    secondary = fake_server.provider("secondary", CircuitBreaker())
+
+    # Primary is normally fast, so it ranks first and hedges at hedge_min_delay
+    for _ in range(20):
+        primary.stats.record(0.01, ok=True)
+        secondary.stats.record(0.02, ok=True)
+
+    router = ProviderRouter([primary, secondary], hedge_min_delay=0.05, hedge_max_delay=2.0, timeout=5.0)
+
+    start = time.monotonic()
+    (verdict, _), model_id = router.route("hello")
+    elapsed = time.monotonic() - start
+
+    assert (verdict, model_id) == ("flagged", "secondary-model")
+    assert elapsed < 0.8
+    assert fake_server.hits.get("/primary") == 1
+
+
+def test_no_hedge_when_primary_answers_within_p95(fake_server):
+    primary = fake_server.provider("primary", CircuitBreaker())
+    secondary = fake_server.provider("secondary", CircuitBreaker())
+    secondary.stats.record(1.0, ok=True)
+
+    router = ProviderRouter([primary, secondary], hedge_min_delay=0.5, hedge_max_delay=2.0, timeout=5.0)
+
+    assert router.route("hello")[1] == "primary-model"
+    assert "/secondary" not in fake_server.hits
+
+
+def test_batch_fails_over_as_one_call_and_keys_by_provider(fake_server):
+    fake_server.behaviour["/primary"] = {"status": 503}
+    fake_server.behaviour["/secondary"] = {"verdict": "flagged"}
+
+    router = ProviderRouter([
+        fake_server.provider("primary", CircuitBreaker()),
+        fake_server.provider("secondary", CircuitBreaker())
+    ], timeout=5.0)
+
+    routed = router.route_batch(["a", "b", "c"])
+
+    assert [(verdict, model_id) for (verdict, _), model_id in routed] == [("flagged", "secondary-model")] * 3
+    # Every item failed on the primary, so the whole batch moved to the secondary
+    assert fake_server.hits == {"/primary": 3, "/secondary": 3}
+
+
+def test_batch_fails_fast_when_every_breaker_is_open(fake_server):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60.0)
+    breaker.record_failure()
+
+    router = ProviderRouter([fake_server.provider("primary", breaker)], timeout=5.0)
+
+    assert router.route_batch(["a", "b"]) == [(("error", {"error": "All moderation providers unavailable"}), None)] * 2
+    assert fake_server.hits == {}